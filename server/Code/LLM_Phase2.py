@@ -2,17 +2,23 @@
 
 import os
 import time
+import asyncio
 from typing import Dict, Any
-from openai import OpenAI
+from utils.llm_client import get_async_client, run_sync
+from utils.chunking import count_tokens
+from utils.rate_limiter import get_rate_limiter, is_rate_limit_error, retry_after_seconds, backoff_delay
 
 openai_api_key = 'fill your api key here'
 
 class SimpleGPTClient:
     def __init__(self, api_key: str = None, default_timeout: int = 60):
-        self.client = OpenAI(api_key=openai_api_key)
+        self.client = get_async_client(openai_api_key)
         self.default_timeout = default_timeout
     
     def chat(self, user_message: str, max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
+        return run_sync(self.chat_async(user_message, max_retries, timeout))
+    
+    async def chat_async(self, user_message: str, max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
         if timeout is None:
             timeout = self.default_timeout
             
@@ -41,11 +47,13 @@ class SimpleGPTClient:
             {"role": "user", "content": user_message}
         ]
         
+        estimated_tokens = count_tokens(system_prompt + user_message, "gpt-4.1-mini") + 4096
         for attempt in range(max_retries):
             try:
                 print(f"GPT-4.1-mini request attempt {attempt+1}/{max_retries}...")
+                await get_rate_limiter().acquire(estimated_tokens)
                 
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
                     model="gpt-4.1-mini",
                     messages=messages,
                     temperature=0.7,
@@ -59,16 +67,15 @@ class SimpleGPTClient:
             except Exception as e:
                 error_msg = str(e)
                 
-                if "rate_limit" in error_msg.lower() or "429" in error_msg:
-                    if attempt < max_retries - 1:
-                        print("Rate limit exceeded. Waiting before retry...")
-                        time.sleep(5)
-                        continue
+                if attempt < max_retries - 1 and is_rate_limit_error(e):
+                    retry_after = retry_after_seconds(e)
+                    get_rate_limiter().pause(retry_after if retry_after is not None else backoff_delay(attempt + 1))
+                    continue
                 
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Request error: {error_msg}. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
+                    wait_time = backoff_delay(attempt + 1)
+                    print(f"Request error: {error_msg}. Retrying in {wait_time:.2f} seconds...")
+                    await asyncio.sleep(wait_time)
                 else:
                     return {"success": False, "error": error_msg}
         
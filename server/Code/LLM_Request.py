@@ -5,30 +5,135 @@ import os
 import time
 import json
 import glob
-from typing import Dict, Any, List
-from openai import OpenAI
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Any, List, Tuple, Iterator, AsyncIterator
 from agent_Prompt import PromptLoader
+from utils.tracing import span
+from utils.llm_client import get_async_client, run_sync, iterate_sync
+from utils.rate_limiter import get_rate_limiter, is_rate_limit_error, retry_after_seconds, backoff_delay
+from utils.chunking import split_rows, merge_chunk_responses, count_tokens
+from utils.json_extract import extract_json, normalize_numbers
+from utils.structured_output import (
+    compile_validator, response_format as json_schema_format, invalid_fields, patch_schema,
+    apply_patch, numeric_fields, describe_field, describe_fields, format_structured_content
+)
+from utils.analysis_catalog import AnalysisFiles
 
 # Set API key globally
 openai_api_key = 'fill your api key here'
 
 
 class BaseAgent:
-    """Base class for all OpenAI GPT agents to avoid code duplication"""
+    """
+    Base class for all OpenAI GPT agents to avoid code duplication
     
-    def __init__(self, api_key: str = None, default_timeout: int = 60):
-        self.client = OpenAI(api_key=openai_api_key)
+    Agents share one process-wide AsyncOpenAI client (see utils.llm_client).
+    Every request method has an async variant (suffix _async); the synchronous
+    methods run it on the client's shared event loop. Async variants must be
+    awaited on that loop too, e.g. run_sync(asyncio.gather(...)) to fan out
+    many requests from one thread.
+    
+    That loop serves every in-flight request in the process, so blocking work
+    inside the async methods (cache and file I/O, token counting, splitting
+    long documents) runs in worker threads through asyncio.to_thread.
+    """
+    
+    model = "gpt-4.1-mini"
+    temperature = 0.7
+    
+    def __init__(self, api_key: str = None, default_timeout: int = 60, response_cache=None, chunk_tokens: int = None):
+        """
+        Initialize the agent
+        
+        Args:
+            api_key: Unused, the module-level key is used
+            default_timeout: Default request timeout in seconds
+            response_cache: Optional LLMResponseCache; when set, identical requests are served from the cache
+            chunk_tokens: Token budget per request for long documents (see _map_reduce_async); None sends the whole text at once
+        """
+        self._client = None
         self.default_timeout = default_timeout
+        self.response_cache = response_cache
+        self.chunk_tokens = chunk_tokens
+    
+    @property
+    def client(self):
+        """The shared AsyncOpenAI client, created on first use (see utils.llm_client)"""
+        if self._client is None:
+            self._client = get_async_client(openai_api_key)
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
     
-    def check_server(self) -> bool:
-        """Check if the OpenAI API is accessible"""
+    def check_server(self, timeout: float = None) -> bool:
+        """Check if the OpenAI API is accessible (one live round trip)"""
+        return run_sync(self.check_server_async(timeout))
+    
+    async def check_server_async(self, timeout: float = None) -> bool:
+        """Async variant of check_server"""
         try:
-            self.client.models.list()
+            await self.probe_server_async(timeout)
             return True
         except Exception:
             return False
     
-    def _make_request(self, messages: List[Dict[str, str]], max_retries: int = 3, timeout: int = None, max_tokens: int = 10000) -> Dict[str, Any]:
+    def probe_server(self, timeout: float = None) -> None:
+        """Synchronous wrapper around probe_server_async"""
+        run_sync(self.probe_server_async(timeout))
+    
+    async def probe_server_async(self, timeout: float = None) -> None:
+        """
+        List the models of the OpenAI API, raising the error if the API cannot be reached
+        
+        Args:
+            timeout: Request timeout in seconds (None for the client default)
+        """
+        if timeout is None:
+            await self.client.models.list()
+        else:
+            await self.client.models.list(timeout=timeout)
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """
+        Estimate the quota a request uses: prompt tokens plus the completion limit
+        
+        OpenAI counts max_tokens against the tokens-per-minute quota when the
+        request is accepted, so the full completion limit is reserved.
+        """
+        prompt_tokens = sum(count_tokens(message["content"], self.model) + 4 for message in messages)
+        return prompt_tokens + max_tokens
+    
+    def _cache_lookup(self, messages: List[Dict[str, str]], params: Dict[str, Any]):
+        """Build the response cache key of a request and look it up (blocking, run in a worker thread)"""
+        cache_key = self.response_cache.make_key(self.model, messages, **params)
+        return cache_key, self.response_cache.get(cache_key)
+    
+    async def _wait_before_retry(self, error: Exception, attempt: int) -> None:
+        """
+        Wait before retrying a failed request
+        
+        A rate-limit error pauses the shared rate limiter for the time given by
+        the server's Retry-After (or reset) headers, so every queued request
+        backs off together; without such a header, and for other errors, a
+        jittered exponential backoff is used.
+        """
+        if is_rate_limit_error(error):
+            retry_after = retry_after_seconds(error)
+            get_rate_limiter().pause(retry_after if retry_after is not None else backoff_delay(attempt + 1))
+            return
+        wait_time = backoff_delay(attempt + 1)
+        print(f"Request error: {error}. Retrying in {wait_time:.2f} seconds...")
+        await asyncio.sleep(wait_time)
+    
+    def _make_request(self, messages: List[Dict[str, str]], max_retries: int = 3, timeout: int = None, max_tokens: int = 10000, response_format: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Synchronous wrapper around _make_request_async"""
+        return run_sync(self._make_request_async(messages, max_retries, timeout, max_tokens, response_format))
+    
+    async def _make_request_async(self, messages: List[Dict[str, str]], max_retries: int = 3, timeout: int = None, max_tokens: int = 10000, response_format: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Make a request to OpenAI GPT with retry mechanism
         
@@ -37,6 +142,7 @@ class BaseAgent:
             max_retries: Maximum number of retry attempts
             timeout: Request timeout in seconds (overrides default)
             max_tokens: Maximum tokens for the response
+            response_format: Optional response_format of the request (e.g., a JSON schema, see utils.structured_output)
             
         Returns:
             dict: OpenAI GPT response
@@ -44,40 +150,211 @@ class BaseAgent:
         if timeout is None:
             timeout = self.default_timeout
         
+        params = {'temperature': self.temperature, 'max_tokens': max_tokens}
+        if response_format is not None:
+            params['response_format'] = response_format
+        
+        with span('llm.request', agent=type(self).__name__, model=self.model) as attributes:
+            attributes['cached'] = False
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key, cached_content = await asyncio.to_thread(self._cache_lookup, messages, params)
+                if cached_content is not None:
+                    print("OpenAI GPT response served from cache")
+                    attributes['cached'] = True
+                    return {"success": True, "content": cached_content, "cached": True}
+            
+            estimated_tokens = await asyncio.to_thread(self._estimate_tokens, messages, max_tokens)
+            for attempt in range(max_retries):
+                try:
+                    print(f"OpenAI GPT request attempt {attempt+1}/{max_retries}...")
+                    attributes['attempts'] = attempt + 1
+                    attributes['queued_seconds'] = round(
+                        attributes.get('queued_seconds', 0) + await get_rate_limiter().acquire(estimated_tokens), 3
+                    )
+                    
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        timeout=timeout,
+                        **params
+                    )
+                    
+                    content = response.choices[0].message.content
+                    if cache_key is not None and content:
+                        await asyncio.to_thread(self.response_cache.set, cache_key, content)
+                    return {"success": True, "content": content}
+                        
+                except Exception as e:
+                    error_msg = str(e)
+                    if attempt < max_retries - 1:
+                        await self._wait_before_retry(e, attempt)
+                    else:
+                        return {"success": False, "error": error_msg}
+            
+            return {"success": False, "error": "Maximum retry attempts reached"}
+    
+    async def _split_document_async(self, text: str) -> List[str]:
+        """Split a document into chunks of at most chunk_tokens tokens (a single chunk if splitting is disabled)"""
+        if not self.chunk_tokens:
+            return [text]
+        return await asyncio.to_thread(split_rows, text, self.chunk_tokens, self.model)
+    
+    async def _map_reduce_async(self, messages: List[Dict[str, str]], merge, max_retries: int = 3, timeout: int = None, max_tokens: int = 10000, request=None, chunks: List[str] = None) -> Dict[str, Any]:
+        """
+        Send a long document as concurrent chunk requests and merge the answers
+        
+        The user message is split at row and section boundaries into chunks of
+        at most chunk_tokens tokens (see utils.chunking.split_rows). All chunks
+        are sent at once with the same system prompt, so latency follows the
+        largest chunk rather than the whole document. A document that fits the
+        budget is sent as a single request.
+        
+        Args:
+            messages: Conversation for the whole document; the last message holds the document text
+            merge: Callable combining the chunk responses (in document order) into one text
+            max_retries: Maximum number of retry attempts per chunk
+            timeout: Request timeout in seconds (overrides default)
+            max_tokens: Maximum tokens for each chunk's response
+            request: Coroutine function sending one request, called like _make_request_async (the default)
+            chunks: The document text already split by _split_document_async, if the caller has done so
+            
+        Returns:
+            dict: OpenAI GPT response, with 'chunks' set to the number of chunks sent
+        """
+        request = request or self._make_request_async
+        chunks = chunks or await self._split_document_async(messages[-1]["content"])
+        if len(chunks) == 1:
+            return await request(messages, max_retries, timeout, max_tokens)
+        
+        print(f"[CHUNKING] Sending {len(chunks)} chunks of at most {self.chunk_tokens} tokens concurrently")
+        with span('llm.map_reduce', agent=type(self).__name__, chunks=len(chunks)):
+            results = await asyncio.gather(*(
+                request(
+                    messages[:-1] + [{
+                        "role": messages[-1]["role"],
+                        "content": f"[PART {index} OF {len(chunks)}: only some rows of the document are included]\n{chunk}"
+                    }],
+                    max_retries, timeout, max_tokens
+                )
+                for index, chunk in enumerate(chunks, start=1)
+            ))
+        
+        failed = [index for index, result in enumerate(results, start=1) if not result["success"]]
+        if failed:
+            return {
+                "success": False,
+                "error": f"Chunk {failed[0]} of {len(chunks)} failed: {results[failed[0] - 1]['error']}"
+            }
+        return {"success": True, "content": merge([result["content"] for result in results]), "chunks": len(chunks)}
+    
+    async def _stream_map_reduce_async(self, messages: List[Dict[str, str]], merge, max_retries: int = 3, timeout: int = None, max_tokens: int = 10000) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of _map_reduce_async
+        
+        A document that fits chunk_tokens is streamed as a single request. A
+        longer one is sent as concurrent chunk requests exactly like
+        _map_reduce_async, and the merged response is yielded as one delta once
+        every chunk has finished: the chunks' JSON has to be merged before the
+        response is usable, and the concurrent chunks finish sooner than one
+        streamed request for the whole document would.
+        
+        Args:
+            Same as _map_reduce_async (chunks are sent as plain requests)
+            
+        Yields:
+            str: Content deltas, in order
+            
+        Raises:
+            RuntimeError: If a chunk request fails
+        """
+        chunks = await self._split_document_async(messages[-1]["content"])
+        if len(chunks) == 1:
+            async for delta in self._stream_request_async(messages, max_retries, timeout, max_tokens):
+                yield delta
+            return
+        
+        result = await self._map_reduce_async(messages, merge, max_retries, timeout, max_tokens, chunks=chunks)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        yield result["content"]
+    
+    def _stream_request(self, messages: List[Dict[str, str]], max_retries: int = 3, timeout: int = None, max_tokens: int = 10000) -> Iterator[str]:
+        """Synchronous wrapper around _stream_request_async"""
+        return iterate_sync(self._stream_request_async(messages, max_retries, timeout, max_tokens))
+    
+    async def _stream_request_async(self, messages: List[Dict[str, str]], max_retries: int = 3, timeout: int = None, max_tokens: int = 10000) -> AsyncIterator[str]:
+        """
+        Stream a response from OpenAI GPT, yielding content deltas as they arrive
+        
+        Failed attempts are retried only until the first delta has been yielded;
+        after that an error is raised to the caller, since the partial output has
+        already been consumed. The complete text is stored in the response cache,
+        and a cached response is yielded as a single delta.
+        
+        Args:
+            messages: List of message dictionaries for the conversation
+            max_retries: Maximum number of retry attempts
+            timeout: Request timeout in seconds (overrides default)
+            max_tokens: Maximum tokens for the response
+            
+        Yields:
+            str: Content deltas, in order
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key, cached_content = await asyncio.to_thread(
+                self._cache_lookup, messages, {'temperature': self.temperature, 'max_tokens': max_tokens}
+            )
+            if cached_content is not None:
+                print("OpenAI GPT response served from cache")
+                yield cached_content
+                return
+        
+        start_time = time.time()
+        chunks = []
+        estimated_tokens = await asyncio.to_thread(self._estimate_tokens, messages, max_tokens)
         for attempt in range(max_retries):
             try:
-                print(f"OpenAI GPT request attempt {attempt+1}/{max_retries}...")
-                
-                response = self.client.chat.completions.create(
-                    model="gpt-4.1-mini",
+                print(f"OpenAI GPT streaming request attempt {attempt+1}/{max_retries}...")
+                await get_rate_limiter().acquire(estimated_tokens)
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
                     messages=messages,
-                    temperature=0.7,
+                    temperature=self.temperature,
                     max_tokens=max_tokens,
-                    timeout=timeout
+                    timeout=timeout,
+                    stream=True
                 )
                 
-                content = response.choices[0].message.content
-                return {"success": True, "content": content}
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not chunks:
+                            print(f"[STREAM] First token after {time.time() - start_time:.2f}s")
+                        chunks.append(delta)
+                        yield delta
+                break
                     
             except Exception as e:
-                error_msg = str(e)
-                
-                # Handle rate limiting
-                if "rate_limit" in error_msg.lower() or "429" in error_msg:
-                    if attempt < max_retries - 1:
-                        print("Rate limit exceeded. Waiting before retry...")
-                        time.sleep(5)
-                        continue
-                
-                # Handle other errors
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Request error: {error_msg}. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    return {"success": False, "error": error_msg}
+                if chunks or attempt == max_retries - 1:
+                    raise
+                await self._wait_before_retry(e, attempt)
         
-        return {"success": False, "error": "Maximum retry attempts reached"}
+        content = "".join(chunks)
+        print(f"[STREAM] Completed in {time.time() - start_time:.2f}s ({len(content)} characters)")
+        if cache_key is not None and content:
+            await asyncio.to_thread(self.response_cache.set, cache_key, content)
+
+
+def join_chunk_responses(contents: List[str]) -> str:
+    """Join per-chunk markdown responses in document order"""
+    return "\n\n".join(content.strip() for content in contents)
 
 
 class LLMRequest(BaseAgent):
@@ -87,6 +364,9 @@ class LLMRequest(BaseAgent):
         """
         Send text to OpenAI GPT for processing with retry mechanism
         
+        Texts longer than chunk_tokens are processed in concurrent chunks whose
+        markdown outputs are joined in document order.
+        
         Args:
             text: Input text to process
             max_retries: Maximum number of retry attempts
@@ -95,6 +375,35 @@ class LLMRequest(BaseAgent):
         Returns:
             dict: OpenAI GPT response
         """
+        return run_sync(self.process_text_async(text, max_retries, timeout))
+    
+    async def process_text_async(self, text: str, max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
+        """Async variant of process_text"""
+        return await self._map_reduce_async(self._build_messages(text), join_chunk_responses, max_retries, timeout, max_tokens=10000)
+    
+    def stream_text(self, text: str, max_retries: int = 3, timeout: int = None) -> Iterator[str]:
+        """
+        Streaming variant of process_text
+        
+        A text longer than chunk_tokens is processed in concurrent chunks like
+        process_text and yielded as one delta (see _stream_map_reduce_async).
+        
+        Args:
+            text: Input text to process
+            max_retries: Maximum number of retry attempts (before the first delta)
+            timeout: Request timeout in seconds (overrides default)
+            
+        Yields:
+            str: Content deltas of the response
+        """
+        return iterate_sync(self.stream_text_async(text, max_retries, timeout))
+    
+    def stream_text_async(self, text: str, max_retries: int = 3, timeout: int = None) -> AsyncIterator[str]:
+        """Async variant of stream_text"""
+        return self._stream_map_reduce_async(self._build_messages(text), join_chunk_responses, max_retries, timeout, max_tokens=10000)
+    
+    def _build_messages(self, text: str) -> List[Dict[str, str]]:
+        """Build the parsing conversation for the given text"""
         system_prompt = """                    You are a smart financial accountant. You are given a text extracted from a financial document in the Assets section.
         You are thinking about how to take out the financial information that is valueable to capture the financial condition of the company. 
         .The collected information should be significant for fundamentals analysis. Then you return the information in a markdown format.
@@ -115,20 +424,37 @@ class LLMRequest(BaseAgent):
 
 """
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": text}
         ]
-        
-        return self._make_request(messages, max_retries, timeout, max_tokens=10000)
+
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+
+#### Response Format
+
+Respond with a single JSON object and nothing else. Put the extracted data, structured as described above, under "data", and the formulas and logic you applied under "formulas", as a list of strings."""
 
 
 class Financial_Agent(BaseAgent):
-    """Class to handle financial analysis requests to OpenAI GPT API using official library"""
+    """
+    Class to handle financial analysis requests to OpenAI GPT API using official library
+    
+    Analysis types with an output schema in agent_Prompt (<type>.schema.json) are
+    requested in structured output mode and validated against the schema; fields
+    that are missing or invalid are re-asked in small follow-up requests (see
+    _structured_request_async) instead of repeating the whole analysis.
+    """
     
-    def __init__(self, api_key: str = None, default_timeout: int = 60, prompts_dir: str = None, default_analysis_type: str = "income_statement"):
-        super().__init__(api_key, default_timeout)
+    max_schema_repairs = 2  # Follow-up requests for invalid fields per response
+    repair_max_tokens = 1000
+    
+    def __init__(self, api_key: str = None, default_timeout: int = 60, prompts_dir: str = None, default_analysis_type: str = "income_statement", response_cache=None, chunk_tokens: int = None, structured_outputs: bool = True):
+        super().__init__(api_key, default_timeout, response_cache, chunk_tokens)
         self.default_analysis_type = default_analysis_type
+        self.structured_outputs = structured_outputs
+        self._validators = {}
         
         # Initialize the prompt loader
         self.prompt_loader = PromptLoader(prompts_dir)
@@ -137,6 +463,11 @@ class Financial_Agent(BaseAgent):
         """
         Send financial text to OpenAI GPT for analysis with retry mechanism
         
+        Texts longer than chunk_tokens are analyzed in concurrent chunks; the
+        JSON of the chunk analyses is merged into a single JSON block. With
+        structured outputs, the JSON is validated against the analysis type's
+        schema (see _structured_analysis_async).
+        
         Args:
             text: Input financial text to analyze
             analysis_type: Type of analysis to perform (e.g., 'income_statement', 'balance_sheet', 'cash_flow', 'general_analysis')
@@ -146,6 +477,208 @@ class Financial_Agent(BaseAgent):
         Returns:
             dict: OpenAI GPT response with financial analysis
         """
+        return run_sync(self.analyze_financial_data_async(text, analysis_type, max_retries, timeout))
+    
+    async def analyze_financial_data_async(self, text: str, analysis_type: str = None, max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
+        """Async variant of analyze_financial_data"""
+        analysis_type = self._resolve_analysis_type(analysis_type)
+        messages = await asyncio.to_thread(self._build_messages, text, analysis_type)
+        schema = await self._load_schema_async(analysis_type)
+        if schema is None:
+            return await self._map_reduce_async(messages, merge_chunk_responses, max_retries, timeout)
+        return await self._structured_analysis_async(messages, analysis_type, schema, max_retries, timeout)
+    
+    async def _load_schema_async(self, analysis_type: str):
+        """Output schema of an analysis type, or None if structured outputs are disabled or it has none"""
+        if not self.structured_outputs:
+            return None
+        return await asyncio.to_thread(self.prompt_loader.load_schema, analysis_type)
+    
+    async def _structured_analysis_async(self, messages: List[Dict[str, str]], analysis_type: str, schema: Dict[str, Any], max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
+        """
+        Structured analysis of a whole document, in concurrent chunks if it is longer than chunk_tokens
+        
+        A chunk holds only some rows of the document, so it legitimately lacks
+        fields: chunk responses are only re-asked for values they returned in
+        an invalid form. Missing fields are checked once, on the merged JSON,
+        and reported in 'schema_errors' rather than asked of chunks whose text
+        does not hold them.
+        
+        Args:
+            messages: Analysis conversation (system prompt and document text)
+            analysis_type: Analysis type, naming the response format
+            schema: JSON Schema of the analysis data
+            max_retries: Maximum number of retry attempts per request
+            timeout: Request timeout in seconds (overrides default)
+            
+        Returns:
+            dict: OpenAI GPT response as returned by _structured_request_async, with 'chunks'
+                  set to the number of chunks sent for a long document
+        """
+        chunks = await self._split_document_async(messages[-1]["content"])
+        if len(chunks) == 1:
+            return await self._structured_request_async(messages, analysis_type, schema, max_retries, timeout)
+        
+        repaired = []
+        
+        async def request(chunk_messages, max_retries, timeout, max_tokens):
+            result = await self._structured_request_async(chunk_messages, analysis_type, schema, max_retries, timeout, max_tokens, repair_missing=False)
+            repaired.append(result.get("repaired_fields", 0))
+            return result
+        
+        result = await self._map_reduce_async(messages, merge_chunk_responses, max_retries, timeout, request=request, chunks=chunks)
+        data = extract_json(result["content"]) if result["success"] else None
+        if not isinstance(data, dict):
+            return result
+        
+        fields = invalid_fields(self._get_validator(analysis_type, schema), data)
+        if fields:
+            print(f"[SCHEMA] {len(fields)} field(s) of the merged {analysis_type} analysis are invalid:\n{describe_fields(fields)}")
+        result["repaired_fields"] = sum(repaired)
+        result["schema_errors"] = [describe_field(path, message) for path, message in fields]
+        return result
+    
+    async def _structured_request_async(self, messages: List[Dict[str, str]], analysis_type: str, schema: Dict[str, Any], max_retries: int = 3, timeout: int = None, max_tokens: int = 10000, repair_missing: bool = True) -> Dict[str, Any]:
+        """
+        Request an analysis as JSON following a schema, re-asking only for the fields that fail validation
+        
+        The response holds the data and the formulas used. Number-like strings
+        in numeric fields are converted locally; the fields that are still
+        missing or invalid are asked for again in a follow-up request that
+        continues the conversation (the model's own response and any earlier
+        follow-ups included) and only asks for those fields. Each follow-up
+        extends the conversation sent before it, so the API's prompt cache can
+        serve the document text.
+        
+        Args:
+            messages: Analysis conversation (system prompt and document text)
+            analysis_type: Analysis type, naming the response format
+            schema: JSON Schema of the analysis data
+            max_retries: Maximum number of retry attempts per request
+            timeout: Request timeout in seconds (overrides default)
+            max_tokens: Maximum tokens for the analysis response
+            repair_missing: Whether missing fields are re-asked too, or only invalid values
+            
+        Returns:
+            dict: OpenAI GPT response whose content has the validated JSON in a ```json block,
+                  with 'repaired_fields' (fields fixed by follow-up requests) and 'schema_errors'
+                  (fields still invalid); a response without usable JSON is returned unchanged
+        """
+        structured_messages = [
+            {"role": messages[0]["role"], "content": messages[0]["content"] + STRUCTURED_OUTPUT_INSTRUCTIONS}
+        ] + messages[1:]
+        envelope = {
+            "type": "object",
+            "properties": {"data": schema, "formulas": {"type": "array", "items": {"type": "string"}}},
+            "required": ["data", "formulas"]
+        }
+        result = await self._make_request_async(
+            structured_messages, max_retries, timeout, max_tokens,
+            response_format=json_schema_format(f"{analysis_type}_analysis", envelope)
+        )
+        if not result["success"]:
+            return result
+        
+        response = extract_json(result["content"])
+        if not isinstance(response, dict):
+            print(f"[SCHEMA] No JSON object in the {analysis_type} response")
+            return result
+        data = response.get("data", response)
+        formulas = response.get("formulas") if isinstance(response.get("formulas"), list) else []
+        if not isinstance(data, dict):
+            print(f"[SCHEMA] The {analysis_type} response has no data object")
+            return result
+        
+        validator = self._get_validator(analysis_type, schema)
+        number_fields = numeric_fields(schema)
+        normalize_numbers(data, numeric_keys=number_fields, numeric_containers=())
+        fields = invalid_fields(validator, data)
+        repaired = 0
+        conversation = structured_messages + [{"role": "assistant", "content": result["content"]}]
+        
+        for _ in range(self.max_schema_repairs):
+            asked = [(path, message) for path, message in fields if repair_missing or message != 'missing']
+            paths = [path for path, _ in asked]
+            if not asked or () in paths:
+                break
+            print(f"[SCHEMA] Re-asking {len(asked)} invalid field(s) of the {analysis_type} analysis")
+            conversation = conversation + [{"role": "user", "content": (
+                "These fields of the \"data\" object in your JSON are missing or invalid:\n"
+                f"{describe_fields(asked)}\n\n"
+                "Respond with a JSON object holding only these fields, in the same structure as \"data\"."
+            )}]
+            repair = await self._make_request_async(
+                conversation, max_retries, timeout, self.repair_max_tokens,
+                response_format=json_schema_format(f"{analysis_type}_fields", patch_schema(schema, paths))
+            )
+            if not repair["success"]:
+                break
+            conversation = conversation + [{"role": "assistant", "content": repair["content"]}]
+            patch = extract_json(repair["content"])
+            if not isinstance(patch, dict):
+                break
+            normalize_numbers(patch, numeric_keys=number_fields, numeric_containers=())
+            apply_patch(data, patch, paths)
+            remaining = invalid_fields(validator, data)
+            repaired += max(0, len(fields) - len(remaining))
+            fields = remaining
+        
+        unresolved = [(path, message) for path, message in fields if repair_missing or message != 'missing']
+        if unresolved:
+            print(f"[SCHEMA] {len(unresolved)} field(s) of the {analysis_type} analysis are still invalid:\n{describe_fields(unresolved)}")
+        return {
+            "success": True,
+            "content": format_structured_content(data, formulas),
+            "repaired_fields": repaired,
+            "schema_errors": [describe_field(path, message) for path, message in fields]
+        }
+    
+    def _get_validator(self, analysis_type: str, schema: Dict[str, Any]):
+        """Compiled validator of a schema, rebuilt when the schema file has changed"""
+        cached = self._validators.get(analysis_type)
+        if cached is None or cached[0] is not schema:
+            cached = (schema, compile_validator(schema))
+            self._validators[analysis_type] = cached
+        return cached[1]
+    
+    def stream_financial_analysis(self, text: str, analysis_type: str = None, max_retries: int = 3, timeout: int = None) -> Iterator[str]:
+        """
+        Streaming variant of analyze_financial_data
+        
+        Free-text analyses are streamed as they are generated, a document longer
+        than chunk_tokens as one merged delta (see _stream_map_reduce_async).
+        Structured analyses are validated and repaired as a whole before they
+        are usable, so they are yielded as one delta with the same content as
+        analyze_financial_data.
+        
+        Args:
+            text: Input financial text to analyze
+            analysis_type: Type of analysis to perform (falls back to the default like analyze_financial_data)
+            max_retries: Maximum number of retry attempts (before the first delta)
+            timeout: Request timeout in seconds (overrides default)
+            
+        Yields:
+            str: Content deltas of the analysis
+        """
+        return iterate_sync(self.stream_financial_analysis_async(text, analysis_type, max_retries, timeout))
+    
+    async def stream_financial_analysis_async(self, text: str, analysis_type: str = None, max_retries: int = 3, timeout: int = None) -> AsyncIterator[str]:
+        """Async variant of stream_financial_analysis"""
+        analysis_type = self._resolve_analysis_type(analysis_type)
+        messages = await asyncio.to_thread(self._build_messages, text, analysis_type)
+        schema = await self._load_schema_async(analysis_type)
+        if schema is None:
+            async for delta in self._stream_map_reduce_async(messages, merge_chunk_responses, max_retries, timeout):
+                yield delta
+            return
+        
+        result = await self._structured_analysis_async(messages, analysis_type, schema, max_retries, timeout)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        yield result["content"]
+    
+    def _resolve_analysis_type(self, analysis_type: str = None) -> str:
+        """Return the analysis type to use, falling back to the default for None or unknown types"""
         # Use provided analysis_type or fall back to default
         if analysis_type is None:
             analysis_type = self.default_analysis_type
@@ -156,6 +689,11 @@ class Financial_Agent(BaseAgent):
             print(f"Warning: Analysis type '{analysis_type}' not found. Available types: {available_prompts}")
             print(f"Falling back to default analysis type: '{self.default_analysis_type}'")
             analysis_type = self.default_analysis_type
+        return analysis_type
+    
+    def _build_messages(self, text: str, analysis_type: str = None) -> List[Dict[str, str]]:
+        """Build the analysis conversation, loading the system prompt for the analysis type"""
+        analysis_type = self._resolve_analysis_type(analysis_type)
         
         # Load the system prompt for the specified analysis type
         try:
@@ -165,12 +703,10 @@ class Financial_Agent(BaseAgent):
             print(f"Error loading prompt for '{analysis_type}': {e}")
             system_prompt = self.prompt_loader.load_prompt(self.default_analysis_type)
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": text}
         ]
-        
-        return self._make_request(messages, max_retries, timeout)
     
     def list_available_analysis_types(self) -> List[str]:
         """
@@ -196,11 +732,56 @@ class Financial_Agent(BaseAgent):
 
 
 class Summarization_Agent(BaseAgent):
-    """Class to handle summarization of multiple financial analysis JSON documents"""
+    """
+    Class to handle summarization of multiple financial analysis JSON documents
+    
+    Summaries are built hierarchically: every analysis file is condensed into a
+    digest once (cached on disk, keyed on the file's content), digests are
+    combined in reduce rounds until they fit summary_input_tokens, and only
+    that bounded input is sent with the summary prompt. Adding a document
+    therefore costs one digest call instead of re-sending every document.
+    """
+    
+    # Bump when the digest prompts change so cached digests are rebuilt
+    DIGEST_VERSION = 1
+    max_reduce_rounds = 8  # Reduce rounds before giving up on fitting summary_input_tokens
+    
+    DIGEST_PROMPT = """You are a financial analyst preparing notes for a later cross-document summary.
+Condense the financial analysis below into a compact digest:
+- Keep every key figure with its period and unit, all totals, and any ratios or trends.
+- Keep notable observations and risks in a few words each.
+- Use terse bullet points with no introduction or conclusion.
+- Don't fabricate or make up any information."""
     
-    def __init__(self, api_key: str = None, default_timeout: int = 120, financial_analysis_dir: str = None, prompts_dir: str = None, default_summary_type: str = "comprehensive_summary"):
-        super().__init__(api_key, default_timeout)
+    REDUCE_PROMPT = """You are a financial analyst preparing notes for a later cross-document summary.
+Combine the document digests below into one compact digest:
+- Keep every key figure with its period, unit and source document.
+- Merge figures that describe the same item and period; keep conflicting values side by side.
+- Use terse bullet points with no introduction or conclusion.
+- Don't fabricate or make up any information."""
+    
+    def __init__(self, api_key: str = None, default_timeout: int = 120, financial_analysis_dir: str = None, prompts_dir: str = None, default_summary_type: str = "comprehensive_summary", response_cache=None,
+                 digest_dir: str = None, digest_tokens: int = 800, summary_input_tokens: int = 12000, catalog=None):
+        """
+        Initialize the agent
+        
+        Args:
+            financial_analysis_dir: Directory of the analysis JSON files (default: output/financial_analysis)
+            prompts_dir: Directory of the summary prompts (default: agent_Prompt/summarization_agent)
+            default_summary_type: Summary prompt used when none is requested
+            digest_dir: Directory of cached digests (default: summary_digests next to financial_analysis_dir)
+            digest_tokens: Maximum tokens of a digest; files already this small are used as-is
+            summary_input_tokens: Maximum tokens of the input of the final summary request
+            catalog: Optional AnalysisCatalog of financial_analysis_dir; when set, files are
+                     listed from the index and parsed lazily instead of globbed and parsed on every call
+            (other arguments as for BaseAgent)
+        """
+        super().__init__(api_key, default_timeout, response_cache)
         self.default_summary_type = default_summary_type
+        self.catalog = catalog
+        self.digest_tokens = digest_tokens
+        self.summary_input_tokens = summary_input_tokens
+        self._loaded_files = {}
         
         # Set default directory if not provided
         if financial_analysis_dir is None:
@@ -216,6 +797,11 @@ class Summarization_Agent(BaseAgent):
         
         # Initialize the prompt loader
         self.prompt_loader = PromptLoader(prompts_dir)
+        
+        if digest_dir is None:
+            digest_dir = os.path.join(os.path.dirname(self.financial_analysis_dir), 'summary_digests')
+        self.digest_dir = digest_dir
+        os.makedirs(self.digest_dir, exist_ok=True)
     
     def update_default_summary_type(self, new_default: str):
         """
@@ -228,13 +814,25 @@ class Summarization_Agent(BaseAgent):
         self.default_summary_type = new_default
         print(f"Updated Summarization_Agent default summary type from '{old_default}' to '{new_default}'")
     
-    def load_all_analysis_files(self) -> Dict[str, Any]:
+    def load_all_analysis_files(self, category: str = None, analysis_type: str = None) -> Dict[str, Any]:
         """
         Load all JSON analysis files from the financial analysis directory
         
+        With a catalog the result is a lazy mapping: names and count come from
+        the index and a file is only parsed when its content is accessed.
+        
+        Args:
+            category: Only include files of this category (requires a catalog)
+            analysis_type: Only include files of this analysis type (requires a catalog)
+        
         Returns:
             Dict[str, Any]: Dictionary with filename as key and JSON content as value
         """
+        if self.catalog is not None:
+            analysis_files = self.catalog.files(category=category, analysis_type=analysis_type)
+            print(f"Found {len(analysis_files)} analysis files in the catalog")
+            return analysis_files
+        
         analysis_data = {}
         
         if not os.path.exists(self.financial_analysis_dir):
@@ -251,16 +849,27 @@ class Summarization_Agent(BaseAgent):
         
         print(f"Found {len(json_files)} JSON files to process")
         
-        for json_file in json_files:
+        loaded_files = {}
+        for json_file in sorted(json_files):
             try:
                 filename = os.path.basename(json_file)
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    analysis_data[filename] = data
+                stat = os.stat(json_file)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                
+                # Files are only parsed again when they have changed since the last call
+                cached = self._loaded_files.get(json_file)
+                if cached is not None and cached[0] == signature:
+                    data = cached[1]
+                else:
+                    with open(json_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
                     print(f"Loaded: {filename}")
+                loaded_files[json_file] = (signature, data)
+                analysis_data[filename] = data
             except Exception as e:
                 print(f"Error loading {json_file}: {e}")
         
+        self._loaded_files = loaded_files
         return analysis_data
     
     def create_comprehensive_summary(self, analysis_data: Dict[str, Any] = None, summary_type: str = None, max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
@@ -280,9 +889,286 @@ class Summarization_Agent(BaseAgent):
         if analysis_data is None:
             analysis_data = self.load_all_analysis_files()
         
+        return run_sync(self.create_comprehensive_summary_async(analysis_data, summary_type, max_retries, timeout))
+    
+    async def create_comprehensive_summary_async(self, analysis_data: Dict[str, Any] = None, summary_type: str = None, max_retries: int = 3, timeout: int = None) -> Dict[str, Any]:
+        """Async variant of create_comprehensive_summary (files are loaded off the event loop)"""
+        if analysis_data is None:
+            analysis_data = await asyncio.to_thread(self.load_all_analysis_files)
+        
         if not analysis_data:
             return {"success": False, "error": "No analysis data available for summarization"}
         
+        digest_result = await self._reduce_digests_async(analysis_data, max_retries, timeout)
+        if not digest_result["success"]:
+            return digest_result
+        
+        messages = await asyncio.to_thread(self._build_messages, digest_result["content"], summary_type)
+        print("Creating comprehensive financial summary...")
+        return await self._make_request_async(messages, max_retries, timeout, max_tokens=10000)
+    
+    def stream_comprehensive_summary(self, analysis_data: Dict[str, Any] = None, summary_type: str = None, max_retries: int = 3, timeout: int = None) -> Iterator[str]:
+        """
+        Streaming variant of create_comprehensive_summary
+        
+        The digest and reduce stages run when the first delta is requested,
+        not when this method is called.
+        
+        Args:
+            analysis_data: Optional pre-loaded analysis data. If None, will load from directory
+            summary_type: Type of summary to perform (falls back to the default like create_comprehensive_summary)
+            max_retries: Maximum number of retry attempts (before the first delta)
+            timeout: Request timeout in seconds (overrides default)
+            
+        Yields:
+            str: Content deltas of the summary
+            
+        Raises:
+            ValueError: If there is no analysis data
+            RuntimeError: If a digest or reduce request fails (while iterating)
+        """
+        if analysis_data is None:
+            analysis_data = self.load_all_analysis_files()
+        
+        if not analysis_data:
+            raise ValueError("No analysis data available for summarization")
+        
+        return iterate_sync(self.stream_comprehensive_summary_async(analysis_data, summary_type, max_retries, timeout))
+    
+    async def stream_comprehensive_summary_async(self, analysis_data: Dict[str, Any] = None, summary_type: str = None, max_retries: int = 3, timeout: int = None) -> AsyncIterator[str]:
+        """Async variant of stream_comprehensive_summary (raises ValueError on first iteration if there is no data)"""
+        async for event, data in self.stream_comprehensive_summary_events_async(analysis_data, summary_type, max_retries, timeout):
+            if event == 'delta':
+                yield data
+    
+    def stream_comprehensive_summary_events(self, analysis_data: Dict[str, Any] = None, summary_type: str = None, max_retries: int = 3, timeout: int = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Variant of stream_comprehensive_summary that also reports the stages before the first delta
+        
+        Nothing runs until the first event is requested, so a caller can send
+        its response headers before the digest and reduce stages, which may
+        take many requests.
+        
+        Args:
+            Same as stream_comprehensive_summary
+            
+        Yields:
+            tuple: (event, data) pairs, in order:
+                   ('status', {'stage': 'digest', 'files': ...}) before the digests are generated,
+                   ('status', {'stage': 'reduce', 'round': ..., 'digests': ..., 'batches': ...}) before each reduce round,
+                   ('status', {'stage': 'summary'}) before the summary request,
+                   ('delta', str) for each content delta of the summary
+            
+        Raises:
+            ValueError: If there is no analysis data
+            RuntimeError: If a digest or reduce request fails (while iterating)
+        """
+        if analysis_data is None:
+            analysis_data = self.load_all_analysis_files()
+        
+        if not analysis_data:
+            raise ValueError("No analysis data available for summarization")
+        
+        return iterate_sync(self.stream_comprehensive_summary_events_async(analysis_data, summary_type, max_retries, timeout))
+    
+    async def stream_comprehensive_summary_events_async(self, analysis_data: Dict[str, Any] = None, summary_type: str = None, max_retries: int = 3, timeout: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Async variant of stream_comprehensive_summary_events (raises ValueError on first iteration if there is no data)"""
+        if analysis_data is None:
+            analysis_data = await asyncio.to_thread(self.load_all_analysis_files)
+        
+        if not analysis_data:
+            raise ValueError("No analysis data available for summarization")
+        
+        summary_input = None
+        async for event, data in self._reduce_digest_events_async(analysis_data, max_retries, timeout):
+            if event == 'error':
+                raise RuntimeError(data)
+            if event == 'input':
+                summary_input = data
+            else:
+                yield event, data
+        
+        messages = await asyncio.to_thread(self._build_messages, summary_input, summary_type)
+        yield 'status', {'stage': 'summary'}
+        print("Streaming comprehensive financial summary...")
+        async for delta in self._stream_request_async(messages, max_retries, timeout, max_tokens=10000):
+            yield 'delta', delta
+    
+    async def _digest_file_async(self, filename: str, analysis_data: Dict[str, Any], max_retries: int, timeout: int) -> Dict[str, Any]:
+        """
+        Get the digest of one analysis file, generating it only if it is not cached
+        
+        When analysis_data comes from the catalog, the digest is looked up by the
+        indexed content hash, so files with a cached digest are never parsed.
+        
+        Returns:
+            dict: Result with the digest as 'content' and whether it was 'cached'
+        """
+        content_hash = analysis_data.content_hash(filename) if isinstance(analysis_data, AnalysisFiles) else None
+        if content_hash is not None:
+            digest_path = self._digest_path('file', content_hash)
+            digest = await asyncio.to_thread(self._read_digest, digest_path)
+            if digest is not None:
+                return {"success": True, "content": digest, "cached": True}
+        
+        def load_compact():
+            return json.dumps(analysis_data[filename], ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        
+        compact = await asyncio.to_thread(load_compact)
+        if content_hash is None:
+            digest_path = self._digest_path('file', compact)
+            digest = await asyncio.to_thread(self._read_digest, digest_path)
+            if digest is not None:
+                return {"success": True, "content": digest, "cached": True}
+        
+        # Small files are their own digest
+        if await asyncio.to_thread(count_tokens, compact, self.model) <= self.digest_tokens:
+            if content_hash is not None:
+                await asyncio.to_thread(self._write_digest, digest_path, compact)
+            return {"success": True, "content": compact, "cached": True}
+        
+        print(f"Creating digest of {filename}...")
+        messages = [
+            {"role": "system", "content": self.DIGEST_PROMPT},
+            {"role": "user", "content": compact}
+        ]
+        result = await self._make_request_async(messages, max_retries, timeout, max_tokens=self.digest_tokens)
+        if not result["success"]:
+            return {"success": False, "error": f"Digest of {filename} failed: {result['error']}"}
+        await asyncio.to_thread(self._write_digest, digest_path, result["content"])
+        return {"success": True, "content": result["content"], "cached": False}
+    
+    async def _reduce_digests_async(self, analysis_data: Dict[str, Any], max_retries: int, timeout: int) -> Dict[str, Any]:
+        """
+        Condense all analysis files into a summary input of at most summary_input_tokens tokens
+        
+        Map: one cached digest per file, generated concurrently for new or
+        changed files only. Reduce: while the consolidated digests exceed the
+        budget, adjacent digests are packed into batches that fit it and every
+        batch is combined into one digest (also cached, keyed on its inputs).
+        
+        Returns:
+            dict: Result with the consolidated summary input as 'content'; an error if it
+                  still exceeds summary_input_tokens after max_reduce_rounds rounds
+        """
+        async for event, data in self._reduce_digest_events_async(analysis_data, max_retries, timeout):
+            if event == 'error':
+                return {"success": False, "error": data}
+            if event == 'input':
+                return {"success": True, "content": data}
+    
+    async def _reduce_digest_events_async(self, analysis_data: Dict[str, Any], max_retries: int, timeout: int) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        _reduce_digests_async as (event, data) pairs: 'status' events before the digest
+        stage and each reduce round, then ('input', summary input) or ('error', message)
+        """
+        filenames = sorted(analysis_data)
+        yield 'status', {'stage': 'digest', 'files': len(filenames)}
+        with span('summary.digest', files=len(filenames)) as attributes:
+            results = await asyncio.gather(*(
+                self._digest_file_async(filename, analysis_data, max_retries, timeout)
+                for filename in filenames
+            ))
+            attributes['generated'] = sum(1 for result in results if result["success"] and not result["cached"])
+        
+        failed = [result for result in results if not result["success"]]
+        if failed:
+            yield 'error', failed[0]["error"]
+            return
+        
+        generated = sum(1 for result in results if not result["cached"])
+        print(f"Digests ready for {len(filenames)} files ({generated} generated, {len(filenames) - generated} cached)")
+        
+        parts = [f"--- Analysis from: {filename} ---\n{result['content']}" for filename, result in zip(filenames, results)]
+        
+        # Each round at least halves the number of parts unless they no longer fit together
+        round_number = 0
+        input_tokens = await asyncio.to_thread(self._count_summary_input_tokens, parts)
+        while input_tokens > self.summary_input_tokens:
+            if round_number == self.max_reduce_rounds:
+                error = (f"Summary input is still {input_tokens} tokens after {round_number} reduce rounds "
+                         f"(limit {self.summary_input_tokens})")
+                print(error)
+                yield 'error', error
+                return
+            round_number += 1
+            batches = await asyncio.to_thread(self._pack_parts, parts)
+            print(f"Reduce round {round_number}: combining {len(parts)} digests in {len(batches)} batches")
+            yield 'status', {'stage': 'reduce', 'round': round_number, 'digests': len(parts), 'batches': len(batches)}
+            with span('summary.reduce', round=round_number, batches=len(batches)):
+                results = await asyncio.gather(*(
+                    self._combine_digests_async(batch, max_retries, timeout) for batch in batches
+                ))
+            failed = [result for result in results if not result["success"]]
+            if failed:
+                yield 'error', failed[0]["error"]
+                return
+            parts = [f"--- Combined digest {index} ---\n{result['content']}" for index, result in enumerate(results, start=1)]
+            input_tokens = await asyncio.to_thread(self._count_summary_input_tokens, parts)
+        
+        yield 'input', self._consolidate_analysis_data(parts, document_count=len(filenames))
+    
+    async def _combine_digests_async(self, parts: List[str], max_retries: int, timeout: int) -> Dict[str, Any]:
+        """Combine a batch of digests into one (cached, keyed on the batch contents)"""
+        combined_input = "\n\n".join(parts)
+        digest_path = self._digest_path('reduce', combined_input)
+        digest = await asyncio.to_thread(self._read_digest, digest_path)
+        if digest is not None:
+            return {"success": True, "content": digest}
+        
+        messages = [
+            {"role": "system", "content": self.REDUCE_PROMPT},
+            {"role": "user", "content": combined_input}
+        ]
+        result = await self._make_request_async(messages, max_retries, timeout, max_tokens=self.digest_tokens)
+        if not result["success"]:
+            return {"success": False, "error": f"Combining digests failed: {result['error']}"}
+        await asyncio.to_thread(self._write_digest, digest_path, result["content"])
+        return result
+    
+    def _count_summary_input_tokens(self, parts: List[str]) -> int:
+        """Token count of the consolidated digests"""
+        return count_tokens(self._consolidate_analysis_data(parts), self.model)
+    
+    def _pack_parts(self, parts: List[str]) -> List[List[str]]:
+        """Group adjacent digests into batches of at most summary_input_tokens tokens (at least two per batch)"""
+        batches = []
+        current, current_tokens = [], 0
+        for part in parts:
+            tokens = count_tokens(part, self.model)
+            if current and current_tokens + tokens > self.summary_input_tokens and len(current) > 1:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _digest_path(self, kind: str, content: str) -> str:
+        """Cache file of a digest, keyed on its input, the model and the digest prompts"""
+        key = hashlib.sha256(json.dumps(
+            [self.DIGEST_VERSION, kind, self.model, self.digest_tokens, content], ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+        return os.path.join(self.digest_dir, f"{kind}_{key}.txt")
+    
+    def _read_digest(self, digest_path: str):
+        try:
+            with open(digest_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def _write_digest(self, digest_path: str, content: str):
+        # Write to a temporary file first so concurrent readers never see a partial digest
+        # (unique per thread, as digests are written from worker threads)
+        temp_path = f"{digest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, digest_path)
+    
+    def _build_messages(self, summary_input: str, summary_type: str = None) -> List[Dict[str, str]]:
+        """Build the summarization conversation, loading the system prompt for the summary type"""
         # Use provided summary_type or fall back to default
         if summary_type is None:
             summary_type = self.default_summary_type
@@ -302,16 +1188,10 @@ class Summarization_Agent(BaseAgent):
             print(f"Error loading prompt for '{summary_type}': {e}")
             system_prompt = self.prompt_loader.load_prompt(self.default_summary_type)
         
-        # Create a consolidated text from all analysis data
-        consolidated_text = self._consolidate_analysis_data(analysis_data)
-
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": consolidated_text}
+            {"role": "user", "content": summary_input}
         ]
-        
-        print("Creating comprehensive financial summary...")
-        return self._make_request(messages, max_retries, timeout, max_tokens=10000)
     
     def list_available_summary_types(self) -> List[str]:
         """
@@ -335,30 +1215,24 @@ class Summarization_Agent(BaseAgent):
             "cache_info": self.prompt_loader.get_cache_info()
         }
     
-    def _consolidate_analysis_data(self, analysis_data: Dict[str, Any]) -> str:
+    def _consolidate_analysis_data(self, parts: List[str], document_count: int = None) -> str:
         """
-        Consolidate all analysis data into a single text for processing
+        Consolidate the digests into a single text for processing
         
         Args:
-            analysis_data: Dictionary of analysis data from multiple files
+            parts: Digest texts, each starting with a line naming its source
+            document_count: Number of analysis documents behind the digests (defaults to len(parts))
             
         Returns:
-            str: Consolidated text representation of all analysis data
+            str: Consolidated text of all digests
         """
         consolidated_parts = []
         
         consolidated_parts.append("=== COMPREHENSIVE FINANCIAL ANALYSIS DATA ===\n")
-        consolidated_parts.append(f"Total Documents Analyzed: {len(analysis_data)}\n")
+        consolidated_parts.append(f"Total Documents Analyzed: {document_count if document_count is not None else len(parts)}\n")
         
-        for filename, data in analysis_data.items():
-            consolidated_parts.append(f"\n--- Analysis from: {filename} ---")
-            
-            # Convert JSON data to readable text
-            if isinstance(data, dict):
-                consolidated_parts.append(json.dumps(data, indent=2, ensure_ascii=False))
-            else:
-                consolidated_parts.append(str(data))
-            
+        for part in parts:
+            consolidated_parts.append(f"\n{part}")
             consolidated_parts.append("\n" + "="*50)
         
         return "\n".join(consolidated_parts)
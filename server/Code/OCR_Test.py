@@ -4,18 +4,20 @@ import sys
 import glob
 from datetime import datetime
 
-def process_document_ocr_only(img_path, output_dir=None):
+def process_document_ocr_only(img_path, output_dir=None, parser=None):
     """
     Process a financial document image through OCR only (no LLM analysis)
     
     Args:
         img_path: Path to the image file
         output_dir: Directory to save output files (optional)
+        parser: FinancialDocumentParser to reuse (optional; creating one loads the OCR models)
     
     Returns:
         dict: Dictionary containing paths to output files and success status
     """
-    parser = FinancialDocumentParser(lang='en')
+    if parser is None:
+        parser = FinancialDocumentParser(lang='en')
     
     print(f"Processing document with OCR: {img_path}")
     try:
@@ -74,11 +76,12 @@ def process_image_folder_ocr_only(folder_path, output_dir=None):
     
     success_count = 0
     failed_files = []
+    parser = FinancialDocumentParser(lang='en')  # Load the OCR models once for the whole folder
     
     for i, img_path in enumerate(image_files):
         print(f"\nProcessing image {i+1}/{len(image_files)}: {os.path.basename(img_path)}")
         
-        result = process_document_ocr_only(img_path, output_dir)
+        result = process_document_ocr_only(img_path, output_dir, parser=parser)
         
         if result["success"]:
             success_count += 1
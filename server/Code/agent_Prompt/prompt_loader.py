@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import os
+import json
 import logging
 from typing import Dict, List, Optional
 
@@ -22,6 +23,8 @@ class PromptLoader:
         
         self.prompts_dir = prompts_dir
         self._prompt_cache: Dict[str, str] = {}
+        self._prompt_mtimes: Dict[str, int] = {}
+        self._schema_cache: Dict[str, tuple] = {}
         self._logger = logging.getLogger(__name__)
         
         # Fallback prompt (original hard-coded prompt)
@@ -88,8 +91,9 @@ Formatted your response in a json format below:
         Raises:
             ValueError: If prompt_type is invalid and no fallback is available
         """
-        # Check cache first
-        if prompt_type in self._prompt_cache:
+        # Check cache first, reloading if the prompt file changed on disk
+        mtime = self._get_prompt_mtime(prompt_type)
+        if prompt_type in self._prompt_cache and self._prompt_mtimes.get(prompt_type) == mtime:
             return self._prompt_cache[prompt_type]
         
         # Try to load from file
@@ -97,6 +101,7 @@ Formatted your response in a json format below:
             prompt_content = self._load_prompt_from_file(prompt_type)
             # Cache the loaded prompt
             self._prompt_cache[prompt_type] = prompt_content
+            self._prompt_mtimes[prompt_type] = mtime
             return prompt_content
             
         except FileNotFoundError:
@@ -107,6 +112,21 @@ Formatted your response in a json format below:
             self._logger.error(f"Error loading prompt for type '{prompt_type}': {e}. Using fallback prompt.")
             return self._get_fallback_prompt(prompt_type)
     
+    def _get_prompt_mtime(self, prompt_type: str) -> Optional[int]:
+        """
+        Get the modification time of a prompt file
+        
+        Args:
+            prompt_type: Type of analysis prompt
+        
+        Returns:
+            Optional[int]: Modification time in nanoseconds, or None if the file doesn't exist
+        """
+        try:
+            return os.stat(os.path.join(self.prompts_dir, f"{prompt_type}.txt")).st_mtime_ns
+        except OSError:
+            return None
+    
     def _load_prompt_from_file(self, prompt_type: str) -> str:
         """
         Load prompt content from file
@@ -134,6 +154,38 @@ Formatted your response in a json format below:
         self._logger.info(f"Successfully loaded prompt for type '{prompt_type}'")
         return content
     
+    def load_schema(self, prompt_type: str) -> Optional[dict]:
+        """
+        Load the JSON Schema of the output of a prompt type (<prompt_type>.schema.json)
+        
+        The parsed schema is cached until the file changes on disk, so callers
+        get the same object back and can cache work derived from it.
+        
+        Args:
+            prompt_type: Type of analysis prompt
+        
+        Returns:
+            Optional[dict]: The schema, or None if the prompt type has no (readable) schema
+        """
+        file_path = os.path.join(self.prompts_dir, f"{prompt_type}.schema.json")
+        try:
+            mtime = os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+        
+        cached = self._schema_cache.get(prompt_type)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+        except (OSError, ValueError) as e:
+            self._logger.error(f"Error loading schema for type '{prompt_type}': {e}")
+            return None
+        self._schema_cache[prompt_type] = (mtime, schema)
+        return schema
+    
     def _get_fallback_prompt(self, prompt_type: str) -> str:
         """
         Get fallback prompt for given type
@@ -180,6 +232,8 @@ Formatted your response in a json format below:
     def clear_cache(self) -> None:
         """Clear the prompt cache"""
         self._prompt_cache.clear()
+        self._prompt_mtimes.clear()
+        self._schema_cache.clear()
         self._logger.info("Prompt cache cleared")
     
     def get_cache_info(self) -> Dict[str, int]:
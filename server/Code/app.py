@@ -1,44 +1,206 @@
 #!/usr/bin/env python
 # Flask API for Financial Document OCR + LLM Processing
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
 import os
 import json
 import base64
-import tempfile
-import re
-from werkzeug.utils import secure_filename
-from financial_document_parser import FinancialDocumentParser
-from LLM_Request import LLMRequest, Financial_Agent, Summarization_Agent
-from utils.timing import time_it
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from utils.startup import StartupTracker
+
+# Times the imports and setup below (reported by GET /api/ready); the OCR models are
+# not loaded here but on first use or by the background warmup (see start_warmup)
+startup = StartupTracker()
+
+with startup.phase('import flask'):
+    from flask import Flask, Response, request, jsonify, send_file
+    from flask_cors import CORS
+    from werkzeug.utils import secure_filename
+with startup.phase('import document parser'):
+    from financial_document_parser import FinancialDocumentParser
+with startup.phase('import LLM agents'):
+    from LLM_Request import LLMRequest, Financial_Agent, Summarization_Agent
+with startup.phase('import utils'):
+    from utils.timing import time_it, get_timing_store, get_latency_stats, save_timing_data
+    from utils.tracing import start_trace, span
+    from utils.job_queue import JobQueue, QueueFullError
+    from utils.parallel import run_branches
+    from utils.pipeline import run_pipeline
+    from utils.json_extract import extract_json, normalize_numbers
+    from utils.llm_cache import LLMResponseCache
+    from utils.ocr_pool import OCREnginePool
+    from utils.llm_client import configure_llm_client
+    from utils.rate_limiter import configure_rate_limiter, get_rate_limiter
+    from utils.analysis_catalog import AnalysisCatalog
+    from utils.health_monitor import HealthMonitor
 
 app = Flask(__name__)
 # Enable CORS for all routes
 CORS(app)
 
-# Configure upload folder
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 # Configure output folder and subdirectories
 OUTPUT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output')
 TEXT_RESULTS_FOLDER = os.path.join(OUTPUT_FOLDER, 'text_results')
 FINANCIAL_ANALYSIS_FOLDER = os.path.join(OUTPUT_FOLDER, 'financial_analysis')
+OCR_CACHE_FOLDER = os.path.join(OUTPUT_FOLDER, 'ocr_cache')
+OCR_CACHE_SIZE_LIMIT_MB = int(os.environ.get('OCR_CACHE_SIZE_LIMIT_MB', 512))
+LLM_CACHE_FOLDER = os.path.join(OUTPUT_FOLDER, 'llm_cache')
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+LLM_CACHE_SIZE_LIMIT_MB = int(os.environ.get('LLM_CACHE_SIZE_LIMIT_MB', 256))
+SUMMARY_DIGEST_FOLDER = os.path.join(OUTPUT_FOLDER, 'summary_digests')
+SUMMARY_INPUT_TOKENS = int(os.environ.get('SUMMARY_INPUT_TOKENS', 12000))
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 os.makedirs(TEXT_RESULTS_FOLDER, exist_ok=True)
 os.makedirs(FINANCIAL_ANALYSIS_FOLDER, exist_ok=True)
 
-# Initialize parser and LLMs
-parser = FinancialDocumentParser(lang='en')
-llm = LLMRequest(default_timeout=90)
-financial_agent = Financial_Agent(default_timeout=120)
+# Frontend category to Financial_Agent analysis type
+CATEGORY_ANALYSIS_TYPES = {
+    "operating-cost": "income_statement",
+    "profit": "income_statement", 
+    "balance-sheet": "balance_sheet",
+    "cash-flow": "cash_flow"
+}
+
+# Index of the analysis JSON files, so status calls and summaries don't glob and parse the directory
+with startup.phase('analysis catalog'):
+    analysis_catalog = AnalysisCatalog(
+        FINANCIAL_ANALYSIS_FOLDER,
+        os.path.join(OUTPUT_FOLDER, 'analysis_catalog.db'),
+        category_map=CATEGORY_ANALYSIS_TYPES,
+        watch=os.environ.get('ANALYSIS_CATALOG_WATCH', 'true').lower() in ('1', 'true', 'yes')
+    )
+
+# Optional pool of OCR engines in worker processes (0 = single in-process engine).
+# Workers start on first use, or at startup when run directly (see __main__ below)
+OCR_POOL_SIZE = int(os.environ.get('OCR_POOL_SIZE', 0))
+OCR_POOL_CPU_THREADS = int(os.environ.get('OCR_POOL_CPU_THREADS', 0)) or None
+# Limits for the pool: seconds for the workers to load and warm up, and seconds per image (queueing included)
+OCR_POOL_START_TIMEOUT = float(os.environ.get('OCR_POOL_START_TIMEOUT_SECONDS', 600))
+OCR_TASK_TIMEOUT = float(os.environ.get('OCR_TASK_TIMEOUT_SECONDS', 300))
+ocr_pool = OCREnginePool(
+    OCR_POOL_SIZE,
+    FinancialDocumentParser.get_engine_kwargs(lang='en'),
+    cpu_threads=OCR_POOL_CPU_THREADS
+) if OCR_POOL_SIZE > 0 else None
+
+# Initialize parser and LLMs (the parser loads its OCR engine on first use or during warmup)
+with startup.phase('document parser'):
+    parser = FinancialDocumentParser(
+        lang='en',
+        cache_dir=OCR_CACHE_FOLDER,
+        cache_size_limit_mb=OCR_CACHE_SIZE_LIMIT_MB,
+        ocr_engine=ocr_pool,
+        ocr_timeout=OCR_TASK_TIMEOUT,
+        pdf_dpi=int(os.environ.get('PDF_DPI', 200))
+    )
+# Load the OCR models and run a warmup inference in the background at startup (false = load on first use)
+OCR_WARMUP = os.environ.get('OCR_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+OCR_WARMUP_IMAGE = os.environ.get('OCR_WARMUP_IMAGE') or None
+# Artifacts written while processing; the pipeline only reads the text, the rest are generated on download
+OCR_ARTIFACT_FORMATS = [fmt.strip() for fmt in os.environ.get('OCR_ARTIFACT_FORMATS', 'text').split(',') if fmt.strip()]
+if 'text' not in OCR_ARTIFACT_FORMATS:
+    OCR_ARTIFACT_FORMATS.insert(0, 'text')
+# Opt-in response cache shared by all agents
+llm_response_cache = LLMResponseCache(
+    LLM_CACHE_FOLDER,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    size_limit_mb=LLM_CACHE_SIZE_LIMIT_MB
+) if LLM_CACHE_ENABLED else None
+
+# Connection pool of the OpenAI client shared by all agents
+configure_llm_client(
+    max_connections=int(os.environ.get('LLM_MAX_CONNECTIONS', 100)),
+    max_keepalive_connections=int(os.environ.get('LLM_MAX_KEEPALIVE_CONNECTIONS', 20)),
+    keepalive_expiry=float(os.environ.get('LLM_KEEPALIVE_EXPIRY_SECONDS', 60)),
+    http2=os.environ.get('LLM_HTTP2', 'true').lower() in ('1', 'true', 'yes')
+)
+
+# Client-side OpenAI quota (0 = learn it from the x-ratelimit-limit-* response headers)
+configure_rate_limiter(
+    requests_per_minute=int(os.environ.get('LLM_RPM_LIMIT', 0)) or None,
+    tokens_per_minute=int(os.environ.get('LLM_TPM_LIMIT', 0)) or None,
+    utilization=float(os.environ.get('LLM_QUOTA_UTILIZATION', 0.95))
+)
+
+# Long OCR texts are sent as concurrent chunks of at most this many tokens (0 = never split)
+LLM_CHUNK_TOKENS = int(os.environ.get('LLM_CHUNK_TOKENS', 4000)) or None
+
+# Analysis types with an output schema (agent_Prompt/<type>.schema.json) are requested as validated JSON
+LLM_STRUCTURED_OUTPUTS = os.environ.get('LLM_STRUCTURED_OUTPUTS', 'true').lower() in ('1', 'true', 'yes')
+
+llm = LLMRequest(default_timeout=90, response_cache=llm_response_cache, chunk_tokens=LLM_CHUNK_TOKENS)
+financial_agent = Financial_Agent(
+    default_timeout=120,
+    response_cache=llm_response_cache,
+    chunk_tokens=LLM_CHUNK_TOKENS,
+    structured_outputs=LLM_STRUCTURED_OUTPUTS
+)
 summarization_agent = Summarization_Agent(
     default_timeout=120, 
     financial_analysis_dir=FINANCIAL_ANALYSIS_FOLDER, 
-    default_summary_type="income_statement"
+    default_summary_type="income_statement",
+    response_cache=llm_response_cache,
+    digest_dir=SUMMARY_DIGEST_FOLDER,
+    summary_input_tokens=SUMMARY_INPUT_TOKENS,
+    catalog=analysis_catalog
 )
 
+# The OpenAI API is probed in the background and handlers read the cached state; all agents
+# share one client (see utils.llm_client), so a single upstream is monitored for all of them
+HEALTH_PROBE_TIMEOUT = float(os.environ.get('HEALTH_PROBE_TIMEOUT_SECONDS', 10))
+health_monitor = HealthMonitor(
+    interval_seconds=float(os.environ.get('HEALTH_CHECK_INTERVAL_SECONDS', 30)),
+    failure_threshold=int(os.environ.get('HEALTH_FAILURE_THRESHOLD', 3)),
+    open_seconds=float(os.environ.get('HEALTH_OPEN_SECONDS', 60))
+)
+health_monitor.register('openai', lambda: llm.probe_server(timeout=HEALTH_PROBE_TIMEOUT))
+
+# OCR and PDF raster worker processes (spawn / forkserver) re-import this module as __mp_main__
+# when it is run directly; they must not start background threads or load models of their own
+WORKER_PROCESS = __name__ == '__mp_main__'
+if not WORKER_PROCESS:
+    health_monitor.start()
+
+def warm_up_ocr():
+    """Start the OCR engine pool and wait until its workers are warm, or load and warm up the local engine"""
+    if ocr_pool:
+        ocr_pool.start(wait_ready=True, timeout=OCR_POOL_START_TIMEOUT)
+    else:
+        parser.warmup(OCR_WARMUP_IMAGE)
+
+def start_warmup():
+    """
+    Load the OCR models in the background, so the server accepts connections right away
+    
+    GET /api/ready answers 503 until the warmup has finished. Documents
+    arriving earlier wait for the models to load instead of loading them again.
+    """
+    if OCR_WARMUP:
+        startup.run_in_background('ocr_engine', warm_up_ocr)
+
+# Imported by a WSGI server or a script; when run directly the warmup is started in __main__ below
+if __name__ != '__main__' and not WORKER_PROCESS:
+    start_warmup()
+
+# Background job queue for asynchronous document processing
+DOCUMENT_JOB_WORKERS = int(os.environ.get('DOCUMENT_JOB_WORKERS', 2))
+DOCUMENT_JOB_MAX_PENDING = int(os.environ.get('DOCUMENT_JOB_MAX_PENDING', 20))
+document_jobs = JobQueue(max_workers=DOCUMENT_JOB_WORKERS, max_pending=DOCUMENT_JOB_MAX_PENDING)
+
+# Shared pool for the concurrent LLM branches of the document pipeline
+# (sized for two branches per concurrently processed document)
+llm_executor = ThreadPoolExecutor(max_workers=max(4, DOCUMENT_JOB_WORKERS * 2 + 2), thread_name_prefix='llm-branch')
+PARSING_BRANCH_TIMEOUT = 900  # Wall-clock limit for LLMRequest.process_text including retries
+ANALYSIS_BRANCH_TIMEOUT = 1080  # Wall-clock limit for Financial_Agent.analyze_financial_data including retries
+
+# Batch pipeline: OCR workers (one per OCR engine by default) feed LLM workers through bounded queues
+BATCH_OCR_WORKERS = int(os.environ.get('BATCH_OCR_WORKERS', 0)) or max(1, OCR_POOL_SIZE)
+BATCH_LLM_WORKERS = int(os.environ.get('BATCH_LLM_WORKERS', 8))
+BATCH_QUEUE_SIZE = int(os.environ.get('BATCH_QUEUE_SIZE', 8))
+BATCH_MAX_DOCUMENTS = int(os.environ.get('BATCH_MAX_DOCUMENTS', 500))
+batch_branch_executor = ThreadPoolExecutor(max_workers=BATCH_LLM_WORKERS * 2, thread_name_prefix='batch-branch')
+
 # Global variable to track the most recently used analysis type
 _last_used_analysis_type = None
 
@@ -59,6 +221,10 @@ def extract_json_from_text(text_content, output_base_path=None):
     """
     Extract JSON content from analysis text and optionally save to a file
     
+    The largest valid JSON object in the text is used, repaired if needed
+    (see utils.json_extract), and number-like strings under 'value' and
+    'values' keys are converted to numbers.
+    
     Args:
         text_content: Content from Financial_Agent analysis
         output_base_path: Optional base path for saving the JSON file
@@ -67,126 +233,14 @@ def extract_json_from_text(text_content, output_base_path=None):
         dict: Extracted JSON data or None if extraction failed
         str: Path to saved JSON file (if output_base_path provided) or None
     """
-    json_data = None
     json_path = None
     
-    # Strategy 1: Look for JSON in code blocks with ```json
-    json_pattern = r'```json\s*(\{[\s\S]*?\})\s*```'
-    json_match = re.search(json_pattern, text_content, re.DOTALL)
-    
-    if not json_match:
-        # Strategy 2: Look for JSON in code blocks without json tag
-        json_pattern = r'```\s*(\{[\s\S]*?\})\s*```'
-        json_match = re.search(json_pattern, text_content, re.DOTALL)
-    
-    if not json_match:
-        # Strategy 3: Look for any JSON-like structure (greedy match for nested objects)
-        json_pattern = r'(\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\})*)*\})*)*\})'
-        matches = re.findall(json_pattern, text_content, re.DOTALL)
-        # Take the largest match (most likely to be the complete JSON)
-        if matches:
-            json_match = type('Match', (), {'group': lambda self, x: max(matches, key=len)})()
-    
-    if json_match:
-        json_str = json_match.group(1).strip()
-        
-        try:
-            # First attempt: Parse as-is
-            json_data = json.loads(json_str)
-            print("JSON extracted successfully on first attempt")
-            
-        except json.JSONDecodeError as e:
-            print(f"Initial JSON parse failed: {e}")
-            
-            try:
-                # Strategy 4: Clean up common JSON formatting issues
-                cleaned_json = json_str
-                
-                # Remove trailing commas before closing braces/brackets
-                cleaned_json = re.sub(r',(\s*[}\]])', r'\1', cleaned_json)
-                
-                # Fix single quotes to double quotes for JSON compliance
-                cleaned_json = re.sub(r"'([^']*)'(\s*:)", r'"\1"\2', cleaned_json)  # Keys
-                cleaned_json = re.sub(r':\s*\'([^\']*)\'', r': "\1"', cleaned_json)  # String values
-                
-                # Fix unquoted property names
-                cleaned_json = re.sub(r'(\w+)(\s*:)', r'"\1"\2', cleaned_json)
-                
-                # Fix numbers with thousand separators (remove commas in numeric values)
-                cleaned_json = re.sub(r':\s*([0-9,]+(?:\.[0-9]+)?)', 
-                                    lambda m: f': {m.group(1).replace(",", "")}', cleaned_json)
-                
-                # Fix date formatting issues
-                cleaned_json = re.sub(r'"(from|to)":\s*(\d{4}-\d{2}-\d{2})', r'"\1": "\2"', cleaned_json)
-                
-                # Fix boolean values
-                cleaned_json = re.sub(r':\s*(true|false|null)\b', r': \1', cleaned_json, flags=re.IGNORECASE)
-                
-                json_data = json.loads(cleaned_json)
-                print("JSON extracted successfully after cleaning")
-                
-            except json.JSONDecodeError as e2:
-                print(f"Cleaned JSON parse also failed: {e2}")
-                
-                try:
-                    # Strategy 5: More aggressive cleaning and reconstruction
-                    # Remove comments and extra whitespace
-                    lines = json_str.split('\n')
-                    cleaned_lines = []
-                    
-                    for line in lines:
-                        # Remove comments (// style)
-                        line = re.sub(r'//.*$', '', line)
-                        # Remove excessive whitespace but preserve structure
-                        line = line.strip()
-                        if line:
-                            cleaned_lines.append(line)
-                    
-                    reconstructed_json = '\n'.join(cleaned_lines)
-                    
-                    # Apply all previous fixes
-                    reconstructed_json = re.sub(r',(\s*[}\]])', r'\1', reconstructed_json)
-                    reconstructed_json = re.sub(r"'([^']*)'(\s*:)", r'"\1"\2', reconstructed_json)
-                    reconstructed_json = re.sub(r':\s*\'([^\']*)\'', r': "\1"', reconstructed_json)
-                    reconstructed_json = re.sub(r'(\w+)(\s*:)', r'"\1"\2', reconstructed_json)
-                    reconstructed_json = re.sub(r':\s*([0-9,]+(?:\.[0-9]+)?)', 
-                                              lambda m: f': {m.group(1).replace(",", "")}', reconstructed_json)
-                    
-                    json_data = json.loads(reconstructed_json)
-                    print("JSON extracted successfully after reconstruction")
-                    
-                except Exception as e3:
-                    print(f"All JSON parsing strategies failed: {e3}")
-                    print(f"Problematic JSON snippet: {json_str[:500]}...")
-                    json_data = None
-    
-    # Recursive function to clean numeric values in nested structures
-    def clean_numeric_values(obj):
-        if isinstance(obj, dict):
-            cleaned = {}
-            for key, value in obj.items():
-                if key == "value" and isinstance(value, str):
-                    # Try to convert string numbers to actual numbers
-                    try:
-                        # Remove commas and convert
-                        cleaned_value = value.replace(',', '').replace(' ', '')
-                        if '.' in cleaned_value:
-                            cleaned[key] = float(cleaned_value)
-                        else:
-                            cleaned[key] = int(cleaned_value)
-                    except (ValueError, AttributeError):
-                        cleaned[key] = value
-                else:
-                    cleaned[key] = clean_numeric_values(value)
-            return cleaned
-        elif isinstance(obj, list):
-            return [clean_numeric_values(item) for item in obj]
-        else:
-            return obj
-    
-    # Clean the extracted JSON data
+    json_data = extract_json(text_content)
     if json_data:
-        json_data = clean_numeric_values(json_data)
+        json_data = normalize_numbers(json_data)
+        print("JSON extracted successfully")
+    else:
+        print(f"No JSON object could be extracted. Response starts with: {(text_content or '')[:500]}...")
     
     # Save to file if requested and data was extracted
     if output_base_path and json_data:
@@ -211,15 +265,8 @@ def map_category_to_analysis_type(category: str) -> str:
     Returns:
         str: Analysis type for Financial_Agent
     """
-    category_mapping = {
-        "operating-cost": "income_statement",
-        "profit": "income_statement", 
-        "balance-sheet": "balance_sheet",
-        "cash-flow": "cash_flow"
-    }
-    
     # Default to income_statement if category is not recognized
-    return category_mapping.get(category, "income_statement")
+    return CATEGORY_ANALYSIS_TYPES.get(category, "income_statement")
 
 def map_analysis_type_to_summary_type(analysis_type: str) -> str:
     """
@@ -252,6 +299,616 @@ def update_last_used_analysis_type(analysis_type: str):
     summarization_agent.update_default_summary_type(summary_type)
     print(f"Updated last used analysis type to: {analysis_type} (mapped to summary type: {summary_type})")
 
+def decode_json_document(data, default_category='operating-cost'):
+    """
+    Decode one base64 encoded document (frontend UploadedFile structure) in memory
+    
+    The document ID is derived from the content by the parser, since the
+    frontend ID is not unique across uploads.
+    
+    Args:
+        data: Dict with 'image' and optional 'category', 'id' and 'fileFormat'
+        default_category: Category used when the document does not name one
+    
+    Returns:
+        dict: Document info ('image', 'document_id', 'filename', 'category', 'file_id'), or None on error
+        tuple: Error response (payload, status_code) if the document is invalid, otherwise None
+    """
+    if not isinstance(data, dict) or not data.get('image'):
+        return None, ({'success': False, 'error': 'No image data provided'}, 400)
+    
+    # Extract metadata from frontend UploadedFile structure
+    category = data.get('category', default_category)
+    file_id = data.get('id', 'unknown')
+    file_format = data.get('fileFormat', 'image')
+    
+    # PDFs are recognized by their header, so fileFormat only labels the span
+    with span('decode_upload', format=file_format):
+        try:
+            image = base64.b64decode(data['image'])
+        except ValueError:
+            return None, ({'success': False, 'error': 'Image data is not valid base64'}, 400)
+    
+    return {
+        'image': image,
+        'document_id': None,
+        'filename': f"{file_id}_{category}",
+        'category': category,
+        'file_id': file_id
+    }, None
+
+def read_uploaded_document(file, category, file_id):
+    """
+    Read one multipart upload into memory
+    
+    Args:
+        file: Uploaded werkzeug FileStorage
+        category: Frontend category
+        file_id: Frontend file identifier
+    
+    Returns:
+        dict: Document info ('image', 'document_id', 'filename', 'category', 'file_id'), or None on error
+        tuple: Error response (payload, status_code) if the file is invalid, otherwise None
+    """
+    if file.filename == '':
+        return None, ({'success': False, 'error': 'Empty file name'}, 400)
+    
+    filename = secure_filename(file.filename)
+    with span('read_upload'):
+        image = file.read()
+    if not image:
+        return None, ({'success': False, 'error': f"Empty file: {filename}"}, 400)
+    
+    return {
+        'image': image,
+        'document_id': os.path.splitext(filename)[0] or None,
+        'filename': filename,
+        'category': category,
+        'file_id': file_id
+    }, None
+
+def parse_document_request():
+    """
+    Read the uploaded document from the current request into memory
+    
+    Accepts either a JSON body with a base64 encoded 'image' (frontend UploadedFile structure)
+    or a multipart upload with a 'document' file field.
+    
+    Returns:
+        dict: Document info ('image', 'document_id', 'filename', 'category', 'file_id'), or None on error
+        tuple: Error response (payload, status_code) if the request is invalid, otherwise None
+    """
+    if request.is_json:
+        # Handle JSON request with base64 encoded image
+        return decode_json_document(request.json)
+    
+    # Handle traditional file upload
+    if 'document' not in request.files:
+        return None, ({'success': False, 'error': 'No document file provided'}, 400)
+    
+    # Extract category from form data
+    category = request.form.get('category', 'operating-cost')  # Default to operating-cost
+    file_id = request.form.get('id', 'uploaded_file')
+    return read_uploaded_document(request.files['document'], category, file_id)
+
+def parse_batch_request():
+    """
+    Read the documents of a batch request into memory
+    
+    Accepts either a JSON body {"documents": [UploadedFile, ...], "category": optional default}
+    or a multipart upload with several 'documents' file fields and an optional 'category'
+    form field applied to all of them.
+    
+    Returns:
+        list: Document infos as returned by parse_document_request, or None on error
+        tuple: Error response (payload, status_code) if the request is invalid, otherwise None
+    """
+    if request.is_json:
+        data = request.json or {}
+        items = data.get('documents')
+        default_category = data.get('category', 'operating-cost')
+        if not isinstance(items, list) or not items:
+            return None, ({'success': False, 'error': "'documents' must be a non-empty list"}, 400)
+    else:
+        items = request.files.getlist('documents')
+        default_category = request.form.get('category', 'operating-cost')
+        if not items:
+            return None, ({'success': False, 'error': 'No document files provided'}, 400)
+    
+    if len(items) > BATCH_MAX_DOCUMENTS:
+        return None, ({'success': False, 'error': f"A batch holds at most {BATCH_MAX_DOCUMENTS} documents"}, 400)
+    
+    documents = []
+    for item in items:
+        if request.is_json:
+            document, error = decode_json_document(item, default_category=default_category)
+        else:
+            document, error = read_uploaded_document(item, default_category, os.path.splitext(item.filename)[0])
+        if error:
+            return None, ({**error[0], 'error': f"Document {len(documents)}: {error[0]['error']}"}, error[1])
+        documents.append(document)
+    
+    return documents, None
+
+def run_ocr_stage(image, document_id=None):
+    """
+    Run OCR on a document and read back its text output
+    
+    Args:
+        image: Document bytes (image or PDF) or path
+        document_id: Base name of the output artifacts; if None, the parser derives one
+    
+    Returns:
+        str: OCR text
+        str: Document ID used for artifact downloads
+    """
+    document_id = document_id or FinancialDocumentParser.get_document_id(image)
+    print(f"Processing document with OCR: {document_id}")
+    with span('ocr'):
+        output_files, financial_structure = parser.process_document(
+            image, 
+            output_dir=OUTPUT_FOLDER,
+            formats=OCR_ARTIFACT_FORMATS,
+            document_id=document_id
+        )
+    
+    # Get the OCR text content
+    with span('read_ocr_text'), open(output_files['text'], 'r', encoding='utf-8') as f:
+        ocr_text = f.read()
+    
+    return ocr_text, document_id
+
+def build_document_response(filename, category, file_id, analysis_type, document_id, llm_result, agent_result, branch_metadata):
+    """
+    Save the LLM outputs of a processed document and extract its structured financial data
+    
+    Args:
+        filename: Name used to derive output file names
+        category: Frontend category
+        file_id: Frontend file identifier
+        analysis_type: Analysis type used by Financial_Agent
+        document_id: Document ID returned by run_ocr_stage
+        llm_result: Result of the parsing branch (LLMRequest)
+        agent_result: Result of the analysis branch (Financial_Agent)
+        branch_metadata: Per-branch success, duration and error
+    
+    Returns:
+        dict: Response payload
+        int: HTTP status code
+    """
+    # Save whatever succeeded, even if the other branch failed
+    base_name = os.path.splitext(filename)[0]
+    if llm_result["success"]:
+        raw_text_path = os.path.join(TEXT_RESULTS_FOLDER, f"{base_name}_results.txt")
+        save_to_raw_text(llm_result["content"], raw_text_path)
+    else:
+        print(f"Initial parsing failed: {llm_result['error']}")
+    
+    if not agent_result["success"]:
+        return {
+            'success': False,
+            'error': f"Error during financial analysis: {agent_result['error']}",
+            'metadata': {'branches': branch_metadata}
+        }, 500
+    
+    # Save the financial analysis results
+    analysis_path = os.path.join(FINANCIAL_ANALYSIS_FOLDER, f"{base_name}_financial_analysis.txt")
+    save_to_raw_text(agent_result["content"], analysis_path)
+    
+    # Step 4: Extract JSON data from the financial analysis
+    with span('extract_json'):
+        json_data, json_path = extract_json_from_text(
+            agent_result["content"],
+            output_base_path=analysis_path
+        )
+    
+    if json_path:
+        analysis_catalog.record(json_path, category=category, analysis_type=analysis_type)
+    
+    # If no JSON data was extracted, return an error
+    if not json_data:
+        return {
+            'success': False,
+            'error': "Failed to extract structured financial data from the analysis",
+            'metadata': {'branches': branch_metadata}
+        }, 500
+    
+    # Note: Summarization_Agent will be triggered separately when all documents are processed
+    print(f"Document {base_name} processed successfully.")
+    print(f"To generate comprehensive summary of all documents, call POST /api/generate-summary when ready.")
+    
+    # Return enhanced response with metadata
+    return {
+        'success': True,
+        'financial_data': json_data,
+        'file_path': os.path.basename(json_path) if json_path else None,
+        'metadata': {
+            'file_id': file_id,
+            'category': category,
+            'analysis_type': analysis_type,
+            'available_analysis_types': financial_agent.list_available_analysis_types(),
+            'partial': not llm_result["success"],
+            'branches': branch_metadata,
+            'document_id': document_id,
+            'artifacts': {
+                artifact_format: f"/api/artifacts/{document_id}/{artifact_format}"
+                for artifact_format in FinancialDocumentParser.ARTIFACT_FORMATS
+            }
+        }
+    }, 200
+
+def run_analysis_stage(filename, category, file_id, analysis_type, ocr_text, document_id, executor=None):
+    """
+    Run the LLM parsing and analysis branches on OCR text and build the document response
+    
+    Args:
+        filename: Name used to derive output file names
+        category: Frontend category
+        file_id: Frontend file identifier
+        analysis_type: Analysis type used by Financial_Agent
+        ocr_text: OCR text returned by run_ocr_stage
+        document_id: Document ID returned by run_ocr_stage
+        executor: Executor running the branches (defaults to llm_executor)
+    
+    Returns:
+        dict: Response payload
+        int: HTTP status code
+    """
+    # Steps 2 and 3: Initial parsing (LLMRequest) and detailed analysis (Financial_Agent)
+    # only depend on the OCR text, so run them concurrently
+    print(f"Parsing with LLMRequest and analyzing with Financial_Agent ({analysis_type}) concurrently...")
+    with span('llm_branches'):
+        branch_results = run_branches(executor or llm_executor, {
+            'parsing': (
+                llm.process_text,
+                {'text': ocr_text, 'max_retries': 3, 'timeout': 300},  # 5 minutes timeout for large documents
+                PARSING_BRANCH_TIMEOUT
+            ),
+            'analysis': (
+                financial_agent.analyze_financial_data,
+                {'text': ocr_text, 'analysis_type': analysis_type, 'max_retries': 3, 'timeout': 360},  # 6 minutes timeout for initial attempt
+                ANALYSIS_BRANCH_TIMEOUT
+            )
+        })
+    llm_result = branch_results['parsing']
+    agent_result = branch_results['analysis']
+    
+    branch_metadata = {
+        name: {
+            'success': result['success'],
+            'duration_seconds': result['duration_seconds'],
+            'error': result.get('error')
+        }
+        for name, result in branch_results.items()
+    }
+    
+    return build_document_response(
+        filename, category, file_id, analysis_type, document_id,
+        llm_result, agent_result, branch_metadata
+    )
+
+def run_document_pipeline(image, filename, category, file_id, document_id=None):
+    """
+    Run OCR, parsing, financial analysis and JSON extraction for one document
+    
+    This does not touch the Flask request context, so it can run inside a background job.
+    
+    Args:
+        image: Document bytes (image or PDF) or path
+        filename: Name used to derive output file names
+        category: Frontend category (e.g., "operating-cost", "balance-sheet")
+        file_id: Frontend file identifier
+        document_id: Base name of the OCR artifacts; if None, the parser derives one
+    
+    Returns:
+        dict: Response payload
+        int: HTTP status code
+    """
+    try:
+        # Map frontend category to analysis type
+        analysis_type = map_category_to_analysis_type(category)
+        print(f"Processing document with category: {category} -> analysis_type: {analysis_type}")
+        
+        # Update the global tracking of analysis type
+        update_last_used_analysis_type(analysis_type)
+        
+        # Step 1: Process document with OCR
+        try:
+            ocr_text, document_id = run_ocr_stage(image, document_id)
+        except Exception as e:
+            return {'success': False, 'error': f"Error during OCR processing: {str(e)}"}, 500
+        
+        return run_analysis_stage(filename, category, file_id, analysis_type, ocr_text, document_id)
+    
+    except Exception as e:
+        return {'success': False, 'error': str(e)}, 500
+
+def run_document_job(document):
+    """
+    Background job wrapper around run_document_pipeline
+    
+    Traces the job like time_it traces a request, so queued documents get the
+    same per-stage breakdown in their result metadata and timing record.
+    
+    Args:
+        document: Document info as returned by parse_document_request
+    
+    Returns:
+        dict: Response payload including the HTTP status code the synchronous endpoint would return
+    """
+    start_time = time.time()
+    with start_trace('run_document_job', file_id=document['file_id']) as trace:
+        payload, status_code = run_document_pipeline(**document)
+    duration = time.time() - start_time
+    
+    stages = trace.stage_timings()
+    payload.setdefault('metadata', {})['stage_timings'] = stages
+    payload['processing_time_seconds'] = round(duration, 4)
+    payload['status_code'] = status_code
+    
+    save_timing_data(
+        endpoint_name='run_document_job',
+        duration=duration,
+        success=payload.get('success', False),
+        error_message=payload.get('error'),
+        metadata={'category': document['category'], 'stages': stages}
+    )
+    return payload
+
+def batch_ocr_stage(document):
+    """
+    First batch stage: OCR one document
+    
+    Returns:
+        dict: The document info with 'analysis_type', 'ocr_text' and 'document_id' set, and
+              without its 'image' so the document bytes are released before the LLM stage
+    
+    Raises:
+        RuntimeError: If OCR fails
+    """
+    analysis_type = map_category_to_analysis_type(document['category'])
+    update_last_used_analysis_type(analysis_type)
+    try:
+        ocr_text, document_id = run_ocr_stage(document['image'], document['document_id'])
+    except Exception as e:
+        raise RuntimeError(f"Error during OCR processing: {str(e)}") from e
+    document = {key: value for key, value in document.items() if key != 'image'}
+    return {**document, 'analysis_type': analysis_type, 'ocr_text': ocr_text, 'document_id': document_id}
+
+def batch_analysis_stage(document):
+    """
+    Second batch stage: LLM branches and JSON extraction for one OCR'd document
+    
+    Returns:
+        tuple: (payload, status_code) as returned by run_document_pipeline
+    """
+    return run_analysis_stage(
+        document['filename'], document['category'], document['file_id'], document['analysis_type'],
+        document['ocr_text'], document['document_id'], executor=batch_branch_executor
+    )
+
+def run_document_batch(documents, ocr_workers=None, llm_workers=None, queue_size=None):
+    """
+    Process many documents through a staged OCR -> LLM pipeline
+    
+    OCR (CPU bound) and the LLM branches (network bound) run in separate
+    worker pools connected by a bounded queue, so OCR of the next pages
+    overlaps the LLM calls of earlier ones.
+    
+    Args:
+        documents: Document infos as returned by parse_document_request
+        ocr_workers: Concurrent OCR stage workers (defaults to BATCH_OCR_WORKERS)
+        llm_workers: Concurrent LLM stage workers (at most BATCH_LLM_WORKERS, which sizes the branch executor)
+        queue_size: Documents buffered between stages (defaults to BATCH_QUEUE_SIZE)
+    
+    Yields:
+        tuple: (index in documents, payload, status_code) in completion order; the
+               payload is the run_document_pipeline response with 'stage_durations'
+               and 'queue_wait_seconds' added to its metadata
+    """
+    stages = [
+        ('ocr', batch_ocr_stage, ocr_workers or BATCH_OCR_WORKERS),
+        ('analysis', batch_analysis_stage, min(llm_workers or BATCH_LLM_WORKERS, BATCH_LLM_WORKERS))
+    ]
+    for record in run_pipeline(documents, stages, queue_size=queue_size or BATCH_QUEUE_SIZE):
+        document = documents[record['index']]
+        
+        if record['error'] is not None:
+            payload, status_code = {'success': False, 'error': record['error']}, 500
+        else:
+            payload, status_code = record['value']
+        
+        metadata = payload.setdefault('metadata', {})
+        metadata.setdefault('file_id', document['file_id'])
+        metadata.setdefault('category', document['category'])
+        metadata['stage_durations'] = record['durations']
+        metadata['queue_wait_seconds'] = record['queue_wait_seconds']
+        yield record['index'], payload, status_code
+
+def stream_document_batch(documents):
+    """
+    Run a batch and report each document as a Server-Sent Event when it completes
+    
+    Events:
+        status: {'stage': 'started', 'total', 'ocr_workers', 'llm_workers'}
+        document: {'index', 'status_code', ...run_document_pipeline payload} per document
+        done: {'total', 'succeeded', 'failed', 'duration_seconds', 'documents_per_minute'}
+    
+    Yields:
+        str: Formatted Server-Sent Events
+    """
+    start_time = time.time()
+    succeeded = failed = 0
+    try:
+        yield format_sse_event('status', {
+            'stage': 'started',
+            'total': len(documents),
+            'ocr_workers': BATCH_OCR_WORKERS,
+            'llm_workers': BATCH_LLM_WORKERS
+        })
+        for index, payload, status_code in run_document_batch(documents):
+            if payload.get('success'):
+                succeeded += 1
+            else:
+                failed += 1
+            yield format_sse_event('document', {'index': index, 'status_code': status_code, **payload})
+        
+        duration = time.time() - start_time
+        yield format_sse_event('done', {
+            'total': len(documents),
+            'succeeded': succeeded,
+            'failed': failed,
+            'duration_seconds': round(duration, 4),
+            'documents_per_minute': round(len(documents) * 60 / duration, 2) if duration else None
+        })
+    
+    except Exception as e:
+        yield format_sse_event('error', {'success': False, 'error': str(e)})
+    
+    finally:
+        save_timing_data(
+            endpoint_name='process_batch',
+            duration=time.time() - start_time,
+            success=failed == 0 and succeeded == len(documents),
+            error_message=f"{failed} of {len(documents)} documents failed" if failed else None,
+            metadata={'documents': len(documents), 'succeeded': succeeded, 'failed': failed}
+        )
+
+def format_sse_event(event, data):
+    """
+    Format one Server-Sent Event
+    
+    Args:
+        event: Event name
+        data: JSON-serializable event payload
+    
+    Returns:
+        str: The event in text/event-stream format
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events):
+    """Wrap a generator of formatted events in an unbuffered text/event-stream response"""
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Keep reverse proxies from buffering the stream
+    })
+
+def stream_document_pipeline(image, filename, category, file_id, document_id=None):
+    """
+    Streaming variant of run_document_pipeline
+    
+    The financial analysis is streamed token by token while the parsing branch
+    runs in the background. JSON extraction and file saving run on the buffered
+    analysis text once the stream has finished, exactly as in run_document_pipeline.
+    
+    Events:
+        status: {'stage': 'ocr'}, then {'stage': 'analysis', 'document_id', 'analysis_type'}
+        delta: {'content': ...} for every analysis token delta
+        done: The run_document_pipeline response payload
+        error: The error payload (ends the stream)
+    
+    Args:
+        Same as run_document_pipeline
+    
+    Yields:
+        str: Formatted Server-Sent Events
+    """
+    start_time = time.time()
+    time_to_first_token = None
+    payload = {'success': False, 'error': 'Stream closed before completion'}
+    try:
+        analysis_type = map_category_to_analysis_type(category)
+        print(f"Streaming document with category: {category} -> analysis_type: {analysis_type}")
+        update_last_used_analysis_type(analysis_type)
+        
+        yield format_sse_event('status', {'stage': 'ocr'})
+        try:
+            ocr_text, document_id = run_ocr_stage(image, document_id)
+        except Exception as e:
+            payload = {'success': False, 'error': f"Error during OCR processing: {str(e)}"}
+            yield format_sse_event('error', payload)
+            return
+        
+        yield format_sse_event('status', {'stage': 'analysis', 'document_id': document_id, 'analysis_type': analysis_type})
+        
+        # The parsing output is only saved, not streamed, so it runs alongside the analysis stream
+        def run_parsing():
+            result = llm.process_text(text=ocr_text, max_retries=3, timeout=300)
+            return result, round(time.time() - parsing_start, 4)
+        
+        parsing_start = time.time()
+        parsing_future = llm_executor.submit(run_parsing)
+        
+        chunks = []
+        try:
+            for delta in financial_agent.stream_financial_analysis(ocr_text, analysis_type, max_retries=3, timeout=360):
+                if time_to_first_token is None:
+                    time_to_first_token = round(time.time() - start_time, 4)
+                chunks.append(delta)
+                yield format_sse_event('delta', {'content': delta})
+            agent_result = {'success': True, 'content': ''.join(chunks)}
+        except Exception as e:
+            agent_result = {'success': False, 'error': str(e)}
+        analysis_duration = round(time.time() - parsing_start, 4)
+        
+        remaining = max(0, PARSING_BRANCH_TIMEOUT - (time.time() - parsing_start))
+        try:
+            llm_result, parsing_duration = parsing_future.result(timeout=remaining)
+        except FutureTimeoutError:
+            parsing_future.cancel()
+            llm_result = {'success': False, 'error': f"parsing timed out after {PARSING_BRANCH_TIMEOUT} seconds"}
+            parsing_duration = round(time.time() - parsing_start, 4)
+        except Exception as e:
+            llm_result = {'success': False, 'error': f"parsing failed: {str(e)}"}
+            parsing_duration = round(time.time() - parsing_start, 4)
+        
+        branch_metadata = {
+            'parsing': {'success': llm_result['success'], 'duration_seconds': parsing_duration, 'error': llm_result.get('error')},
+            'analysis': {'success': agent_result['success'], 'duration_seconds': analysis_duration, 'error': agent_result.get('error')}
+        }
+        
+        payload, status_code = build_document_response(
+            filename, category, file_id, analysis_type, document_id,
+            llm_result, agent_result, branch_metadata
+        )
+        payload.setdefault('metadata', {})['time_to_first_token_seconds'] = time_to_first_token
+        payload['processing_time_seconds'] = round(time.time() - start_time, 4)
+        payload['status_code'] = status_code
+        yield format_sse_event('done' if payload['success'] else 'error', payload)
+    
+    except Exception as e:
+        payload = {'success': False, 'error': str(e)}
+        yield format_sse_event('error', payload)
+    
+    finally:
+        save_timing_data(
+            endpoint_name='process_document_stream',
+            duration=time.time() - start_time,
+            success=payload.get('success', False),
+            error_message=payload.get('error'),
+            metadata={'category': category, 'time_to_first_token_seconds': time_to_first_token}
+        )
+
+def check_llm_servers():
+    """
+    Check that the LLM server needed for document processing is reachable
+    
+    Reads the state cached by the background health monitor, so no request is
+    made to the server.
+    
+    Returns:
+        tuple: Error response (payload, status_code) if the server is unavailable, otherwise None
+    """
+    if not health_monitor.is_available('openai'):
+        return {
+            'success': False,
+            'error': 'LLM server for parsing and financial analysis is not available. Please try again later.',
+            'llm_health': health_monitor.get_status('openai')
+        }, 503
+    
+    return None
+
 @app.route('/api/process-document', methods=['POST'])
 @time_it
 def process_document():
@@ -277,156 +934,269 @@ def process_document():
     """
     try:
         # Check if LLM servers are running
-        if not llm.check_server():
-            return jsonify({
-                'success': False,
-                'error': 'LLM server for parsing is not running. Please start the server first.'
-            }), 503
-        
-        if not financial_agent.check_server():
-            return jsonify({
-                'success': False,
-                'error': 'LLM server for financial analysis is not running. Please start the server first.'
-            }), 503
+        server_error = check_llm_servers()
+        if server_error:
+            payload, status_code = server_error
+            return jsonify(payload), status_code
         
         # Determine input method (JSON with base64 or file upload)
-        category = None
-        file_id = None
+        document, request_error = parse_document_request()
+        if request_error:
+            payload, status_code = request_error
+            return jsonify(payload), status_code
         
-        if request.is_json:
-            # Handle JSON request with base64 encoded image
-            data = request.json
-            if 'image' not in data:
-                return jsonify({'success': False, 'error': 'No image data provided'}), 400
+        payload, status_code = run_document_pipeline(**document)
+        return jsonify(payload), status_code
             
-            # Extract metadata from frontend UploadedFile structure
-            category = data.get('category', 'operating-cost')  # Default to operating-cost
-            file_id = data.get('id', 'unknown')
-            file_format = data.get('fileFormat', 'image')
-            
-            # Create a temporary file for the image
-            file_extension = '.pdf' if file_format == 'pdf' else '.png'
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-                img_data = base64.b64decode(data['image'])
-                temp_file.write(img_data)
-                img_path = temp_file.name
-                filename = f"{file_id}_{category}"
-        else:
-            # Handle traditional file upload
-            if 'document' not in request.files:
-                return jsonify({'success': False, 'error': 'No document file provided'}), 400
-                
-            file = request.files['document']
-            if file.filename == '':
-                return jsonify({'success': False, 'error': 'Empty file name'}), 400
-            
-            # Extract category from form data
-            category = request.form.get('category', 'operating-cost')  # Default to operating-cost
-            file_id = request.form.get('id', 'uploaded_file')
-                
-            filename = secure_filename(file.filename)
-            img_path = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(img_path)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/process-document/stream', methods=['POST'])
+def process_document_stream():
+    """
+    Streaming variant of /api/process-document using Server-Sent Events
+    
+    Accepts the same POST data. Request and server errors are returned as JSON
+    like /api/process-document; once processing starts, the response is a
+    text/event-stream of the events described in stream_document_pipeline.
+    Not wrapped in time_it, which would buffer the stream; the generator
+    records its own timing (including time to first token).
+    """
+    try:
+        server_error = check_llm_servers()
+        if server_error:
+            payload, status_code = server_error
+            return jsonify(payload), status_code
         
-        # Map frontend category to analysis type
-        analysis_type = map_category_to_analysis_type(category)
-        print(f"Processing document with category: {category} -> analysis_type: {analysis_type}")
+        document, request_error = parse_document_request()
+        if request_error:
+            payload, status_code = request_error
+            return jsonify(payload), status_code
         
-        # Update the global tracking of analysis type
-        update_last_used_analysis_type(analysis_type)
+        return sse_response(stream_document_pipeline(**document))
+            
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/documents', methods=['POST'])
+@time_it
+def submit_document():
+    """
+    Queue a financial document for background processing and return a job ID immediately
+    
+    Accepts the same POST data as /api/process-document. Poll
+    GET /api/documents/<job_id>/status and fetch the outcome from GET /api/documents/<job_id>/data.
+    
+    Returns:
+    - JSON with the job ID and status URLs (HTTP 202)
+    """
+    try:
+        server_error = check_llm_servers()
+        if server_error:
+            payload, status_code = server_error
+            return jsonify(payload), status_code
+        
+        document, request_error = parse_document_request()
+        if request_error:
+            payload, status_code = request_error
+            return jsonify(payload), status_code
         
-        # Step 1: Process document with OCR
-        print(f"Processing document with OCR: {img_path}")
         try:
-            output_files, financial_structure = parser.process_document(
-                img_path, 
-                output_dir=OUTPUT_FOLDER
+            job_id = document_jobs.submit(
+                run_document_job,
+                document,
+                metadata={
+                    'file_id': document['file_id'],
+                    'category': document['category'],
+                    'filename': document['filename']
+                }
             )
-        except Exception as e:
-            return jsonify({'success': False, 'error': f"Error during OCR processing: {str(e)}"}), 500
-        
-        # Get the OCR text content
-        with open(output_files['text'], 'r', encoding='utf-8') as f:
-            ocr_text = f.read()
-        
-        # Step 2: Process with LLMRequest for initial parsing
-        print("Parsing financial document with LLMRequest...")
-        llm_result = llm.process_text(
-            text=ocr_text,
-            max_retries=3,
-            timeout=300  # 5 minutes timeout for large documents
-        )
-        
-        if not llm_result["success"]:
-            return jsonify({
-                'success': False,
-                'error': f"Error during initial parsing: {llm_result['error']}"
-            }), 500
-        
-        # Save the initial parsing results
-        base_name = os.path.splitext(filename)[0]
-        raw_text_path = os.path.join(TEXT_RESULTS_FOLDER, f"{base_name}_results.txt")
-        save_to_raw_text(llm_result["content"], raw_text_path)
+        except QueueFullError as e:
+            return jsonify({'success': False, 'error': str(e)}), 503
         
-        # Step 3: Process with Financial_Agent for detailed analysis
-        print(f"Performing financial analysis with Financial_Agent using {analysis_type} analysis...")
-        agent_result = financial_agent.analyze_financial_data(
-            text=ocr_text,
-            analysis_type=analysis_type,  # Use the mapped analysis type
-            max_retries=3,
-            timeout=360  # 6 minutes timeout for initial attempt
-        )
-        
-        if not agent_result["success"]:
-            return jsonify({
-                'success': False,
-                'error': f"Error during financial analysis: {agent_result['error']}"
-            }), 500
-        
-        # Save the financial analysis results
-        analysis_path = os.path.join(FINANCIAL_ANALYSIS_FOLDER, f"{base_name}_financial_analysis.txt")
-        save_to_raw_text(agent_result["content"], analysis_path)
-        
-        # Step 4: Extract JSON data from the financial analysis
-        json_data, json_path = extract_json_from_text(
-            agent_result["content"],
-            output_base_path=analysis_path
-        )
-        
-        # Clean up temporary file if used
-        if 'temp' in img_path:
-            try:
-                os.unlink(img_path)
-            except:
-                pass
-        
-        # If no JSON data was extracted, return an error
-        if not json_data:
-            return jsonify({
-                'success': False,
-                'error': "Failed to extract structured financial data from the analysis"
-            }), 500
-        
-        # Note: Summarization_Agent will be triggered separately when all documents are processed
-        print(f"Document {base_name} processed successfully.")
-        print(f"To generate comprehensive summary of all documents, call POST /api/generate-summary when ready.")
-        
-        # Return enhanced response with metadata
         return jsonify({
             'success': True,
-            'financial_data': json_data,
-            'file_path': os.path.basename(json_path) if json_path else None,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f"/api/documents/{job_id}/status",
+            'data_url': f"/api/documents/{job_id}/data",
             'metadata': {
-                'file_id': file_id,
-                'category': category,
-                'analysis_type': analysis_type,
-                'available_analysis_types': financial_agent.list_available_analysis_types()
+                'file_id': document['file_id'],
+                'category': document['category']
             }
+        }), 202
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/documents', methods=['GET'])
+def list_documents():
+    """
+    List background document jobs and queue statistics
+    
+    Returns:
+    - JSON with job records (without result payloads)
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'jobs': document_jobs.list_jobs(),
+            'queue': document_jobs.get_stats()
         })
-            
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/documents/<job_id>/status', methods=['GET'])
+def get_document_status(job_id):
+    """
+    Get the processing status of a background document job
+    
+    Returns:
+    - JSON with job status ('queued', 'processing', 'completed', 'failed') and timestamps
+    """
+    job = document_jobs.get(job_id, include_result=False)
+    if job is None:
+        return jsonify({'success': False, 'error': f"Unknown job ID: {job_id}"}), 404
+    
+    return jsonify({'success': True, **job})
+
+@app.route('/api/documents/<job_id>/data', methods=['GET'])
+def get_document_data(job_id):
+    """
+    Get the result of a background document job
+    
+    Returns:
+    - The same JSON as /api/process-document once the job has finished, HTTP 202 while it is still running
+    """
+    job = document_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f"Unknown job ID: {job_id}"}), 404
+    
+    if job['status'] in ('queued', 'processing'):
+        return jsonify({'success': False, 'job_id': job_id, 'status': job['status'], 'error': 'Job has not finished yet'}), 202
+    
+    if job['result'] is None:
+        return jsonify({'success': False, 'job_id': job_id, 'status': job['status'], 'error': job['error']}), 500
+    
+    result = dict(job['result'])
+    status_code = result.pop('status_code', 200)
+    return jsonify({'job_id': job_id, 'status': job['status'], **result}), status_code
+
+@app.route('/api/process-batch', methods=['POST'])
+def process_batch():
+    """
+    Process many financial documents through a staged OCR -> LLM pipeline
+    
+    Expected POST data:
+    - JSON with 'documents' (list of UploadedFile structures as for /api/process-document)
+      and an optional default 'category'
+    - OR multipart upload with several 'documents' files and an optional 'category'
+    
+    Returns:
+    - text/event-stream with one 'document' event per document as it completes
+      (see stream_document_batch); request and server errors are returned as JSON
+    """
+    try:
+        server_error = check_llm_servers()
+        if server_error:
+            payload, status_code = server_error
+            return jsonify(payload), status_code
+        
+        documents, request_error = parse_batch_request()
+        if request_error:
+            payload, status_code = request_error
+            return jsonify(payload), status_code
+        
+        return sse_response(stream_document_batch(documents))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/artifacts/<document_id>/<artifact_format>', methods=['GET'])
+@time_it
+def download_artifact(document_id, artifact_format):
+    """
+    Download an OCR output artifact of a processed document
+    
+    Formats not written during processing (see OCR_ARTIFACT_FORMATS) are generated
+    on the first request and kept for later downloads.
+    
+    Args:
+        document_id: 'document_id' from the processing response metadata
+        artifact_format: 'text', 'json' or 'excel'
+    
+    Returns:
+    - The artifact file
+    """
+    try:
+        artifact_path = parser.get_artifact(secure_filename(document_id), OUTPUT_FOLDER, artifact_format)
+        return send_file(artifact_path, as_attachment=True, download_name=os.path.basename(artifact_path))
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def resolve_summary_request():
+    """
+    Determine the summary type for a summary request
+    
+    Uses 'summary_type' or 'category' from the JSON body, or falls back to the last used analysis type.
+    
+    Returns:
+        str: Summary type (None to use the agent's default)
+        str: How the type was chosen ('summary_type', 'category', 'auto-detected' or None)
+        str: The value received from the frontend
+    """
+    # Determine summary type from request
+    summary_type = None
+    received_input = None
+    input_type = None
+    
+    if request.is_json and request.json:
+        data = request.json
+        # Check if summary_type is directly provided
+        if 'summary_type' in data:
+            summary_type = data['summary_type']
+            received_input = data['summary_type']
+            input_type = 'summary_type'
+        # Otherwise, map from category like in process-document
+        elif 'category' in data:
+            category = data['category']
+            analysis_type = map_category_to_analysis_type(category)
+            summary_type = map_analysis_type_to_summary_type(analysis_type)
+            received_input = category
+            input_type = 'category'
+            print(f"Mapping category '{category}' to analysis_type '{analysis_type}' to summary_type '{summary_type}'")
+    
+    # If no explicit type provided, use the last used analysis type
+    if summary_type is None:
+        if _last_used_analysis_type:
+            summary_type = map_analysis_type_to_summary_type(_last_used_analysis_type)
+            print(f"No summary type specified, using last used analysis type: '{_last_used_analysis_type}' (mapped to summary type: '{summary_type}')")
+            received_input = f"auto-detected from last document: {_last_used_analysis_type} -> {summary_type}"
+            input_type = 'auto-detected'
+        else:
+            print("No summary type specified and no previous analysis type found, using default")
+    
+    return summary_type, input_type, received_input
+
+def build_summary_metadata(summary_type, input_type, received_input):
+    """Build the metadata returned with a generated summary"""
+    return {
+        'summary_type_used': summary_type or summarization_agent.default_summary_type,
+        'received_from_frontend': {
+            'input_type': input_type,
+            'input_value': received_input
+        },
+        'available_summary_types': summarization_agent.list_available_summary_types(),
+        'default_summary_type': summarization_agent.default_summary_type,
+        'prompt_info': summarization_agent.get_prompt_info(),
+        'last_used_analysis_type': _last_used_analysis_type
+    }
+
 @app.route('/api/generate-summary', methods=['POST'])
 @time_it
 def generate_comprehensive_summary():
@@ -442,43 +1212,14 @@ def generate_comprehensive_summary():
     """
     try:
         # Check if summarization agent server is running
-        if not summarization_agent.check_server():
+        if not health_monitor.is_available('openai'):
             return jsonify({
                 'success': False,
-                'error': 'LLM server for summarization is not running. Please start the server first.'
+                'error': 'LLM server for summarization is not available. Please try again later.',
+                'llm_health': health_monitor.get_status('openai')
             }), 503
         
-        # Determine summary type from request
-        summary_type = None
-        received_input = None
-        input_type = None
-        
-        if request.is_json and request.json:
-            data = request.json
-            # Check if summary_type is directly provided
-            if 'summary_type' in data:
-                summary_type = data['summary_type']
-                received_input = data['summary_type']
-                input_type = 'summary_type'
-            # Otherwise, map from category like in process-document
-            elif 'category' in data:
-                category = data['category']
-                analysis_type = map_category_to_analysis_type(category)
-                summary_type = map_analysis_type_to_summary_type(analysis_type)
-                received_input = category
-                input_type = 'category'
-                print(f"Mapping category '{category}' to analysis_type '{analysis_type}' to summary_type '{summary_type}'")
-        
-        # If no explicit type provided, use the last used analysis type
-        if summary_type is None:
-            global _last_used_analysis_type
-            if _last_used_analysis_type:
-                summary_type = map_analysis_type_to_summary_type(_last_used_analysis_type)
-                print(f"No summary type specified, using last used analysis type: '{_last_used_analysis_type}' (mapped to summary type: '{summary_type}')")
-                received_input = f"auto-detected from last document: {_last_used_analysis_type} -> {summary_type}"
-                input_type = 'auto-detected'
-            else:
-                print("No summary type specified and no previous analysis type found, using default")
+        summary_type, input_type, received_input = resolve_summary_request()
         
         # Use the determined summary_type or let it default
         if summary_type:
@@ -523,22 +1264,101 @@ def generate_comprehensive_summary():
             'processed_files': list(analysis_data.keys()),
             'summary_file_path': file_path,
             'message': f"Successfully generated summary from {len(analysis_data)} analysis files.",
-            'metadata': {
-                'summary_type_used': summary_type or summarization_agent.default_summary_type,
-                'received_from_frontend': {
-                    'input_type': input_type,
-                    'input_value': received_input
-                },
-                'available_summary_types': summarization_agent.list_available_summary_types(),
-                'default_summary_type': summarization_agent.default_summary_type,
-                'prompt_info': summarization_agent.get_prompt_info(),
-                'last_used_analysis_type': _last_used_analysis_type
-            }
+            'metadata': build_summary_metadata(summary_type, input_type, received_input)
         })
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/generate-summary/stream', methods=['POST'])
+def generate_comprehensive_summary_stream():
+    """
+    Streaming variant of /api/generate-summary using Server-Sent Events
+    
+    Accepts the same POST data. Errors found before generation starts are
+    returned as JSON like /api/generate-summary; after that the response is a
+    text/event-stream of 'status' events for the digest, reduce and summary
+    stages ({'stage': ...}), 'delta' events ({'content': ...}), then 'done'
+    with the /api/generate-summary payload, or 'error'.
+    """
+    start_time = time.time()
+    try:
+        if not health_monitor.is_available('openai'):
+            return jsonify({
+                'success': False,
+                'error': 'LLM server for summarization is not available. Please try again later.',
+                'llm_health': health_monitor.get_status('openai')
+            }), 503
+        
+        summary_type, input_type, received_input = resolve_summary_request()
+        analysis_data = summarization_agent.load_all_analysis_files()
+        
+        if not analysis_data:
+            return jsonify({
+                'success': False,
+                'error': 'No analysis files found to process',
+                'files_processed': 0
+            }), 404
+        
+        # Lazy: the digest and reduce stages run inside the stream, after the headers are sent
+        events = summarization_agent.stream_comprehensive_summary_events(
+            analysis_data=analysis_data,
+            summary_type=summary_type,
+            max_retries=3,
+            timeout=360
+        )
+        
+        def generate():
+            time_to_first_token = None
+            payload = {'success': False, 'error': 'Stream closed before completion'}
+            try:
+                chunks = []
+                for event, data in events:
+                    if event != 'delta':
+                        yield format_sse_event(event, data)
+                        continue
+                    if time_to_first_token is None:
+                        time_to_first_token = round(time.time() - start_time, 4)
+                    chunks.append(data)
+                    yield format_sse_event('delta', {'content': data})
+                
+                summary_content = ''.join(chunks)
+                file_path = summarization_agent.save_summary_report(summary_content)
+                metadata = build_summary_metadata(summary_type, input_type, received_input)
+                metadata['time_to_first_token_seconds'] = time_to_first_token
+                payload = {
+                    'success': True,
+                    'summary_content': summary_content,
+                    'files_processed': len(analysis_data),
+                    'processed_files': list(analysis_data.keys()),
+                    'summary_file_path': file_path,
+                    'message': f"Successfully generated summary from {len(analysis_data)} analysis files.",
+                    'metadata': metadata
+                }
+                yield format_sse_event('done', payload)
+            
+            except Exception as e:
+                payload = {
+                    'success': False,
+                    'error': f"Failed to create summary: {str(e)}",
+                    'files_processed': len(analysis_data)
+                }
+                yield format_sse_event('error', payload)
+            
+            finally:
+                save_timing_data(
+                    endpoint_name='generate_comprehensive_summary_stream',
+                    duration=time.time() - start_time,
+                    success=payload['success'],
+                    error_message=payload.get('error'),
+                    metadata={'time_to_first_token_seconds': time_to_first_token}
+                )
+        
+        return sse_response(generate())
+            
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/analysis-status', methods=['GET'])
 def get_analysis_status():
     """
@@ -548,16 +1368,27 @@ def get_analysis_status():
     - JSON with information about available analysis files
     """
     try:
-        # Load analysis data to get file count and names
-        analysis_data = summarization_agent.load_all_analysis_files()
+        # File count and names come from the catalog, without opening the files
+        entries = analysis_catalog.entries()
         
         return jsonify({
             'success': True,
-            'total_analysis_files': len(analysis_data),
-            'analysis_files': list(analysis_data.keys()),
+            'total_analysis_files': len(entries),
+            'analysis_files': [entry['filename'] for entry in entries],
+            'analysis_file_details': [
+                {
+                    'filename': entry['filename'],
+                    'size': entry['size'],
+                    'modified_at': entry['mtime_ns'] / 1e9,
+                    'content_hash': entry['content_hash'],
+                    'category': entry['category'],
+                    'analysis_type': entry['analysis_type']
+                }
+                for entry in entries
+            ],
             'analysis_directory': summarization_agent.financial_analysis_dir,
-            'ready_for_summary': len(analysis_data) > 0,
-            'message': f"Found {len(analysis_data)} analysis files ready for summarization." if analysis_data else "No analysis files found yet."
+            'ready_for_summary': len(entries) > 0,
+            'message': f"Found {len(entries)} analysis files ready for summarization." if entries else "No analysis files found yet."
         })
         
     except Exception as e:
@@ -588,9 +1419,6 @@ def get_summarization_status():
             most_recent_summary = max(summary_files, key=os.path.getmtime)
             summary_created_at = os.path.getmtime(most_recent_summary)
         
-        # Load analysis data to get file count and names
-        analysis_data = summarization_agent.load_all_analysis_files()
-        
         return jsonify({
             'success': True,
             'summarization_completed': len(summary_files) > 0,
@@ -633,16 +1461,21 @@ def get_analysis_types():
 @app.route('/api/timing-stats', methods=['GET'])
 def get_timing_stats():
     """
-    Get processing time statistics from the timing log file
+    Get processing time statistics from the timing store
     
     Returns:
     - JSON with timing statistics and recent processing times
     """
     try:
-        import json
-        timing_file = os.path.join(OUTPUT_FOLDER, 'processing_times.json')
+        timing_store = get_timing_store()
+        stats = timing_store.get_stats(recent_limit=10)
+        
+        # Add percentiles and 1m/1h/24h breakdowns from the rolling aggregates
+        for endpoint, rolling in get_latency_stats().get_stats().items():
+            if endpoint in stats['endpoint_statistics']:
+                stats['endpoint_statistics'][endpoint].update(rolling)
         
-        if not os.path.exists(timing_file):
+        if stats['total_requests'] == 0:
             return jsonify({
                 'success': True,
                 'message': 'No timing data available yet',
@@ -650,85 +1483,90 @@ def get_timing_stats():
                 'recent_requests': []
             })
         
-        with open(timing_file, 'r', encoding='utf-8') as f:
-            timing_data = json.load(f)
-        
-        # Calculate statistics
-        total_requests = len(timing_data)
-        successful_requests = [req for req in timing_data if req['success']]
-        failed_requests = [req for req in timing_data if not req['success']]
-        
-        # Group by endpoint
-        endpoint_stats = {}
-        for req in timing_data:
-            endpoint = req['endpoint']
-            if endpoint not in endpoint_stats:
-                endpoint_stats[endpoint] = {
-                    'total_requests': 0,
-                    'successful_requests': 0,
-                    'failed_requests': 0,
-                    'total_time': 0,
-                    'avg_time': 0,
-                    'min_time': float('inf'),
-                    'max_time': 0
-                }
-            
-            stats = endpoint_stats[endpoint]
-            stats['total_requests'] += 1
-            stats['total_time'] += req['duration_seconds']
-            stats['min_time'] = min(stats['min_time'], req['duration_seconds'])
-            stats['max_time'] = max(stats['max_time'], req['duration_seconds'])
-            
-            if req['success']:
-                stats['successful_requests'] += 1
-            else:
-                stats['failed_requests'] += 1
-        
-        # Calculate averages
-        for endpoint, stats in endpoint_stats.items():
-            if stats['total_requests'] > 0:
-                stats['avg_time'] = round(stats['total_time'] / stats['total_requests'], 4)
-                stats['min_time'] = round(stats['min_time'], 4)
-                stats['max_time'] = round(stats['max_time'], 4)
-                stats['total_time'] = round(stats['total_time'], 4)
-        
-        # Get recent requests (last 10)
-        recent_requests = timing_data[-10:] if len(timing_data) > 10 else timing_data
-        
         return jsonify({
             'success': True,
-            'total_requests': total_requests,
-            'successful_requests': len(successful_requests),
-            'failed_requests': len(failed_requests),
-            'endpoint_statistics': endpoint_stats,
-            'recent_requests': recent_requests,
-            'timing_file_path': timing_file
+            **stats,
+            'timing_file_path': timing_store.db_path
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Get hit/miss statistics for the result caches
+    
+    Returns:
+    - JSON with cache statistics
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'ocr_cache': parser.get_cache_stats(),
+            'llm_cache': {'enabled': True, **llm_response_cache.get_stats()} if llm_response_cache else {'enabled': False}
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/live', methods=['GET'])
+def liveness_check():
+    """
+    Liveness endpoint: answers as soon as the server accepts requests, without checking any dependency
+    
+    Returns:
+    - JSON with the uptime
+    """
+    return jsonify({'success': True, 'status': 'alive', 'uptime_seconds': startup.uptime_seconds()})
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness endpoint: 200 once the OCR models are loaded and warmed up, 503 before
+    
+    Returns:
+    - JSON with the startup phases and their durations, the warmup state and
+      whether the OCR engine is loaded; the LLM server state ('unknown' until
+      the first health probe has finished) is reported but does not affect
+      readiness (see /api/health)
+    """
+    status = startup.get_status()
+    status['ocr_engine_loaded'] = ocr_pool.get_stats().get('ready_workers', 0) > 0 if ocr_pool else parser.engine_loaded
+    status['llm_available'] = health_monitor.get_availability('openai')
+    return jsonify({'success': status['ready'], **status}), 200 if status['ready'] else 503
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint to verify all services are running
     
+    The LLM services report the state cached by the background health monitor;
+    'llm_health' has its circuit breaker details.
+    
     Returns:
     - JSON with service status
     """
     try:
+        llm_available = health_monitor.get_availability('openai')
         return jsonify({
             'success': True,
             'services': {
-                'llm_server': llm.check_server(),
-                'financial_agent': financial_agent.check_server(),
-                'summarization_agent': summarization_agent.check_server(),
+                'llm_server': llm_available,
+                'financial_agent': llm_available,
+                'summarization_agent': llm_available,
                 'ocr_parser': True  # Always available since it's local
             },
+            'llm_health': health_monitor.get_stats(),
+            'document_jobs': document_jobs.get_stats(),
+            'ocr_pool': {'enabled': True, **ocr_pool.get_stats()} if ocr_pool else {'enabled': False},
+            'llm_rate_limit': get_rate_limiter().get_stats(),
             'available_analysis_types': financial_agent.list_available_analysis_types()
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
+    # Warm up the OCR models in the serving process only, not in the debug reloader's watcher process
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
     app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
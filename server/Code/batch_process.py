@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# Process a folder of financial documents through the staged OCR -> LLM batch pipeline
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'batches')
+DOCUMENT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.pdf')
+
+
+def collect_documents(paths, category):
+    """
+    Build document infos for the given files and folders
+
+    Args:
+        paths: Document files and/or folders of documents
+        category: Frontend category applied to every document
+
+    Returns:
+        list: Document infos in the format of app.parse_document_request, sorted by path; the
+              documents are read by the parser from their paths rather than held in memory
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(DOCUMENT_EXTENSIONS)
+            )
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Error: {path} is not a valid file or directory.")
+
+    return [
+        {
+            'image': img_path,
+            'document_id': None,
+            'filename': os.path.basename(img_path),
+            'category': category,
+            'file_id': os.path.splitext(os.path.basename(img_path))[0]
+        }
+        for img_path in sorted(files)
+    ]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Process many financial documents with overlapping OCR and LLM stages")
+    arg_parser.add_argument("paths", nargs='+', help="Document files and/or folders of documents")
+    arg_parser.add_argument("--category", "-c", default="operating-cost",
+                            help="Category of the documents: operating-cost, balance-sheet, cash-flow, profit (default: operating-cost)")
+    arg_parser.add_argument("--ocr-workers", type=int, help="Concurrent OCR workers (default: BATCH_OCR_WORKERS)")
+    arg_parser.add_argument("--llm-workers", type=int, help="Concurrent LLM workers (default: BATCH_LLM_WORKERS)")
+    arg_parser.add_argument("--queue-size", type=int, help="Documents buffered between stages (default: BATCH_QUEUE_SIZE)")
+    arg_parser.add_argument("--output", "-o",
+                            help="Results JSON Lines file (default: output/batches/batch_<timestamp>.jsonl)")
+
+    args = arg_parser.parse_args()
+
+    # The pipeline is configured from the environment when app is imported
+    for env_name, value in (('BATCH_OCR_WORKERS', args.ocr_workers),
+                            ('BATCH_LLM_WORKERS', args.llm_workers),
+                            ('BATCH_QUEUE_SIZE', args.queue_size)):
+        if value:
+            os.environ[env_name] = str(value)
+
+    import app
+
+    documents = collect_documents(args.paths, args.category)
+    if not documents:
+        print("No documents found.")
+        sys.exit(1)
+
+    server_error = app.check_llm_servers()
+    if server_error:
+        print(f"Error: {server_error[0]['error']}")
+        sys.exit(1)
+
+    output_path = args.output
+    if output_path is None:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(DEFAULT_RESULTS_DIR, f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+    print(f"[BATCH] Processing {len(documents)} documents "
+          f"(ocr_workers={app.BATCH_OCR_WORKERS}, llm_workers={app.BATCH_LLM_WORKERS}, queue_size={app.BATCH_QUEUE_SIZE})")
+    start_time = time.time()
+    succeeded = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for completed, (index, payload, status_code) in enumerate(app.run_document_batch(documents), start=1):
+            document = documents[index]
+            if payload.get('success'):
+                succeeded += 1
+                outcome = 'ok'
+            else:
+                outcome = f"failed: {payload.get('error')}"
+            durations = ', '.join(f"{name} {seconds:.1f}s" for name, seconds in payload['metadata']['stage_durations'].items())
+            print(f"[BATCH] {completed}/{len(documents)} {document['filename']}: {outcome} ({durations})")
+
+            f.write(json.dumps({'index': index, 'path': document['image'], 'status_code': status_code, **payload},
+                               ensure_ascii=False) + '\n')
+            f.flush()
+
+    duration = time.time() - start_time
+    print(f"\nBatch processing complete: {succeeded}/{len(documents)} documents processed successfully "
+          f"in {duration:.1f}s ({len(documents) * 60 / duration:.1f} documents/minute).")
+    print(f"Results saved to: {output_path}")
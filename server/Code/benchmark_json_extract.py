@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# Benchmark JSON extraction from LLM responses: utils.json_extract against the previous regex cascade
+
+import os
+import re
+import json
+import glob
+import time
+import copy
+import argparse
+from datetime import datetime
+from utils.json_extract import extract_json, normalize_numbers
+from utils.latency_stats import LatencyHistogram
+
+DEFAULT_RESPONSES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'ocr', '*', 'gpt_response_*.json')
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'benchmarks')
+LARGE_RESPONSE_CHARS = 40000  # ~10k tokens
+
+
+def legacy_extract_json(text_content):
+    """The regex cascade previously used by app.extract_json_from_text (without file saving), kept as the baseline"""
+    json_data = None
+
+    json_pattern = r'```json\s*(\{[\s\S]*?\})\s*```'
+    json_match = re.search(json_pattern, text_content, re.DOTALL)
+    if not json_match:
+        json_pattern = r'```\s*(\{[\s\S]*?\})\s*```'
+        json_match = re.search(json_pattern, text_content, re.DOTALL)
+    if not json_match:
+        json_pattern = r'(\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\})*)*\})*)*\})'
+        matches = re.findall(json_pattern, text_content, re.DOTALL)
+        if matches:
+            json_match = type('Match', (), {'group': lambda self, x: max(matches, key=len)})()
+
+    if json_match:
+        json_str = json_match.group(1).strip()
+        try:
+            json_data = json.loads(json_str)
+        except json.JSONDecodeError:
+            try:
+                cleaned_json = json_str
+                cleaned_json = re.sub(r',(\s*[}\]])', r'\1', cleaned_json)
+                cleaned_json = re.sub(r"'([^']*)'(\s*:)", r'"\1"\2', cleaned_json)
+                cleaned_json = re.sub(r':\s*\'([^\']*)\'', r': "\1"', cleaned_json)
+                cleaned_json = re.sub(r'(\w+)(\s*:)', r'"\1"\2', cleaned_json)
+                cleaned_json = re.sub(r':\s*([0-9,]+(?:\.[0-9]+)?)',
+                                      lambda m: f': {m.group(1).replace(",", "")}', cleaned_json)
+                cleaned_json = re.sub(r'"(from|to)":\s*(\d{4}-\d{2}-\d{2})', r'"\1": "\2"', cleaned_json)
+                cleaned_json = re.sub(r':\s*(true|false|null)\b', r': \1', cleaned_json, flags=re.IGNORECASE)
+                json_data = json.loads(cleaned_json)
+            except json.JSONDecodeError:
+                try:
+                    cleaned_lines = []
+                    for line in json_str.split('\n'):
+                        line = re.sub(r'//.*$', '', line).strip()
+                        if line:
+                            cleaned_lines.append(line)
+                    reconstructed_json = '\n'.join(cleaned_lines)
+                    reconstructed_json = re.sub(r',(\s*[}\]])', r'\1', reconstructed_json)
+                    reconstructed_json = re.sub(r"'([^']*)'(\s*:)", r'"\1"\2', reconstructed_json)
+                    reconstructed_json = re.sub(r':\s*\'([^\']*)\'', r': "\1"', reconstructed_json)
+                    reconstructed_json = re.sub(r'(\w+)(\s*:)', r'"\1"\2', reconstructed_json)
+                    reconstructed_json = re.sub(r':\s*([0-9,]+(?:\.[0-9]+)?)',
+                                                lambda m: f': {m.group(1).replace(",", "")}', reconstructed_json)
+                    json_data = json.loads(reconstructed_json)
+                except Exception:
+                    json_data = None
+
+    def clean_numeric_values(obj):
+        if isinstance(obj, dict):
+            cleaned = {}
+            for key, value in obj.items():
+                if key == "value" and isinstance(value, str):
+                    try:
+                        cleaned_value = value.replace(',', '').replace(' ', '')
+                        cleaned[key] = float(cleaned_value) if '.' in cleaned_value else int(cleaned_value)
+                    except (ValueError, AttributeError):
+                        cleaned[key] = value
+                else:
+                    cleaned[key] = clean_numeric_values(value)
+            return cleaned
+        elif isinstance(obj, list):
+            return [clean_numeric_values(item) for item in obj]
+        return obj
+
+    return clean_numeric_values(json_data) if json_data else None
+
+
+def current_extract_json(text_content):
+    """The extraction used by app.extract_json_from_text"""
+    json_data = extract_json(text_content)
+    return normalize_numbers(json_data) if json_data else None
+
+
+def enlarge(data, target_chars):
+    """Repeat the line items of a response until its JSON is about target_chars long"""
+    data = copy.deepcopy(data)
+    items = data.get('lineItems') or []
+    if not items:
+        return data
+    size = len(json.dumps(data, indent=2))
+    copies = max(1, target_chars // max(size, 1))
+    data['lineItems'] = [
+        {**item, 'description': f"{item.get('description', '')} ({index})"}
+        for index in range(copies) for item in items
+    ]
+    return data
+
+
+def with_grouped_numbers(json_text):
+    """Write numbers with thousand separators (invalid JSON an LLM may still produce)"""
+    return re.sub(r'(?<=: )-?\d{4,}(?=,?\n)', lambda m: f"{int(m.group()):,}", json_text)
+
+
+def with_trailing_commas(json_text):
+    return re.sub(r'(\n\s*)([}\]])', r',\1\2', json_text)
+
+
+def build_cases(data):
+    """
+    Turn one saved response JSON into LLM-style responses with a known expected result
+
+    Returns:
+        list: (case_name, response_text, expected_object) tuples
+    """
+    large_data = enlarge(data, LARGE_RESPONSE_CHARS)
+    nested_data = {'report': {'statements': [{'statement': large_data}]}}
+    pretty = json.dumps(data, indent=2, ensure_ascii=False)
+    large = json.dumps(large_data, indent=2, ensure_ascii=False)
+    nested = json.dumps(nested_data, indent=2, ensure_ascii=False)
+    prose = ("## Financial Analysis\n\nThe statement below was extracted from the document. "
+             "Key figures are reported in the company's presentation currency.\n\n")
+    example = 'Each line item has this shape:\n```json\n{"description": "...", "values": {"2023": 0}}\n```\n\n'
+    notes = "\n\n**Notes:** Figures in {unit}; negative values are shown in (parentheses) in the source.\n"
+    return [
+        ('fenced', f"{prose}```json\n{pretty}\n```{notes}", data),
+        ('unfenced_prose_braces', f"{prose}Template {{placeholder}} unused.\n{pretty}{notes}", data),
+        ('example_block_first', f"{prose}{example}```json\n{pretty}\n```{notes}", data),
+        ('repair_trailing_commas', f"{prose}```json\n{with_trailing_commas(pretty)}\n```{notes}", data),
+        ('repair_grouped_numbers', f"{prose}```json\n{with_grouped_numbers(pretty)}\n```{notes}", data),
+        ('large_fenced', f"{prose}```json\n{large}\n```{notes}", large_data),
+        ('large_unfenced', f"{prose}{large}{notes}", large_data),
+        ('large_nested_unfenced', f"{prose}{nested}{notes}", nested_data),
+        ('large_repair', f"{prose}```json\n{with_trailing_commas(with_grouped_numbers(large))}\n```{notes}", large_data),
+    ]
+
+
+def run_benchmark(response_paths, repeats=20):
+    """
+    Time both extractors on every case built from the saved responses
+
+    Args:
+        response_paths: Saved response JSON files
+        repeats: Timed runs per case and extractor
+
+    Returns:
+        dict: Per-case results and a summary per extractor
+    """
+    extractors = {'legacy': legacy_extract_json, 'current': current_extract_json}
+    histograms = {name: LatencyHistogram() for name in extractors}
+    correct = {name: 0 for name in extractors}
+    cases = []
+
+    for path in response_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for case_name, text, expected in build_cases(data):
+            expected = normalize_numbers(copy.deepcopy(expected))
+            case = {'response': os.path.basename(path), 'case': case_name, 'characters': len(text)}
+            for name, extractor in extractors.items():
+                durations = []
+                result = None
+                for _ in range(repeats):
+                    start_time = time.perf_counter()
+                    result = extractor(text)
+                    durations.append(time.perf_counter() - start_time)
+                for duration in durations:
+                    histograms[name].add(duration)
+                durations.sort()
+                is_correct = result == expected
+                correct[name] += is_correct
+                case[name] = {
+                    'correct': is_correct,
+                    'median_ms': round(durations[len(durations) // 2] * 1000, 3),
+                    'max_ms': round(durations[-1] * 1000, 3)
+                }
+            case['speedup'] = round(case['legacy']['median_ms'] / max(case['current']['median_ms'], 1e-6), 2)
+            cases.append(case)
+            print(f"[BENCHMARK] {case['response']} {case_name} ({len(text)} chars): "
+                  f"legacy {case['legacy']['median_ms']}ms correct={case['legacy']['correct']}, "
+                  f"current {case['current']['median_ms']}ms correct={case['current']['correct']}")
+
+    summary = {
+        name: {
+            'correct_cases': correct[name],
+            'total_cases': len(cases),
+            'p50_ms': round((histograms[name].percentile(0.5) or 0) * 1000, 3),
+            'p90_ms': round((histograms[name].percentile(0.9) or 0) * 1000, 3),
+            'p99_ms': round((histograms[name].percentile(0.99) or 0) * 1000, 3)
+        }
+        for name in extractors
+    }
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'repeats': repeats,
+        'summary': summary,
+        'cases': cases
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark JSON extraction from saved LLM responses (offline)")
+    arg_parser.add_argument("--responses", default=DEFAULT_RESPONSES,
+                            help="Glob of saved response JSON files (default: output/ocr/*/gpt_response_*.json)")
+    arg_parser.add_argument("--repeats", type=int, default=20, help="Timed runs per case (default: 20)")
+    arg_parser.add_argument("--output", "-o",
+                            help="Results JSON file (default: output/benchmarks/json_extract_<timestamp>.json)")
+
+    args = arg_parser.parse_args()
+
+    response_paths = sorted(glob.glob(args.responses))
+    if not response_paths:
+        print(f"No saved responses match {args.responses}")
+        raise SystemExit(1)
+
+    benchmark = run_benchmark(response_paths, repeats=args.repeats)
+
+    output_path = args.output
+    if output_path is None:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(DEFAULT_RESULTS_DIR, f"json_extract_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(benchmark, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(benchmark['summary'], indent=2))
+    print(f"[BENCHMARK] Results saved to: {output_path}")
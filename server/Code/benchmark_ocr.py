@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+# Offline OCR accuracy and latency benchmark against ground-truth text
+
+import os
+import re
+import sys
+import json
+import asyncio
+import time
+import types
+import shutil
+import argparse
+import tempfile
+from collections import Counter
+from datetime import datetime
+from financial_document_parser import FinancialDocumentParser
+from utils.latency_stats import LatencyHistogram
+from utils.tracing import start_trace
+
+DEFAULT_TRUTH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'truth-text', 'balance-sheet')
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'benchmarks')
+DOCUMENT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.pdf')
+
+# Stages of FinancialDocumentParser.process_document reported per page
+PARSER_STAGES = ('ocr.inference', 'extract_raw_data', 'organize', 'save_results')
+
+
+class StubLLMClient:
+    """
+    Offline stand-in for the async OpenAI client used by the agents
+
+    Answers chat.completions.create with a deterministic analysis of the
+    submitted text: a markdown table plus a JSON block of its line items, so the
+    JSON extraction path is exercised without network access.
+    """
+
+    def __init__(self, latency_seconds=0.0):
+        """
+        Initialize the stub
+
+        Args:
+            latency_seconds: Simulated response time of each request
+        """
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+        self.models = types.SimpleNamespace(list=self._list_models)
+
+    async def _list_models(self):
+        return []
+
+    async def _create(self, model, messages, **kwargs):
+        self.requests += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        text = messages[-1]['content']
+        line_items = []
+        for line in text.splitlines():
+            cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+            if len(cells) >= 2:
+                line_items.append({'label': cells[0], 'values': cells[1:]})
+
+        table = '\n'.join(f"| {item['label']} | {' | '.join(item['values'])} |" for item in line_items)
+        content = f"{table}\n\n```json\n{json.dumps({'line_items': line_items}, ensure_ascii=False, indent=2)}\n```"
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def natural_sort_key(path):
+    """Sort '2.png' before '10.png'"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', os.path.basename(path))]
+
+
+def normalize_line(line):
+    """Collapse table separators and whitespace so OCR and truth lines compare on content only"""
+    return ' '.join(line.replace('\t', ' ').replace('|', ' ').split())
+
+
+def read_truth_lines(truth_path):
+    """
+    Read a ground-truth file (one table row per line, cells separated by tabs)
+
+    Returns:
+        list: Normalized non-empty lines
+    """
+    with open(truth_path, 'r', encoding='utf-8') as f:
+        return [line for line in (normalize_line(raw) for raw in f) if line]
+
+
+def structure_lines(financial_structure):
+    """
+    Get the parser's text lines in reading order
+
+    Returns:
+        list: Normalized non-empty lines
+    """
+    lines = (' '.join(line['items'].texts()) for line in financial_structure['line_items'])
+    return [line for line in (normalize_line(line) for line in lines) if line]
+
+
+def edit_distance(a, b):
+    """
+    Levenshtein distance between two strings
+
+    Uses rapidfuzz when installed, otherwise a two-row dynamic programming fallback.
+    """
+    try:
+        from rapidfuzz.distance import Levenshtein
+        return Levenshtein.distance(a, b)
+    except ImportError:
+        pass
+
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def score_page(predicted_lines, truth_lines):
+    """
+    Compare OCR output with the ground truth
+
+    Args:
+        predicted_lines: Normalized lines produced by the parser
+        truth_lines: Normalized ground-truth lines
+
+    Returns:
+        dict: Character error rate and accuracy over the whole page, and
+              precision/recall/F1 of exactly matching lines
+    """
+    predicted_text = '\n'.join(predicted_lines)
+    truth_text = '\n'.join(truth_lines)
+    distance = edit_distance(predicted_text, truth_text)
+    cer = distance / max(len(truth_text), 1)
+
+    matched = sum((Counter(predicted_lines) & Counter(truth_lines)).values())
+    precision = matched / len(predicted_lines) if predicted_lines else 0.0
+    recall = matched / len(truth_lines) if truth_lines else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return {
+        'edit_distance': distance,
+        'cer': round(cer, 4),
+        'char_accuracy': round(max(0.0, 1 - cer), 4),
+        'truth_lines': len(truth_lines),
+        'predicted_lines': len(predicted_lines),
+        'matched_lines': matched,
+        'line_precision': round(precision, 4),
+        'line_recall': round(recall, 4),
+        'line_f1': round(f1, 4)
+    }
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process and its finished children, in MB
+
+    Returns:
+        float: Peak RSS, or None if it cannot be measured on this platform
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+        except (ImportError, AttributeError):
+            return None
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak * unit / (1024 * 1024), 1)
+
+
+def find_stage(stages, name):
+    """Total duration of every stage with the given name in a stage timing tree"""
+    total = 0.0
+    for stage in stages:
+        if stage['name'] == name:
+            total += stage['duration_seconds']
+        total += find_stage(stage['children'], name)
+    return total
+
+
+def run_benchmark(images_dir, truth_dir=DEFAULT_TRUTH_DIR, lang='en', use_gpu=False, pdf_dpi=200,
+                  warmup=1, with_llm=False, stub_latency=0.0, analysis_type='balance_sheet', formats=('text',)):
+    """
+    Run every document in a directory through the parser and score it against the truth files
+
+    Documents are matched to truth files by name ('3.png' is scored against '3.txt').
+    Documents without a truth file are timed but not scored. The OCR result cache
+    is disabled so every page is actually recognized.
+
+    Args:
+        images_dir: Directory of page images (or PDFs)
+        truth_dir: Directory of ground-truth .txt files
+        lang: Language for OCR
+        use_gpu: Whether to run inference on GPU
+        pdf_dpi: Resolution used to rasterize PDF pages
+        warmup: Number of untimed runs on the first document before measuring
+        with_llm: Whether to also run the financial analysis step against the stubbed LLM
+        stub_latency: Simulated response time of the stubbed LLM
+        analysis_type: Analysis prompt used with with_llm
+        formats: Artifact formats written per document (the API writes only 'text' by default)
+
+    Returns:
+        dict: Benchmark results (config, per-document results and summary)
+    """
+    documents = sorted(
+        (os.path.join(images_dir, name) for name in os.listdir(images_dir) if name.lower().endswith(DOCUMENT_EXTENSIONS)),
+        key=natural_sort_key
+    )
+    if not documents:
+        raise ValueError(f"No documents found in {images_dir}")
+
+    parser = FinancialDocumentParser(lang=lang, use_gpu=use_gpu, pdf_dpi=pdf_dpi)
+
+    financial_agent = None
+    if with_llm:
+        from LLM_Request import Financial_Agent
+        financial_agent = Financial_Agent()
+        financial_agent.client = StubLLMClient(stub_latency)
+
+    output_dir = tempfile.mkdtemp(prefix='ocr_benchmark_')
+    try:
+        for _ in range(warmup):
+            print(f"[BENCHMARK] Warmup run on {os.path.basename(documents[0])}")
+            parser.process_document(documents[0], output_dir=output_dir, formats=formats)
+
+        results = []
+        latencies = LatencyHistogram()
+        total_pages = 0
+        total_seconds = 0.0
+
+        for document_path in documents:
+            name = os.path.basename(document_path)
+            start_time = time.perf_counter()
+            with start_trace('benchmark_document', document=name) as trace:
+                output_files, financial_structure = parser.process_document(document_path, output_dir=output_dir, formats=formats)
+            duration = time.perf_counter() - start_time
+            stages = trace.stage_timings()
+
+            page_count = max(financial_structure['page_count'], 1)
+            total_pages += page_count
+            total_seconds += duration
+            latencies.add(duration / page_count, count=page_count)
+
+            result = {
+                'document': name,
+                'pages': page_count,
+                'duration_seconds': round(duration, 4),
+                'seconds_per_page': round(duration / page_count, 4),
+                'stages': {stage: round(find_stage(stages, stage), 4) for stage in PARSER_STAGES},
+                'peak_rss_mb': peak_rss_mb()
+            }
+
+            truth_path = os.path.join(truth_dir, f"{os.path.splitext(name)[0]}.txt")
+            if os.path.exists(truth_path):
+                result['truth_file'] = os.path.basename(truth_path)
+                result['accuracy'] = score_page(structure_lines(financial_structure), read_truth_lines(truth_path))
+
+            if financial_agent is not None:
+                with open(output_files['text'], 'r', encoding='utf-8') as f:
+                    ocr_text = f.read()
+                llm_start = time.perf_counter()
+                agent_result = financial_agent.analyze_financial_data(ocr_text, analysis_type=analysis_type, max_retries=1)
+                result['llm'] = {
+                    'success': agent_result['success'],
+                    'duration_seconds': round(time.perf_counter() - llm_start, 4)
+                }
+
+            accuracy = result.get('accuracy')
+            print(f"[BENCHMARK] {name}: {result['seconds_per_page']:.3f}s/page"
+                  + (f", char accuracy {accuracy['char_accuracy']:.2%}, line F1 {accuracy['line_f1']:.2%}" if accuracy else ""))
+            results.append(result)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    scored = [result['accuracy'] for result in results if 'accuracy' in result]
+    total_truth_chars = sum(max(len('\n'.join(read_truth_lines(os.path.join(truth_dir, result['truth_file'])))), 1)
+                            for result in results if 'truth_file' in result)
+    summary = {
+        'documents': len(results),
+        'pages': total_pages,
+        'scored_documents': len(scored),
+        'total_seconds': round(total_seconds, 4),
+        'pages_per_second': round(total_pages / total_seconds, 4) if total_seconds else None,
+        'seconds_per_page': latencies.summary(),
+        'peak_rss_mb': peak_rss_mb(),
+        'cer': round(sum(score['edit_distance'] for score in scored) / total_truth_chars, 4) if scored else None,
+        'mean_char_accuracy': round(sum(score['char_accuracy'] for score in scored) / len(scored), 4) if scored else None,
+        'mean_line_f1': round(sum(score['line_f1'] for score in scored) / len(scored), 4) if scored else None
+    }
+    if financial_agent is not None:
+        llm_durations = [result['llm']['duration_seconds'] for result in results]
+        summary['llm'] = {
+            'requests': financial_agent.client.requests,
+            'successful': sum(1 for result in results if result['llm']['success']),
+            'avg_seconds': round(sum(llm_durations) / len(llm_durations), 4)
+        }
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'images_dir': os.path.abspath(images_dir),
+            'truth_dir': os.path.abspath(truth_dir),
+            'lang': lang,
+            'use_gpu': use_gpu,
+            'ocr_version': parser.ocr_version,
+            'engine_kwargs': FinancialDocumentParser.get_engine_kwargs(lang, use_gpu),
+            'pdf_dpi': pdf_dpi,
+            'formats': list(formats),
+            'warmup': warmup,
+            'with_llm': with_llm,
+            'stub_latency': stub_latency
+        },
+        'results': results,
+        'summary': summary
+    }
+
+
+def compare_to_baseline(summary, baseline_summary, max_latency_regression=0.2, max_accuracy_drop=0.01):
+    """
+    Compare a benchmark summary with a baseline run
+
+    Args:
+        summary: Summary of the current run
+        baseline_summary: Summary of the baseline run
+        max_latency_regression: Allowed relative increase of p50/p90 seconds per page (0.2 = 20%)
+        max_accuracy_drop: Allowed absolute drop of mean character accuracy and line F1
+
+    Returns:
+        list: Descriptions of the regressions found (empty if none)
+    """
+    regressions = []
+    for percentile in ('p50', 'p90'):
+        current = summary['seconds_per_page'].get(percentile)
+        baseline = baseline_summary['seconds_per_page'].get(percentile)
+        if current is not None and baseline:
+            change = (current - baseline) / baseline
+            print(f"[BENCHMARK] {percentile} seconds/page: {baseline:.4f} -> {current:.4f} ({change:+.1%})")
+            if change > max_latency_regression:
+                regressions.append(f"{percentile} latency regressed by {change:.1%}")
+
+    for metric in ('mean_char_accuracy', 'mean_line_f1'):
+        current = summary.get(metric)
+        baseline = baseline_summary.get(metric)
+        if current is not None and baseline is not None:
+            print(f"[BENCHMARK] {metric}: {baseline:.4f} -> {current:.4f} ({current - baseline:+.4f})")
+            if baseline - current > max_accuracy_drop:
+                regressions.append(f"{metric} dropped by {baseline - current:.4f}")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark OCR latency and accuracy against ground-truth text (offline)")
+    arg_parser.add_argument("images_dir", help="Directory of page images (or PDFs) named after their truth files")
+    arg_parser.add_argument("--truth-dir", default=DEFAULT_TRUTH_DIR,
+                            help="Directory of ground-truth .txt files (default: output/truth-text/balance-sheet)")
+    arg_parser.add_argument("--output", "-o",
+                            help="Results JSON file (default: output/benchmarks/ocr_benchmark_<timestamp>.json)")
+    arg_parser.add_argument("--lang", "-l", default="en", help="Language for OCR (default: en)")
+    arg_parser.add_argument("--use-gpu", action="store_true", help="Run OCR inference on GPU")
+    arg_parser.add_argument("--pdf-dpi", type=int, default=200, help="Resolution used to rasterize PDF pages")
+    arg_parser.add_argument("--formats", default="text",
+                            help="Comma-separated artifact formats to write per document: text, json, excel (default: text)")
+    arg_parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before measuring (default: 1)")
+    arg_parser.add_argument("--with-llm", action="store_true",
+                            help="Also run the financial analysis step against a stubbed (offline) LLM")
+    arg_parser.add_argument("--stub-latency", type=float, default=0.0,
+                            help="Simulated response time of the stubbed LLM in seconds")
+    arg_parser.add_argument("--baseline", help="Results JSON of a previous run to compare against")
+    arg_parser.add_argument("--max-latency-regression", type=float, default=0.2,
+                            help="Allowed relative p50/p90 latency increase over the baseline (default: 0.2)")
+    arg_parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                            help="Allowed absolute accuracy drop from the baseline (default: 0.01)")
+
+    args = arg_parser.parse_args()
+
+    benchmark = run_benchmark(
+        args.images_dir,
+        truth_dir=args.truth_dir,
+        lang=args.lang,
+        use_gpu=args.use_gpu,
+        pdf_dpi=args.pdf_dpi,
+        formats=[fmt.strip() for fmt in args.formats.split(',') if fmt.strip()],
+        warmup=args.warmup,
+        with_llm=args.with_llm,
+        stub_latency=args.stub_latency
+    )
+
+    output_path = args.output
+    if output_path is None:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(DEFAULT_RESULTS_DIR, f"ocr_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(benchmark, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(benchmark['summary'], indent=2))
+    print(f"[BENCHMARK] Results saved to: {output_path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(
+            benchmark['summary'],
+            baseline['summary'],
+            max_latency_regression=args.max_latency_regression,
+            max_accuracy_drop=args.max_accuracy_drop
+        )
+        if regressions:
+            for regression in regressions:
+                print(f"[BENCHMARK] REGRESSION: {regression}")
+            sys.exit(1)
+        print("[BENCHMARK] No regressions against baseline")
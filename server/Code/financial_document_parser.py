@@ -4,9 +4,19 @@
 import os
 import json
 import re
-import pandas as pd
-from paddleocr import PaddleOCR
+import shutil
+import tempfile
+import threading
+import time
+import hashlib
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.ocr_cache import OCRResultCache
+from utils.image_io import is_pdf, decode_image, image_key_bytes
+from utils.pdf_pages import get_page_count, extract_text_layer, PdfRasterPool
+from utils.tracing import span, submit_with_context
+from utils.box_geometry import ROW_GAP_FACTOR
+from utils.token_table import TokenTable
 
 class FinancialDocumentParser:
     """
@@ -15,102 +25,339 @@ class FinancialDocumentParser:
     meaningful financial structure.
     """
     
-    def __init__(self, lang='en', use_gpu=False):
-        """Initialize the parser with PaddleOCR"""
-        self.ocr = PaddleOCR(
-            lang=lang, 
-            use_angle_cls=True, 
-            use_gpu=use_gpu,
-            ocr_version='PP-OCRv4',
-            structure_version='PP-StructureV3'
-        )
-        
-    def process_document(self, image_path, output_dir='./financial_data'):
-        """Process a financial document image and extract structured data"""
+    OCR_VERSION = 'PP-OCRv4'
+    
+    # Output artifacts and their file suffixes; process_document writes the requested
+    # ones and get_artifact generates the others on demand
+    ARTIFACT_FORMATS = {
+        'text': '_financial.txt',
+        'json': '_financial.json',
+        'excel': '_financial.xlsx'
+    }
+    TOKENS_SUFFIX = '_tokens.npz'
+    
+    def __init__(self, lang='en', use_gpu=False, cache_dir=None, cache_size_limit_mb=512, ocr_engine=None,
+                 pdf_dpi=200, pdf_raster_workers=None, raster_pool=None, ocr_timeout=300):
+        """
+        Initialize the parser with PaddleOCR
+        
+        Args:
+            lang: Language for OCR
+            use_gpu: Whether to run inference on GPU
+            cache_dir: Directory for the persistent OCR result cache. If None, caching is disabled.
+            cache_size_limit_mb: Maximum on-disk size of the OCR result cache
+            ocr_engine: Optional shared engine exposing ocr(img, cls=..., timeout=...), such as an
+                        OCREnginePool. If None, a local PaddleOCR instance is created on first use
+                        (see load_engine).
+            pdf_dpi: Resolution used to rasterize PDF pages
+            pdf_raster_workers: Number of processes rasterizing PDF pages. If None, uses up to 4 CPUs.
+            raster_pool: Optional shared PdfRasterPool; if None, the parser creates its own,
+                         sized by pdf_raster_workers
+            ocr_timeout: Maximum seconds to wait for one image on the shared engine, queueing
+                         included, so a stuck engine fails the request instead of hanging it
+        """
+        self.lang = lang
+        self.ocr_version = self.OCR_VERSION
+        self.use_cls = False
+        self.use_gpu = use_gpu
+        self._ocr = ocr_engine
+        self._engine_lock = threading.Lock()
+        # A single PaddleOCR instance is not safe to call from several threads at once
+        self._ocr_lock = threading.Lock() if ocr_engine is None else None
+        self.ocr_timeout = ocr_timeout
+        self.cache = OCRResultCache(cache_dir, cache_size_limit_mb) if cache_dir else None
+        self.pdf_dpi = pdf_dpi
+        self.pdf_raster_workers = pdf_raster_workers or min(4, os.cpu_count() or 1)
+        self.raster_pool = raster_pool or PdfRasterPool(self.pdf_raster_workers)
+    
+    @property
+    def ocr(self):
+        """The OCR engine, loaded on first access (see load_engine)"""
+        if self._ocr is None:
+            self.load_engine()
+        return self._ocr
+    
+    @property
+    def engine_loaded(self):
+        """Whether the OCR engine is available without loading it"""
+        return self._ocr is not None
+    
+    def load_engine(self):
+        """
+        Load the local PaddleOCR engine if it isn't loaded yet
+        
+        Importing paddleocr and building its detection, recognition and angle
+        classification models takes several seconds, so it is deferred until the
+        engine is needed (or warmup is called). Concurrent callers wait for a
+        single load.
+        """
+        if self._ocr is not None:
+            return
+        with self._engine_lock:
+            if self._ocr is not None:
+                return
+            with span('ocr.load_engine'):
+                start_time = time.time()
+                from paddleocr import PaddleOCR
+                self._ocr = PaddleOCR(**self.get_engine_kwargs(self.lang, self.use_gpu))
+            print(f"[OCR] Engine loaded in {time.time() - start_time:.2f}s")
+    
+    def warmup(self, image_path=None):
+        """
+        Load the OCR engine and run one inference, so the first document doesn't pay for either
+        
+        The first inference initializes the inference runtime and its memory
+        pools, which takes noticeably longer than later ones.
+        
+        Args:
+            image_path: Sample page to recognize; if None, a small rendered line item is used
+        
+        Returns:
+            float: Seconds spent
+        """
+        start_time = time.time()
+        self.load_engine()
+        with span('ocr.warmup'):
+            self._infer(image_path if image_path else self._warmup_image())
+        duration = time.time() - start_time
+        print(f"[OCR] Warmup finished in {duration:.2f}s")
+        return duration
+    
+    @staticmethod
+    def _warmup_image():
+        """Render a line of a financial statement, so warmup runs detection and recognition"""
+        import cv2
+        import numpy as np
+        image = np.full((96, 640, 3), 255, dtype=np.uint8)
+        cv2.putText(image, "Total assets", (16, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+        cv2.putText(image, "1,234,567", (420, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+        return image
+    
+    @classmethod
+    def get_engine_kwargs(cls, lang='en', use_gpu=False):
+        """
+        Get the PaddleOCR constructor arguments used by the parser
+        
+        Args:
+            lang: Language for OCR
+            use_gpu: Whether to run inference on GPU
+        
+        Returns:
+            dict: Keyword arguments for PaddleOCR
+        """
+        return {
+            'lang': lang,
+            'use_angle_cls': True,
+            'use_gpu': use_gpu,
+            'ocr_version': cls.OCR_VERSION,
+            'structure_version': 'PP-StructureV3'
+        }
+        
+    def process_document(self, image, output_dir='./financial_data', formats=None, document_id=None):
+        """
+        Process a financial document image and extract structured data
+        
+        Args:
+            image: Path to the image or PDF, the encoded image or PDF bytes (e.g. an upload
+                   read from the request), or a decoded BGR image array
+            output_dir: Directory for the output files
+            formats: Artifact formats to write now (see ARTIFACT_FORMATS); all of them if None.
+                     The others can be generated later with get_artifact.
+            document_id: Base name of the output files; if None, see get_document_id
+        
+        Returns:
+            dict: Mapping of format to written file path
+            dict: Financial structure
+        """
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
         # Extract base name for output files
-        base_name = os.path.splitext(os.path.basename(image_path))[0]
+        base_name = document_id or self.get_document_id(image)
         
-        # Run OCR on the image
-        print(f"Processing financial document: {image_path}")
-        ocr_result = self.ocr.ocr(image_path, cls=False)
+        # Run OCR on the image (or on every page of a PDF)
+        if isinstance(image, str):
+            print(f"Processing financial document: {image}")
+            ocr_result = self._run_pdf(image) if image.lower().endswith('.pdf') else self._run_ocr(image)
+        else:
+            print(f"Processing financial document: {base_name} (in memory)")
+            ocr_result = self._run_pdf_bytes(image) if isinstance(image, bytes) and is_pdf(image) else self._run_ocr(image)
         
         # Extract text and positions
-        extracted_data = self._extract_raw_data(ocr_result)
+        with span('extract_raw_data'):
+            extracted_data = self._extract_raw_data(ocr_result)
         
         # Organize into financial structure
-        financial_structure = self._organize_financial_data(extracted_data)
-        
-        # Save the results in various formats
-        output_files = self._save_results(financial_structure, base_name, output_dir)
+        with span('organize'):
+            financial_structure = self._organize_financial_data(extracted_data)
+        financial_structure['page_count'] = len(ocr_result) if ocr_result else 0
+        
+        # Save the results in the requested formats, plus a token snapshot for generating the others later
+        with span('save_results'):
+            self._remove_artifacts(base_name, output_dir)
+            extracted_data.save(
+                os.path.join(output_dir, f"{base_name}{self.TOKENS_SUFFIX}"),
+                page_count=financial_structure['page_count']
+            )
+            output_files = self._save_results(financial_structure, base_name, output_dir, formats)
         
         return output_files, financial_structure
     
+    def _remove_artifacts(self, base_name, output_dir):
+        """Delete artifacts left from an earlier run of the same document so they are not served stale"""
+        for artifact_format in self.ARTIFACT_FORMATS:
+            try:
+                os.remove(self.get_artifact_path(base_name, output_dir, artifact_format))
+            except FileNotFoundError:
+                pass
+    
+    def _run_pdf(self, pdf_path):
+        """
+        Get per-page OCR results for a PDF, in page order
+        
+        Pages with an embedded text layer are read directly without OCR. The
+        remaining pages are rasterized in the shared raster pool, and each page
+        is OCR'd as soon as it is rendered (as many at a time as the OCR engine
+        can serve), so rasterizing later pages overlaps OCR of earlier ones.
+        """
+        page_count = get_page_count(pdf_path)
+        with span('pdf.text_layer', pages=page_count):
+            pages = extract_text_layer(pdf_path, dpi=self.pdf_dpi)
+        scanned_pages = [page_idx for page_idx in range(page_count) if page_idx not in pages]
+        print(f"PDF has {page_count} pages: {len(pages)} with a text layer, {len(scanned_pages)} to OCR")
+        
+        if scanned_pages:
+            raster_dir = tempfile.mkdtemp(prefix='pdf_pages_')
+            raster_futures = {}
+            try:
+                with span('pdf.ocr_pages', pages=len(scanned_pages)), \
+                        ThreadPoolExecutor(max_workers=getattr(self.ocr, 'size', 1)) as ocr_threads:
+                    raster_futures = {
+                        self.raster_pool.submit(pdf_path, page_idx, self.pdf_dpi, raster_dir): page_idx
+                        for page_idx in scanned_pages
+                    }
+                    ocr_futures = {}
+                    for raster_future in as_completed(raster_futures):
+                        image_path = raster_future.result()
+                        ocr_futures[raster_futures[raster_future]] = submit_with_context(ocr_threads, self._run_ocr, image_path)
+                    
+                    for page_idx, future in ocr_futures.items():
+                        result = future.result()
+                        # A single image yields a one-page result
+                        pages[page_idx] = result[0] if result else None
+            finally:
+                # Pages of a failed document that are still queued are not rendered
+                for raster_future in raster_futures:
+                    raster_future.cancel()
+                shutil.rmtree(raster_dir, ignore_errors=True)
+        
+        return [pages.get(page_idx) for page_idx in range(page_count)]
+    
+    def _run_pdf_bytes(self, pdf_bytes):
+        """
+        Get per-page OCR results for a PDF held in memory
+        
+        The text layer reader and the rasterizer processes open PDFs by path,
+        so the bytes are spooled to a temporary file that is removed afterwards.
+        """
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+            pdf_file.write(pdf_bytes)
+            pdf_file.flush()
+            return self._run_pdf(pdf_file.name)
+    
+    def _run_ocr(self, image):
+        """Run OCR on an image (path, encoded bytes or array), reusing a cached result for identical image bytes and OCR config"""
+        with span('ocr.inference') as attributes:
+            attributes['cache_hit'] = False
+            if self.cache is None:
+                return self._infer(image)
+            
+            if isinstance(image, str):
+                with open(image, 'rb') as f:
+                    cache_key = self.cache.make_key(f.read(), self._ocr_config())
+            else:
+                cache_key = self.cache.make_key(image_key_bytes(image), self._ocr_config())
+            
+            ocr_result = self.cache.get(cache_key)
+            if ocr_result is not None:
+                print(f"OCR cache hit for: {image if isinstance(image, str) else 'in-memory image'}")
+                attributes['cache_hit'] = True
+                return ocr_result
+            
+            ocr_result = self._infer(image)
+            self.cache.set(cache_key, ocr_result)
+            return ocr_result
+    
+    def _infer(self, image):
+        """
+        Run OCR inference on the local engine (serialized) or the shared engine pool
+        
+        Encoded bytes are decoded here for the local engine. The engine pool is
+        sent the bytes as they are (much smaller to pass to a worker process
+        than the decoded array) and its workers decode them.
+        """
+        if self._ocr_lock is None:
+            return self.ocr.ocr(image, cls=self.use_cls, timeout=self.ocr_timeout)
+        if isinstance(image, bytes):
+            with span('ocr.decode'):
+                image = decode_image(image)
+        with self._ocr_lock:
+            return self.ocr.ocr(image, cls=self.use_cls)
+    
+    def _ocr_config(self):
+        """OCR settings that change the recognition output and therefore the cache key"""
+        return {
+            'lang': self.lang,
+            'ocr_version': self.ocr_version,
+            'cls': self.use_cls
+        }
+    
+    def get_cache_stats(self):
+        """
+        Get OCR result cache statistics
+        
+        Returns:
+            dict: Hit/miss counters and storage usage, or {'enabled': False} if caching is disabled
+        """
+        if self.cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.cache.get_stats()}
+    
     def _extract_raw_data(self, ocr_result):
-        """Extract raw text and positional data from OCR results"""
-        extracted_data = []
-        
-        if ocr_result and len(ocr_result) > 0:
-            for page_idx, page_results in enumerate(ocr_result):
-                for line in page_results:
-                    if len(line) >= 2:
-                        bbox = line[0]  # Bounding box coordinates
-                        text_info = line[1]  # Text and confidence
-                        
-                        if isinstance(text_info, tuple) and len(text_info) >= 1:
-                            text = text_info[0]
-                            confidence = text_info[1] if len(text_info) > 1 else None
-                            
-                            # Calculate the center point y-coordinate for vertical position reference
-                            if len(bbox) >= 4:  # Ensure bbox has at least 4 points
-                                y_values = [point[1] for point in bbox]
-                                center_y = sum(y_values) / len(y_values)
-                                
-                                # Calculate the left and right x-coordinates for alignment
-                                x_values = [point[0] for point in bbox]
-                                left_x = min(x_values)
-                                right_x = max(x_values)
-                                
-                                extracted_data.append({
-                                    'text': text,
-                                    'confidence': confidence,
-                                    'bbox': bbox,
-                                    'page': page_idx,
-                                    'center_y': center_y,
-                                    'left_x': left_x,
-                                    'right_x': right_x
-                                })
-        
-        # Sort by vertical position (center_y)
-        extracted_data.sort(key=lambda x: x['center_y'])
-        
-        return extracted_data
+        """
+        Extract raw text and positional data from OCR results
+        
+        Returns:
+            TokenTable: Recognized tokens ordered by page, then vertical position (center_y)
+        """
+        return TokenTable.from_ocr_result(ocr_result)
     
     def _organize_financial_data(self, extracted_data):
         """
         Organize the extracted data into a financial document structure
         This is a simplistic approach - in a real application, more sophisticated
         algorithms would be used to identify sections, tables, etc.
+        
+        Each line's 'items' is a TokenTable row (a view into extracted_data).
         """
         financial_structure = {
             'title': None,
             'date': None,
+            'page_count': extracted_data.page_count,
             'sections': {},
             'line_items': [],
             'unallocated': []
         }
         
         # First, try to identify the title and date
-        title_candidates = [item for item in extracted_data[:5] if len(item['text']) > 10]
+        title_candidates = [text for text in extracted_data[:5].texts() if len(text) > 10]
         if title_candidates:
-            financial_structure['title'] = title_candidates[0]['text']
+            financial_structure['title'] = title_candidates[0]
         
         # Look for dates in standard formats
         date_pattern = re.compile(r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b', re.IGNORECASE)
-        for item in extracted_data[:10]:  # Check first 10 items for date
-            date_match = date_pattern.search(item['text'])
+        for text in extracted_data[:10].texts():  # Check first 10 items for date
+            date_match = date_pattern.search(text)
             if date_match:
                 financial_structure['date'] = date_match.group(0)
                 break
@@ -121,95 +368,105 @@ class FinancialDocumentParser:
         # Process each line group
         for line_idx, group in enumerate(line_groups):
             # Skip if group is empty
-            if not group:
+            if not len(group):
                 continue
             
             # If the first item in group contains "TOTAL" or "Total", treat as a total line
-            if "TOTAL" in group[0]['text'].upper():
+            if "TOTAL" in group.text(0).upper():
                 section_name = "TOTALS"
                 if section_name not in financial_structure['sections']:
                     financial_structure['sections'][section_name] = []
                 financial_structure['sections'][section_name].append({
                     'line_number': line_idx,
+                    'page': int(group.pages[0]),
                     'items': group
                 })
             else:
                 # Regular line item - add to line_items
                 financial_structure['line_items'].append({
                     'line_number': line_idx,
+                    'page': int(group.pages[0]),
                     'items': group
                 })
         
         return financial_structure
     
-    def _group_by_vertical_position(self, extracted_data, tolerance=10):
-        """Group items that are approximately on the same line (within tolerance)"""
-        if not extracted_data:
-            return []
-        
-        groups = []
-        current_group = [extracted_data[0]]
-        current_y = extracted_data[0]['center_y']
-        
-        for item in extracted_data[1:]:
-            if abs(item['center_y'] - current_y) <= tolerance:
-                # Same line
-                current_group.append(item)
-            else:
-                # New line
-                groups.append(current_group)
-                current_group = [item]
-                current_y = item['center_y']
-        
-        # Add the last group
-        if current_group:
-            groups.append(current_group)
+    def _group_by_vertical_position(self, extracted_data, gap_factor=ROW_GAP_FACTOR):
+        """
+        Group items that are on the same line of the same page
         
-        # Sort items in each group by x position
-        for group in groups:
-            group.sort(key=lambda x: x['left_x'])
+        Rows are split where the vertical gap between consecutive items exceeds
+        gap_factor times the page's median text height (see cluster_rows).
+        Items in each group are ordered left to right.
         
-        return groups
+        Returns:
+            list: One TokenTable per line, in reading order
+        """
+        return extracted_data.group_rows(gap_factor)
     
-    def _save_results(self, financial_structure, base_name, output_dir):
-        """Save the financial structure in various formats"""
+    def _save_results(self, financial_structure, base_name, output_dir, formats=None):
+        """
+        Save the financial structure in the requested formats
+        
+        Args:
+            financial_structure: Structure from _organize_financial_data
+            base_name: Base name of the output files
+            output_dir: Directory for the output files
+            formats: Artifact formats to write (see ARTIFACT_FORMATS); all of them if None
+        
+        Returns:
+            dict: Mapping of format to written file path
+        """
         output_files = {}
+        for artifact_format in formats or self.ARTIFACT_FORMATS:
+            if artifact_format not in self.ARTIFACT_FORMATS:
+                raise ValueError(f"Unknown artifact format '{artifact_format}'. Available formats: {list(self.ARTIFACT_FORMATS)}")
+            artifact_path = self.get_artifact_path(base_name, output_dir, artifact_format)
+            writer = getattr(self, f"_write_{artifact_format}")
+            with span(f"write_{artifact_format}"):
+                writer(financial_structure, artifact_path)
+            output_files[artifact_format] = artifact_path
         
-        # 1. Save as JSON (full structure)
-        json_path = os.path.join(output_dir, f"{base_name}_financial.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            # Create a serializable version (without complex objects)
-            serializable = {
-                'title': financial_structure['title'],
-                'date': financial_structure['date'],
-                'sections': {},
-                'line_items': []
-            }
-            
-            # Process sections
-            for section_name, section_data in financial_structure['sections'].items():
-                serializable['sections'][section_name] = []
-                for line in section_data:
-                    serializable['sections'][section_name].append({
-                        'line_number': line['line_number'],
-                        'content': [item['text'] for item in line['items']]
-                    })
-            
-            # Process line items
-            for line in financial_structure['line_items']:
-                serializable['line_items'].append({
+        print(f"Financial document data saved:")
+        for artifact_format, artifact_path in output_files.items():
+            print(f"- {artifact_format.capitalize()}: {artifact_path}")
+        
+        return output_files
+    
+    def _write_json(self, financial_structure, json_path):
+        """Save the full structure as JSON"""
+        # Create a serializable version (without complex objects)
+        serializable = {
+            'title': financial_structure['title'],
+            'date': financial_structure['date'],
+            'page_count': financial_structure['page_count'],
+            'sections': {},
+            'line_items': []
+        }
+        
+        # Process sections
+        for section_name, section_data in financial_structure['sections'].items():
+            serializable['sections'][section_name] = []
+            for line in section_data:
+                serializable['sections'][section_name].append({
                     'line_number': line['line_number'],
-                    'content': [item['text'] for item in line['items']]
+                    'page': line['page'],
+                    'content': line['items'].texts()
                 })
-            
-            json.dump(serializable, f, ensure_ascii=False, indent=2)
-        
-        output_files['json'] = json_path
         
-        # 2. Create Excel spreadsheet with tabular format
-        excel_path = os.path.join(output_dir, f"{base_name}_financial.xlsx")
+        # Process line items
+        for line in financial_structure['line_items']:
+            serializable['line_items'].append({
+                'line_number': line['line_number'],
+                'page': line['page'],
+                'content': line['items'].texts()
+            })
         
-        # Prepare data for Excel
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(serializable, f, ensure_ascii=False, indent=2)
+    
+    def _write_excel(self, financial_structure, excel_path):
+        """Create an Excel spreadsheet with tabular format"""
         rows = []
         
         # Add metadata
@@ -225,7 +482,7 @@ class FinancialDocumentParser:
         
         # Add line items
         for line in financial_structure['line_items']:
-            line_content = [item['text'] for item in line['items']]
+            line_content = line['items'].texts()
             
             # Try to separate label and value
             if len(line_content) >= 2:
@@ -235,13 +492,12 @@ class FinancialDocumentParser:
                 rows.append([line_content[0], "", line['line_number']])
         
         # Create DataFrame and save
+        import pandas as pd
         df = pd.DataFrame(rows)
         df.to_excel(excel_path, header=False, index=False)
-        
-        output_files['excel'] = excel_path
-        
-        # 3. Plain text with the most important information
-        txt_path = os.path.join(output_dir, f"{base_name}_financial.txt")
+    
+    def _write_text(self, financial_structure, txt_path):
+        """Save plain text with the most important information"""
         with open(txt_path, 'w', encoding='utf-8') as f:
             if financial_structure['title']:
                 f.write(f"TITLE: {financial_structure['title']}\n")
@@ -250,22 +506,73 @@ class FinancialDocumentParser:
             
             f.write("\n--- LINE ITEMS ---\n")
             
+            current_page = None
             for line in financial_structure['line_items']:
-                line_content = [item['text'] for item in line['items']]
+                # Mark page boundaries so multi-page documents keep their page order
+                if financial_structure['page_count'] > 1 and line['page'] != current_page:
+                    current_page = line['page']
+                    f.write(f"\n[PAGE {current_page + 1}]\n")
+                line_content = line['items'].texts()
                 f.write(f"{' | '.join(line_content)}\n")
             
             f.write("\n--- TOTALS ---\n")
             if 'TOTALS' in financial_structure['sections']:
                 for line in financial_structure['sections']['TOTALS']:
-                    line_content = [item['text'] for item in line['items']]
+                    line_content = line['items'].texts()
                     f.write(f"{' | '.join(line_content)}\n")
+    
+    @classmethod
+    def get_document_id(cls, image):
+        """
+        Base name shared by all output files of a document
         
-        output_files['text'] = txt_path
+        The file name without its extension for a path; for an in-memory image,
+        which has no name, a digest of its content.
+        """
+        if isinstance(image, str):
+            return os.path.splitext(os.path.basename(image))[0]
+        return f"upload_{hashlib.sha256(image_key_bytes(image)).hexdigest()[:16]}"
+    
+    @classmethod
+    def get_artifact_path(cls, base_name, output_dir, artifact_format):
+        """Path of one output artifact of a document"""
+        return os.path.join(output_dir, f"{base_name}{cls.ARTIFACT_FORMATS[artifact_format]}")
+    
+    def get_artifact(self, base_name, output_dir, artifact_format):
+        """
+        Get an output artifact of a processed document, generating it on first request
         
-        print(f"Financial document data saved:")
-        print(f"- Text: {txt_path}")
+        Artifacts not written by process_document are rebuilt from the document's
+        token snapshot, then kept on disk for later requests.
         
-        return output_files
+        Args:
+            base_name: Document ID (see get_document_id)
+            output_dir: Output directory the document was processed into
+            artifact_format: One of ARTIFACT_FORMATS
+        
+        Returns:
+            str: Path to the artifact
+        
+        Raises:
+            ValueError: If the format is unknown
+            FileNotFoundError: If the document has not been processed
+        """
+        if artifact_format not in self.ARTIFACT_FORMATS:
+            raise ValueError(f"Unknown artifact format '{artifact_format}'. Available formats: {list(self.ARTIFACT_FORMATS)}")
+        
+        artifact_path = self.get_artifact_path(base_name, output_dir, artifact_format)
+        if os.path.exists(artifact_path):
+            return artifact_path
+        
+        tokens_path = os.path.join(output_dir, f"{base_name}{self.TOKENS_SUFFIX}")
+        if not os.path.exists(tokens_path):
+            raise FileNotFoundError(f"No processed document '{base_name}'")
+        
+        with span('generate_artifact', format=artifact_format):
+            extracted_data, metadata = TokenTable.load(tokens_path)
+            financial_structure = self._organize_financial_data(extracted_data)
+            financial_structure['page_count'] = metadata.get('page_count', extracted_data.page_count)
+            return self._save_results(financial_structure, base_name, output_dir, formats=[artifact_format])[artifact_format]
 
 if __name__ == "__main__":
     import argparse
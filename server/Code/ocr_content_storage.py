@@ -6,6 +6,7 @@ import json
 import csv
 import pandas as pd
 from paddleocr import PaddleOCR
+from utils.token_table import TokenTable, BBOX_COLUMNS
 
 def extract_and_store_ocr_content(img_path, output_dir='./ocr_output'):
     """
@@ -28,36 +29,11 @@ def extract_and_store_ocr_content(img_path, output_dir='./ocr_output'):
     # Prepare filename base for output files
     base_name = os.path.splitext(os.path.basename(img_path))[0]
     
-    # 1. Simple Text Format - Just the extracted text
-    simple_output = []
-    
-    # 2. Structured Format - Content with position and confidence
-    structured_output = []
+    # Recognized tokens in OCR order, with position and confidence
+    tokens = TokenTable.from_ocr_result(result, sort=False)
     
-    # Process the results
-    if result and len(result) > 0:
-        for idx in range(len(result)):
-            page_results = result[idx]
-            
-            for line in page_results:
-                if len(line) >= 2:
-                    bbox = line[0]  # The bounding box coordinates
-                    text_info = line[1]  # Text and confidence
-                    
-                    if isinstance(text_info, tuple) and len(text_info) >= 1:
-                        text = text_info[0]
-                        confidence = text_info[1] if len(text_info) > 1 else None
-                        
-                        # Add to simple output (just text)
-                        simple_output.append(text)
-                        
-                        # Add to structured output
-                        structured_output.append({
-                            'text': text,
-                            'confidence': confidence,
-                            'bbox': bbox,
-                            'page': idx
-                        })
+    # 1. Simple Text Format - Just the extracted text
+    simple_output = tokens.texts()
     
     # Save in different formats
     
@@ -69,15 +45,15 @@ def extract_and_store_ocr_content(img_path, output_dir='./ocr_output'):
     # 2. JSON (structured, with metadata)
     json_path = os.path.join(output_dir, f"{base_name}_full.json")
     with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(structured_output, f, ensure_ascii=False, indent=2)
+        json.dump(tokens.to_records(), f, ensure_ascii=False, indent=2)
     
     # 3. CSV (tabular format)
     csv_path = os.path.join(output_dir, f"{base_name}_table.csv")
     with open(csv_path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(['text', 'confidence', 'page', 'bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2', 'bbox_x3', 'bbox_y3', 'bbox_x4', 'bbox_y4'])
+        writer.writerow(['text', 'confidence', 'page', *BBOX_COLUMNS])
         
-        for item in structured_output:
+        for item in tokens.to_records():
             row = [
                 item['text'], 
                 item['confidence'], 
@@ -90,7 +66,7 @@ def extract_and_store_ocr_content(img_path, output_dir='./ocr_output'):
     
     # 4. Excel (for financial data, easy to open in spreadsheet apps)
     excel_path = os.path.join(output_dir, f"{base_name}_data.xlsx")
-    df = pd.DataFrame([{'text': item['text'], 'confidence': item['confidence']} for item in structured_output])
+    df = pd.DataFrame({'text': simple_output, 'confidence': tokens.confidences})
     df.to_excel(excel_path, index=False)
     
     # 5. Content-Only JSON (middle ground between txt and full JSON)
@@ -4,8 +4,8 @@ import json
 import os
 import sys
 import glob
-import re
 from datetime import datetime
+from utils.json_extract import extract_json, normalize_numbers
 
 def save_to_raw_text(llm_analysis, output_path, filename, append=False):
     """
@@ -33,7 +33,7 @@ def save_to_raw_text(llm_analysis, output_path, filename, append=False):
 def extract_and_save_json(text_content, output_path):
     """
     Extract JSON content from analysis text and save to a JSON file
-    Uses the same logic as app.py's extract_json_from_text function
+    Uses the same extractor as app.py's extract_json_from_text (utils.json_extract)
     
     Args:
         text_content: Content from Financial_Agent analysis
@@ -42,108 +42,11 @@ def extract_and_save_json(text_content, output_path):
     Returns:
         str: Path to the saved JSON file or None if no JSON found
     """
-    # Try to find JSON content within the text using regex
-    json_pattern = r'```json\s*({[\s\S]*?})\s*```'
-    json_match = re.search(json_pattern, text_content)
-    
-    if not json_match:
-        # Try to find content between triple backticks without explicit json tag
-        json_pattern = r'```\s*({[\s\S]*?})\s*```'
-        json_match = re.search(json_pattern, text_content)
-    
-    if not json_match:
-        # Try a more general approach if the specific pattern doesn't match
-        json_pattern = r'({[\s\S]*?})'
-        json_match = re.search(json_pattern, text_content)
-    
-    json_data = None
-    json_path = None
-    
-    if json_match:
-        json_str = json_match.group(1).strip()
-        
-        try:
-            # First try to parse as is
-            json_data = json.loads(json_str)
-        except json.JSONDecodeError:
-            # If failed, try to fix common issues in the JSON structure
-            try:
-                # Clean any trailing commas
-                json_str = re.sub(r',\s*}', '}', json_str)
-                json_str = re.sub(r',\s*]', ']', json_str)
-                
-                # Replace single quotes with double quotes for keys and string values
-                json_str = re.sub(r"'([^']*)':", r'"\1":', json_str)
-                json_str = re.sub(r':\s*\'([^\']*)\'', r': "\1"', json_str)
-                
-                # Fix comma issues in values (assuming these are numbers with commas as thousand separators)
-                json_str = re.sub(r'"value":\s*([0-9,]+),\s*(["}])', r'"value": \1\2', json_str)
-                
-                # Fix specific issue with missing quotes around dates
-                json_str = re.sub(r'"from":\s*(\d{4}-\d{2}-\d{2})', r'"from": "\1"', json_str)
-                json_str = re.sub(r'"to":\s*(\d{4}-\d{2}-\d{2})', r'"to": "\1"', json_str)
-                
-                # Parse the fixed JSON
-                json_data = json.loads(json_str)
-                
-                # Post-process the JSON to fix number formatting issues
-                for key, value in json_data.items():
-                    if isinstance(value, dict) and "value" in value:
-                        value_str = str(value["value"])
-                        # If the value contains commas, remove them and convert to an integer
-                        if isinstance(value_str, str) and ',' in value_str:
-                            value["value"] = int(value_str.replace(',', ''))
-            except Exception:
-                # As a last resort, try to extract and reformat manually
-                try:
-                    # Manual extraction for specific format
-                    manual_json = {}
-                    field_pattern = r'"([^"]+)":\s*{([^}]+)}'
-                    fields = re.finditer(field_pattern, json_str)
-                    
-                    for field in fields:
-                        field_name = field.group(1)
-                        field_content = field.group(2)
-                        
-                        # Extract value, from, and to
-                        value_match = re.search(r'"value":\s*([^,"\n]+(?:,[^,"\n]+)*)', field_content)
-                        from_match = re.search(r'"from":\s*([^,\n]+)', field_content)
-                        to_match = re.search(r'"to":\s*([^,\n]+)', field_content)
-                        
-                        if value_match:
-                            # Create a nested dictionary for this field
-                            manual_json[field_name] = {}
-                            
-                            # Extract and clean the value (removing commas but keeping all digits)
-                            value_str = value_match.group(1).strip()
-                            if value_str.endswith(','):
-                                value_str = value_str[:-1]
-                            
-                            # Now remove commas between digits while preserving the full number
-                            value_str = value_str.replace(',', '')
-                            
-                            try:
-                                # Try to convert to number if possible
-                                manual_json[field_name]["value"] = int(value_str)
-                            except ValueError:
-                                try:
-                                    manual_json[field_name]["value"] = float(value_str)
-                                except ValueError:
-                                    manual_json[field_name]["value"] = value_str.strip('"\'')
-                            
-                            # Add from and to dates if available
-                            if from_match:
-                                manual_json[field_name]["from"] = from_match.group(1).strip().strip('"\'')
-                            if to_match:
-                                manual_json[field_name]["to"] = to_match.group(1).strip().strip('"\'')
-                    
-                    if manual_json:
-                        json_data = manual_json
-                except Exception:
-                    json_data = None
+    json_data = extract_json(text_content)
     
     # If we have JSON data, save it
     if json_data:
+        json_data = normalize_numbers(json_data)
         json_path = f"{output_path.rsplit('.', 1)[0]}.json"
         with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(json_data, f, indent=2)
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import closing
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_files (
+    filename TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    category TEXT,
+    analysis_type TEXT,
+    indexed_at TEXT NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO analysis_files (filename, size, mtime_ns, content_hash, category, analysis_type, indexed_at)
+VALUES (:filename, :size, :mtime_ns, :content_hash, :category, :analysis_type, :indexed_at)
+ON CONFLICT(filename) DO UPDATE SET
+    size = excluded.size,
+    mtime_ns = excluded.mtime_ns,
+    content_hash = excluded.content_hash,
+    category = excluded.category,
+    analysis_type = excluded.analysis_type,
+    indexed_at = excluded.indexed_at
+"""
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AnalysisFiles(Mapping):
+    """
+    Read-only mapping of analysis filename to its parsed JSON
+
+    Payloads are parsed on first access only, so code that just needs the
+    names, count or content hashes never opens the files.
+    """
+
+    def __init__(self, catalog, entries):
+        self._catalog = catalog
+        self._entries = entries
+
+    def __getitem__(self, filename):
+        entry = self._entries[filename]
+        return self._catalog.load_payload(filename, entry['content_hash'])
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def content_hash(self, filename):
+        """SHA-256 of the file's bytes when it was indexed"""
+        return self._entries[filename]['content_hash']
+
+    def entry(self, filename):
+        """Catalog metadata of one file"""
+        return dict(self._entries[filename])
+
+
+class AnalysisCatalog:
+    """
+    Metadata index of the financial analysis JSON files.
+
+    Holds filename, size, mtime, content hash, category and analysis type of
+    every file in memory, persisted to SQLite so categories survive a restart.
+    A watchdog observer keeps the index in sync with the directory; without
+    watchdog, queries re-stat the directory instead (still without parsing).
+    Lookups never read the JSON payloads, which are parsed lazily through
+    files() and memoized by content hash.
+    """
+
+    def __init__(self, directory: str, db_path: str, category_map: dict = None, watch: bool = True,
+                 payload_cache_size: int = 256):
+        """
+        Initialize the catalog and index the directory
+
+        Args:
+            directory: Directory holding the analysis JSON files
+            db_path: Path to the SQLite database file
+            category_map: Mapping of category to analysis type, used to classify
+                          files by name when they were not recorded explicitly
+            watch: Whether to keep the index in sync with a watchdog observer
+            payload_cache_size: Number of parsed payloads kept in memory
+        """
+        self.directory = directory
+        self.db_path = db_path
+        self.category_map = category_map or {}
+        self.payload_cache_size = payload_cache_size
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._payloads = {}
+        self._observer = None
+        os.makedirs(directory, exist_ok=True)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            for row in conn.execute("SELECT * FROM analysis_files"):
+                self._entries[row['filename']] = dict(row)
+
+        self.reconcile()
+        if watch:
+            self._start_watcher()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _start_watcher(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            print("[CATALOG] watchdog is not installed, re-checking the directory on every query")
+            return
+
+        catalog = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, 'dest_path', None)):
+                    if path and path.endswith('.json'):
+                        catalog.refresh_file(path)
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.directory, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+
+    def stop(self):
+        """Stop the watchdog observer"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def classify(self, filename: str):
+        """
+        Guess category and analysis type from a filename such as '<id>_balance-sheet_financial_analysis.json'
+
+        Returns:
+            tuple: (category, analysis_type), both None if no known category appears in the name
+        """
+        name = filename.lower()
+        for category in sorted(self.category_map, key=len, reverse=True):
+            if category in name:
+                return category, self.category_map[category]
+        return None, None
+
+    def record(self, path: str, category: str = None, analysis_type: str = None) -> dict:
+        """
+        Index a file that was just written, with its known category and analysis type
+
+        Returns:
+            dict: The catalog entry
+        """
+        return self.refresh_file(path, category=category, analysis_type=analysis_type)
+
+    def refresh_file(self, path: str, category: str = None, analysis_type: str = None):
+        """
+        Re-index one file (or drop it if it no longer exists)
+
+        The content hash is only recomputed when size or mtime changed.
+        Category and analysis type are kept from the previous entry unless given.
+
+        Returns:
+            dict: The catalog entry, or None if the file was removed
+        """
+        filename = os.path.basename(path)
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            previous = self._entries.get(filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if previous is not None:
+                    del self._entries[filename]
+                    with closing(self._connect()) as conn, conn:
+                        conn.execute("DELETE FROM analysis_files WHERE filename = ?", (filename,))
+                return None
+
+            unchanged = previous is not None and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns
+            if unchanged and category is None and analysis_type is None:
+                return dict(previous)
+
+            if category is None and analysis_type is None:
+                if previous is not None and previous['category'] is not None:
+                    category, analysis_type = previous['category'], previous['analysis_type']
+                else:
+                    category, analysis_type = self.classify(filename)
+
+            entry = {
+                'filename': filename,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'content_hash': previous['content_hash'] if unchanged else _hash_file(path),
+                'category': category,
+                'analysis_type': analysis_type,
+                'indexed_at': datetime.now().isoformat()
+            }
+            self._entries[filename] = entry
+            with closing(self._connect()) as conn, conn:
+                conn.execute(_UPSERT, entry)
+            return dict(entry)
+
+    def reconcile(self):
+        """Bring the index in line with the directory, hashing only new or changed files"""
+        with self._lock:
+            present = {
+                entry.name for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith('.json')
+            }
+            for filename in set(self._entries) - present:
+                self.refresh_file(filename)
+            for filename in present:
+                self.refresh_file(filename)
+
+    def _current_entries(self):
+        if self._observer is None:
+            self.reconcile()
+        with self._lock:
+            return {filename: dict(entry) for filename, entry in sorted(self._entries.items())}
+
+    def entries(self, category: str = None, analysis_type: str = None) -> list:
+        """
+        Get the metadata of the indexed files, optionally filtered
+
+        Returns:
+            list: Entry dicts sorted by filename
+        """
+        return [
+            entry for entry in self._current_entries().values()
+            if (category is None or entry['category'] == category)
+            and (analysis_type is None or entry['analysis_type'] == analysis_type)
+        ]
+
+    def count(self) -> int:
+        """Number of indexed files"""
+        if self._observer is None:
+            self.reconcile()
+        with self._lock:
+            return len(self._entries)
+
+    def files(self, category: str = None, analysis_type: str = None) -> AnalysisFiles:
+        """
+        Get the selected files as a lazily loading filename -> JSON mapping
+
+        Returns:
+            AnalysisFiles: Mapping in filename order
+        """
+        entries = {entry['filename']: entry for entry in self.entries(category, analysis_type)}
+        return AnalysisFiles(self, entries)
+
+    def load_payload(self, filename: str, content_hash: str):
+        """
+        Parse one analysis file, reusing the parsed payload while its content is unchanged
+
+        Raises:
+            FileNotFoundError: If the file was removed
+        """
+        with self._lock:
+            payload = self._payloads.get(content_hash)
+        if payload is not None:
+            return payload
+
+        with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+
+        with self._lock:
+            if len(self._payloads) >= self.payload_cache_size:
+                self._payloads.pop(next(iter(self._payloads)))
+            self._payloads[content_hash] = payload
+        return payload
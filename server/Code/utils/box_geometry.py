@@ -0,0 +1,109 @@
+import numpy as np
+
+# Consecutive boxes (sorted by center_y) start a new row when their centers are
+# further apart than this fraction of the page's median text height
+ROW_GAP_FACTOR = 0.5
+
+# Gap threshold in pixels when a page has no usable text height
+DEFAULT_ROW_GAP = 10.0
+
+
+def to_box_array(bboxes) -> np.ndarray:
+    """
+    Convert OCR bounding boxes to one contiguous array
+
+    Args:
+        bboxes: Sequence of quadrilaterals, each four [x, y] points (extra points are ignored)
+
+    Returns:
+        np.ndarray: float64 array of shape (N, 4, 2)
+    """
+    if len(bboxes) == 0:
+        return np.empty((0, 4, 2), dtype=np.float64)
+    try:
+        boxes = np.asarray(bboxes, dtype=np.float64)
+    except ValueError:
+        boxes = None  # Ragged input: some boxes have more than four points
+    if boxes is None or boxes.ndim != 3 or boxes.shape[1:] != (4, 2):
+        boxes = np.asarray([bbox[:4] for bbox in bboxes], dtype=np.float64)
+    return np.ascontiguousarray(boxes)
+
+
+def box_geometry(boxes: np.ndarray) -> dict:
+    """
+    Compute box centers and extents in one vectorized pass
+
+    Args:
+        boxes: Array of shape (N, 4, 2)
+
+    Returns:
+        dict: Arrays of length N: 'center_y', 'left_x', 'right_x', 'top_y', 'bottom_y' and 'height'
+    """
+    xs = boxes[:, :, 0]
+    ys = boxes[:, :, 1]
+    top_y = ys.min(axis=1)
+    bottom_y = ys.max(axis=1)
+    return {
+        'center_y': ys.mean(axis=1),
+        'left_x': xs.min(axis=1),
+        'right_x': xs.max(axis=1),
+        'top_y': top_y,
+        'bottom_y': bottom_y,
+        'height': bottom_y - top_y
+    }
+
+
+def cluster_rows(pages: np.ndarray, center_y: np.ndarray, heights: np.ndarray,
+                 gap_factor: float = ROW_GAP_FACTOR) -> np.ndarray:
+    """
+    Assign boxes to text rows
+
+    Boxes are sorted by page and center_y, and a new row starts wherever the gap
+    to the previous center exceeds gap_factor times the page's median text
+    height. Because each box is compared with its neighbour rather than with
+    the first box of the row, rows on skewed scans stay together instead of
+    splitting as the baseline drifts.
+
+    Args:
+        pages: Page index of each box
+        center_y: Vertical center of each box
+        heights: Height of each box
+        gap_factor: Gap threshold as a fraction of the median text height
+
+    Returns:
+        np.ndarray: Row number of each box (rows numbered in reading order, starting at 0)
+    """
+    count = len(center_y)
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.lexsort((center_y, pages))
+    sorted_pages = pages[order]
+    sorted_y = center_y[order]
+
+    # Median text height per page, broadcast back to every box
+    page_ids, page_index = np.unique(sorted_pages, return_inverse=True)
+    median_heights = np.array([np.median(heights[pages == page]) for page in page_ids])
+    thresholds = np.where(median_heights > 0, median_heights * gap_factor, DEFAULT_ROW_GAP)[page_index]
+
+    new_row = np.empty(count, dtype=bool)
+    new_row[0] = True
+    new_row[1:] = (np.diff(sorted_y) > thresholds[1:]) | (sorted_pages[1:] != sorted_pages[:-1])
+
+    rows = np.empty(count, dtype=np.int64)
+    rows[order] = np.cumsum(new_row) - 1
+    return rows
+
+
+def reading_order(rows: np.ndarray, left_x: np.ndarray) -> np.ndarray:
+    """
+    Get the indices that sort boxes by row, then left to right within a row
+
+    Args:
+        rows: Row number of each box (see cluster_rows)
+        left_x: Left edge of each box
+
+    Returns:
+        np.ndarray: Permutation of box indices
+    """
+    return np.lexsort((left_x, rows))
@@ -0,0 +1,197 @@
+import re
+import json
+import threading
+from utils.json_extract import extract_json
+
+# Fallback when tiktoken (or its encoding files) is unavailable: ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+# Lines of the OCR text (see FinancialDocumentParser._write_text) that start a section
+SECTION_MARKER = re.compile(r'^\s*(\[PAGE \d+\]|--- .+ ---)\s*$')
+
+JSON_BLOCK = re.compile(r'```json\s*([\s\S]*?)\s*```')
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def _get_encoding(model: str):
+    """Get the tiktoken encoding for a model, or None if it cannot be loaded"""
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding('o200k_base')
+            except Exception as e:
+                print(f"[CHUNKING] tiktoken unavailable ({e}), estimating {CHARS_PER_TOKEN} characters per token")
+                encoding = None
+            _encodings[model] = encoding
+        return _encodings[model]
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens of a text for a model
+
+    Args:
+        text: Text to count
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        int: Token count (estimated from the length if tiktoken is unavailable)
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_rows(text: str, max_tokens: int, model: str) -> list:
+    """
+    Split OCR text into chunks of whole rows that fit a token budget
+
+    The text is read as a header (title and date lines before the first
+    section marker) followed by sections that start at a '[PAGE n]' or
+    '--- NAME ---' marker. Whole sections are packed into chunks in order;
+    a section that is too large on its own is split between rows and its
+    marker is repeated at the top of each piece. The header is repeated in
+    every chunk so each one keeps the document context. A single row larger
+    than the budget becomes a chunk of its own.
+
+    Args:
+        text: OCR text, one table row per line
+        max_tokens: Token budget of each chunk
+        model: Model name used to count tokens
+
+    Returns:
+        list: Chunk texts in document order (just [text] if it already fits)
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+
+    header = []
+    sections = []
+    for line in text.splitlines():
+        if SECTION_MARKER.match(line):
+            sections.append((line.strip(), []))
+        elif not line.strip():
+            continue
+        elif sections:
+            sections[-1][1].append(line)
+        else:
+            header.append(line)
+
+    # Text without section markers is split between rows only
+    if not sections:
+        sections, header = [(None, header)], []
+
+    header_tokens = count_tokens('\n'.join(header), model) + 1 if header else 0
+    budget = max(1, max_tokens - header_tokens)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append('\n'.join(header + current))
+        current = []
+        current_tokens = 0
+
+    for marker, rows in sections:
+        if not rows:
+            continue
+        row_tokens = [count_tokens(row, model) + 1 for row in rows]
+        marker_lines = [marker] if marker else []
+        marker_tokens = count_tokens(marker, model) + 1 if marker else 0
+        section_tokens = marker_tokens + sum(row_tokens)
+
+        # Keep the section whole if it fits in the current or a fresh chunk
+        if section_tokens <= budget:
+            if current_tokens + section_tokens > budget:
+                flush()
+            current.extend([*marker_lines, *rows])
+            current_tokens += section_tokens
+            continue
+
+        # Otherwise split it between rows, repeating the marker in each piece
+        flush()
+        current = list(marker_lines)
+        current_tokens = marker_tokens
+        for row, tokens in zip(rows, row_tokens):
+            if current_tokens + tokens > budget and len(current) > len(marker_lines):
+                flush()
+                current = list(marker_lines)
+                current_tokens = marker_tokens
+            current.append(row)
+            current_tokens += tokens
+    flush()
+
+    return chunks or [text]
+
+
+def merge_json(parts: list):
+    """
+    Merge the JSON results of several chunks deterministically
+
+    Objects are merged key by key in chunk order (keys keep the order in which
+    they first appear). Lists are concatenated, dropping exact duplicates.
+    For conflicting scalars the first non-null value wins. The result depends
+    only on the order of the parts, not on which chunk finished first.
+
+    Args:
+        parts: Parsed JSON values in chunk order (None entries are skipped)
+
+    Returns:
+        The merged value (None if every part is None)
+    """
+    merged = None
+    for part in parts:
+        if part is None:
+            continue
+        merged = part if merged is None else _merge_values(merged, part)
+    return merged
+
+
+def _merge_values(first, second):
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = _merge_values(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(first, list) and isinstance(second, list):
+        merged = list(first)
+        seen = {json.dumps(item, sort_keys=True, ensure_ascii=False) for item in first}
+        for item in second:
+            key = json.dumps(item, sort_keys=True, ensure_ascii=False)
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+        return merged
+    return first if first is not None else second
+
+
+def merge_chunk_responses(contents: list) -> str:
+    """
+    Combine per-chunk analyses into one response
+
+    The prose of each chunk is kept in order with its JSON block removed, and a
+    single ```json block holding the merged JSON of all chunks is appended, so
+    the result reads like the response to the whole document.
+
+    Args:
+        contents: Response texts in chunk order
+
+    Returns:
+        str: Combined response (the responses joined unchanged if none has a valid JSON block)
+    """
+    merged = merge_json([extract_json(content) for content in contents])
+    if merged is None:
+        return '\n\n'.join(content.strip() for content in contents)
+    prose = [JSON_BLOCK.sub('', content).strip() for content in contents]
+    combined = '\n\n'.join(part for part in prose if part)
+    return f"{combined}\n\n```json\n{json.dumps(merged, indent=2, ensure_ascii=False)}\n```"
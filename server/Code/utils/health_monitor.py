@@ -0,0 +1,236 @@
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_INTERVAL_SECONDS = 30.0
+DEFAULT_RETRY_SECONDS = 5.0
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_OPEN_SECONDS = 60.0
+UNKNOWN = 'unknown'
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over the outcomes of an upstream's health probes
+
+    The circuit is 'closed' (upstream available) until failure_threshold
+    consecutive failures open it. An open circuit reports the upstream as
+    unavailable; after open_seconds it becomes 'half_open', and the next
+    outcome either closes it again or re-opens it for another open_seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, open_seconds: float = DEFAULT_OPEN_SECONDS):
+        """
+        Initialize the breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            open_seconds: Seconds the circuit stays open before a trial probe
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._state = self.CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit turns half-open once open_seconds have passed"""
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        """Whether requests should be sent upstream (only while the circuit is closed)"""
+        return self._state == self.CLOSED
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"[HEALTH] Circuit closed after {self.consecutive_failures} failure(s)")
+            self._state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.last_error = None
+
+    def record_failure(self, error: str = None) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self._state == self.CLOSED and self.consecutive_failures < self.failure_threshold:
+                return
+            if self._state == self.CLOSED:
+                print(f"[HEALTH] Circuit opened after {self.consecutive_failures} consecutive failures: {error}")
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def seconds_until_trial(self) -> float:
+        """Seconds until an open circuit turns half-open (0 if it is not open)"""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+
+class HealthMonitor:
+    """
+    Probes upstream services in a background thread and caches their state
+
+    Each registered upstream is probed every interval_seconds (every
+    retry_seconds after a failure, so outages are detected quickly), and the
+    outcomes drive a CircuitBreaker per upstream. Request handlers read the
+    cached state with is_available instead of making a round trip. While a
+    circuit is open the upstream is not probed until open_seconds have passed.
+    """
+
+    def __init__(self, interval_seconds: float = DEFAULT_INTERVAL_SECONDS, retry_seconds: float = DEFAULT_RETRY_SECONDS,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, open_seconds: float = DEFAULT_OPEN_SECONDS):
+        """
+        Initialize the monitor
+
+        Args:
+            interval_seconds: Seconds between probes of a healthy upstream
+            retry_seconds: Seconds between probes after a failure, until the circuit opens
+            failure_threshold: Consecutive failed probes that open an upstream's circuit
+            open_seconds: Seconds an open circuit waits before the next (trial) probe
+        """
+        self.interval_seconds = interval_seconds
+        self.retry_seconds = min(retry_seconds, interval_seconds)
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._upstreams = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, probe) -> None:
+        """
+        Register an upstream to monitor
+
+        Args:
+            name: Upstream name used in lookups and stats
+            probe: Callable checking the upstream; raising an exception or returning False is a failure
+        """
+        with self._lock:
+            self._upstreams[name] = {
+                'probe': probe,
+                'breaker': CircuitBreaker(self.failure_threshold, self.open_seconds),
+                'next_probe_at': 0.0,
+                'last_checked': None,
+                'last_success': None,
+                'last_duration_seconds': None,
+                'probes': 0
+            }
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background probing thread (the first probes run immediately)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background probing thread"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_available(self, name: str) -> bool:
+        """
+        Cached availability of an upstream, without contacting it
+
+        An upstream is available until its circuit opens, so requests are not
+        rejected before the first probe has finished (see get_availability for
+        reporting).
+        """
+        return self._upstreams[name]['breaker'].available
+
+    def get_availability(self, name: str):
+        """
+        Cached availability of an upstream for reporting
+
+        Returns:
+            UNKNOWN ('unknown') until the first probe has finished, then
+            whether the upstream is available (as is_available)
+        """
+        upstream = self._upstreams[name]
+        if upstream['probes'] == 0:
+            return UNKNOWN
+        return upstream['breaker'].available
+
+    def check_now(self, name: str) -> bool:
+        """Probe an upstream immediately (in the calling thread) and return its availability"""
+        self._probe(self._upstreams[name])
+        return self.is_available(name)
+
+    def _probe(self, upstream) -> None:
+        breaker = upstream['breaker']
+        start_time = time.monotonic()
+        try:
+            healthy = upstream['probe']() is not False
+            error = None if healthy else 'probe reported the upstream as unavailable'
+        except Exception as e:
+            healthy = False
+            error = str(e)
+        upstream['last_duration_seconds'] = round(time.monotonic() - start_time, 3)
+        upstream['last_checked'] = datetime.now().isoformat()
+        upstream['probes'] += 1
+
+        if healthy:
+            breaker.record_success()
+            upstream['last_success'] = upstream['last_checked']
+            delay = self.interval_seconds
+        else:
+            breaker.record_failure(error)
+            delay = breaker.seconds_until_trial() if breaker.state == CircuitBreaker.OPEN else self.retry_seconds
+        upstream['next_probe_at'] = time.monotonic() + delay
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                upstreams = list(self._upstreams.values())
+            now = time.monotonic()
+            for upstream in upstreams:
+                if upstream['next_probe_at'] <= now and not self._stop.is_set():
+                    self._probe(upstream)
+
+            next_probe_at = min((upstream['next_probe_at'] for upstream in upstreams), default=None)
+            timeout = None if next_probe_at is None else max(0.0, next_probe_at - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def get_status(self, name: str) -> dict:
+        """Cached state of one upstream"""
+        upstream = self._upstreams[name]
+        breaker = upstream['breaker']
+        return {
+            'available': self.get_availability(name),
+            'circuit': breaker.state,
+            'consecutive_failures': breaker.consecutive_failures,
+            'last_error': breaker.last_error,
+            'last_checked': upstream['last_checked'],
+            'last_success': upstream['last_success'],
+            'last_duration_seconds': upstream['last_duration_seconds'],
+            'probes': upstream['probes']
+        }
+
+    def get_stats(self) -> dict:
+        """Cached state of every upstream, plus the probing settings"""
+        with self._lock:
+            names = list(self._upstreams)
+        return {
+            'interval_seconds': self.interval_seconds,
+            'failure_threshold': self.failure_threshold,
+            'open_seconds': self.open_seconds,
+            'upstreams': {name: self.get_status(name) for name in names}
+        }
@@ -0,0 +1,39 @@
+PDF_MAGIC = b'%PDF-'
+
+
+def is_pdf(data: bytes) -> bool:
+    """Whether in-memory document bytes are a PDF (by their header, as uploads may carry no file name)"""
+    return data[:1024].lstrip().startswith(PDF_MAGIC)
+
+
+def decode_image(data: bytes):
+    """
+    Decode an encoded image (PNG, JPEG, TIFF, ...) held in memory
+
+    Args:
+        data: Encoded image bytes, e.g. an upload read from the request
+
+    Returns:
+        numpy.ndarray: BGR image, the layout PaddleOCR reads from files
+
+    Raises:
+        ValueError: If the bytes are not an image OpenCV can decode
+    """
+    import cv2
+    import numpy as np
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Unsupported or corrupt image data")
+    return image
+
+
+def image_key_bytes(image) -> bytes:
+    """
+    Bytes identifying an in-memory image, for cache keys and document IDs
+
+    Encoded bytes are used as they are, so an upload gets the same key as the
+    same file read from disk; a decoded array contributes its shape too.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    return f"{image.shape}:{image.dtype}".encode() + image.tobytes()
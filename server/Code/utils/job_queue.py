@@ -0,0 +1,156 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobQueue:
+    """
+    Bounded background job queue backed by a thread pool.
+
+    Jobs are tracked in memory with their status ('queued', 'processing',
+    'completed', 'failed'), timestamps and result so that HTTP handlers can
+    return a job ID immediately and let clients poll for the outcome.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20, max_retained: int = 200):
+        """
+        Initialize the job queue
+
+        Args:
+            max_workers: Number of worker threads running jobs concurrently
+            max_pending: Maximum number of queued (not yet started) jobs before submissions are rejected
+            max_retained: Maximum number of finished jobs kept in memory for status lookups
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, metadata=None, **kwargs) -> str:
+        """
+        Submit a callable to run in the background
+
+        The callable should return a dict; a falsy 'success' key marks the job as failed.
+
+        Args:
+            func: Callable to execute
+            *args: Positional arguments for the callable
+            metadata: Optional dict stored alongside the job and returned in status lookups
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            str: The job ID
+
+        Raises:
+            QueueFullError: If max_pending jobs are already waiting
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job['status'] == 'queued')
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({pending} jobs pending)")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'metadata': metadata or {},
+                'result': None,
+                'error': None
+            }
+            self._evict_finished()
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        """Execute a job and record its outcome"""
+        self._update(job_id, status='processing', started_at=datetime.now().isoformat())
+
+        try:
+            result = func(*args, **kwargs)
+            succeeded = not isinstance(result, dict) or result.get('success', True)
+            self._update(
+                job_id,
+                status='completed' if succeeded else 'failed',
+                result=result,
+                error=None if succeeded else result.get('error'),
+                finished_at=datetime.now().isoformat()
+            )
+        except Exception as e:
+            print(f"[JOBS] Job {job_id} failed with error: {str(e)}")
+            self._update(job_id, status='failed', error=str(e), finished_at=datetime.now().isoformat())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs once more than max_retained are stored (caller holds the lock)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_retained)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str, include_result: bool = True):
+        """
+        Get a snapshot of a job
+
+        Args:
+            job_id: The job ID returned by submit
+            include_result: Whether to include the (potentially large) result payload
+
+        Returns:
+            dict: Copy of the job record, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+
+        if not include_result:
+            snapshot.pop('result', None)
+        return snapshot
+
+    def list_jobs(self):
+        """
+        List all tracked jobs without their result payloads
+
+        Returns:
+            list: Job records ordered by submission time
+        """
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        for job in jobs:
+            job.pop('result', None)
+        return jobs
+
+    def get_stats(self):
+        """
+        Get queue depth and job counts by status
+
+        Returns:
+            dict: Queue statistics
+        """
+        with self._lock:
+            counts = {'queued': 0, 'processing': 0, 'completed': 0, 'failed': 0}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'jobs': counts
+        }
@@ -0,0 +1,366 @@
+import re
+import json
+
+# Inside an object: a whole (single-line) quoted string or a brace; everything else is skipped at C speed
+_OBJECT_TOKEN = re.compile(r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"|\'[^\'\\\n]*(?:\\.[^\'\\\n]*)*\'|[{}]')
+_DOUBLE_QUOTED_END = re.compile(r'["\\]')
+_SINGLE_QUOTED_END = re.compile(r"['\\]")
+_FENCE_LANGUAGE = re.compile(r'[ \t]*(?:json)?[ \t]*\n?', re.IGNORECASE)
+
+# Common defects fixed without a full parse: trailing commas and thousand separators in
+# object values; strings are matched first so that their contents are never changed
+_QUICK_FIX = re.compile(
+    r'("[^"\\\n]*(?:\\.[^"\\\n]*)*")'
+    r'|,(\s*[}\]])'
+    r'|(?<=:)(\s*-?\d{1,3}(?:,\d{3})+(?:\.\d+)?)(?=\s*[,}\n])'
+)
+
+_WHITESPACE = re.compile(r'\s*')
+_BARE_KEY = re.compile(r'[^:\s{}\[\],"\']+')
+_BARE_VALUE = re.compile(r'[^,}\]\n]*')
+_GROUPED_NUMBER = re.compile(r'\(?[-+]?\d{1,3}(?:,\d{3})+(?:\.\d+)?\)?(?=\s*(?:[,}\]\n]|$))')
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_NUMERIC_STRING = re.compile(r'(\()?([-+]?\d+(?:\.\d+)?)(\))?')
+_SEPARATORS = str.maketrans('', '', ', \u00a0')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '/': '/', '\\': '\\', '"': '"', "'": "'"}
+_LITERALS = {'true': True, 'false': False, 'null': None, 'none': None, 'nan': None}
+
+# Keys whose string values are converted to numbers by normalize_numbers,
+# and keys whose (mapping or list) values hold only numbers
+NUMERIC_KEYS = ('value',)
+NUMERIC_CONTAINERS = ('values',)
+
+
+def find_json_objects(text: str) -> list:
+    """
+    Find the top-level {...} spans of a text in a single pass
+
+    Braces inside quoted strings are ignored, so the spans are balanced even
+    when values contain '{' or '}'. Strings are only recognised inside an
+    object, so quotes and apostrophes in the surrounding prose do not matter.
+    An object that is still open at the end of the text (a truncated
+    response) is returned up to the end.
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        list: (start, end) offsets of each span, in order
+    """
+    spans = []
+    start = text.find('{')
+    while start != -1:
+        depth = 0
+        end = len(text)
+        for match in _OBJECT_TOKEN.finditer(text, start):
+            char = match.group()
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    end = match.end()
+                    break
+        spans.append((start, end))
+        start = text.find('{', end)
+    return spans
+
+
+class _TolerantParser:
+    """
+    Recursive-descent JSON parser that accepts what LLMs commonly emit instead of JSON
+
+    Accepts single-quoted strings, unquoted keys and values, trailing or
+    doubled commas, // and /* */ comments, Python literals (True, None),
+    numbers with thousand separators in object values (1,234,567) and input
+    that stops in the middle of a structure, which is closed at that point.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def parse(self):
+        return self._value(in_object=False)
+
+    def _skip(self):
+        text = self.text
+        while True:
+            self.pos = _WHITESPACE.match(text, self.pos).end()
+            if text.startswith('//', self.pos):
+                newline = text.find('\n', self.pos)
+                self.pos = len(text) if newline == -1 else newline + 1
+            elif text.startswith('/*', self.pos):
+                close = text.find('*/', self.pos + 2)
+                self.pos = len(text) if close == -1 else close + 2
+            else:
+                return
+
+    def _value(self, in_object):
+        self._skip()
+        if self.pos >= len(self.text):
+            return None
+        char = self.text[self.pos]
+        if char == '{':
+            return self._object()
+        if char == '[':
+            return self._array()
+        if char in '"\'':
+            return self._string()
+        return self._literal(in_object)
+
+    def _object(self):
+        self.pos += 1
+        result = {}
+        while True:
+            self._skip()
+            if self.pos >= len(self.text):
+                return result
+            char = self.text[self.pos]
+            if char == '}':
+                self.pos += 1
+                return result
+            if char == ',':
+                self.pos += 1
+                continue
+
+            if char in '"\'':
+                key = self._string()
+            else:
+                match = _BARE_KEY.match(self.text, self.pos)
+                if match is None:
+                    raise ValueError(f"Unexpected {char!r} at offset {self.pos}")
+                key = match.group()
+                self.pos = match.end()
+
+            self._skip()
+            if self.pos >= len(self.text):
+                return result
+            if self.text[self.pos] != ':':
+                raise ValueError(f"Expected ':' after key {key!r} at offset {self.pos}")
+            self.pos += 1
+            result[key] = self._value(in_object=True)
+
+    def _array(self):
+        self.pos += 1
+        result = []
+        while True:
+            self._skip()
+            if self.pos >= len(self.text):
+                return result
+            char = self.text[self.pos]
+            if char == ']':
+                self.pos += 1
+                return result
+            if char == ',':
+                self.pos += 1
+                continue
+            if char == '}':
+                raise ValueError(f"Unexpected '}}' in array at offset {self.pos}")
+            result.append(self._value(in_object=False))
+
+    def _string(self):
+        text = self.text
+        quote = text[self.pos]
+        string_end = _DOUBLE_QUOTED_END if quote == '"' else _SINGLE_QUOTED_END
+        self.pos += 1
+        parts = []
+        while True:
+            match = string_end.search(text, self.pos)
+            if match is None:
+                parts.append(text[self.pos:])
+                self.pos = len(text)
+                return ''.join(parts)
+            parts.append(text[self.pos:match.start()])
+            self.pos = match.end()
+            if match.group() != '\\':
+                return ''.join(parts)
+
+            escape = text[self.pos:self.pos + 1]
+            if escape == 'u' and len(text) >= self.pos + 5:
+                try:
+                    parts.append(chr(int(text[self.pos + 1:self.pos + 5], 16)))
+                    self.pos += 5
+                    continue
+                except ValueError:
+                    pass
+            parts.append(_ESCAPES.get(escape, escape))
+            self.pos += 1
+
+    def _literal(self, in_object):
+        text = self.text
+        if in_object:
+            match = _GROUPED_NUMBER.match(text, self.pos)
+            if match is not None:
+                self.pos = match.end()
+                return _to_number(match.group().translate(_SEPARATORS))
+
+        match = _BARE_VALUE.match(text, self.pos)
+        self.pos = match.end()
+        token = match.group().strip()
+        if not token:
+            return None  # Missing value, e.g. "key": ,
+
+        lowered = token.lower()
+        if lowered in _LITERALS:
+            return _LITERALS[lowered]
+        if _NUMBER.fullmatch(token):
+            return float(token) if any(c in token for c in '.eE') else int(token)
+        return token
+
+
+def _to_number(text):
+    """Convert '1234', '-1234.5' or '(1234)' (accounting negative) to a number, or None"""
+    match = _NUMERIC_STRING.fullmatch(text)
+    if match is None or bool(match.group(1)) != bool(match.group(3)):
+        return None
+    digits = match.group(2)
+    number = float(digits) if '.' in digits else int(digits)
+    return -number if match.group(1) else number
+
+
+def repair_json(text: str):
+    """
+    Parse JSON-like text with the tolerant parser
+
+    Returns:
+        The parsed value
+
+    Raises:
+        ValueError: If the text cannot be read even tolerantly
+    """
+    return _TolerantParser(text).parse()
+
+
+def _quick_fix(match):
+    string, closing, number = match.groups()
+    if string is not None:
+        return string
+    if closing is not None:
+        return closing
+    return number.replace(',', '')
+
+
+def _parse_strict(text):
+    """json.loads, then json.loads after the quick regex fixes; None if neither yields an object"""
+    for attempt in (text, None):
+        if attempt is None:
+            attempt = _QUICK_FIX.sub(_quick_fix, text)
+        try:
+            data = json.loads(attempt)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def _fenced_blocks(text: str) -> list:
+    """(start, end) offsets of the contents of each ``` code block"""
+    blocks = []
+    fence = text.find('```')
+    while fence != -1:
+        start = _FENCE_LANGUAGE.match(text, fence + 3).end()
+        close = text.find('```', start)
+        if close == -1:
+            break
+        blocks.append((start, close))
+        fence = text.find('```', close + 3)
+    return blocks
+
+
+def _candidates(text: str) -> list:
+    """Object spans to try, largest first; fenced blocks are scanned on their own too"""
+    spans = set(find_json_objects(text))
+    for block_start, block_end in _fenced_blocks(text):
+        block = text[block_start:block_end]
+        spans.update((block_start + start, block_start + end) for start, end in find_json_objects(block))
+    return sorted(spans, key=lambda span: (span[0] - span[1], span[0]))
+
+
+def extract_json(text: str):
+    """
+    Extract the largest valid JSON object from an LLM response
+
+    A ```json block that is valid JSON as a whole is returned directly (the
+    usual case, parsed at C speed). Otherwise every top-level object is
+    located in one pass (see find_json_objects) and the candidates are tried
+    largest first: as-is, after quick fixes of trailing commas and thousand
+    separators, and finally with the tolerant parser (see repair_json).
+
+    Args:
+        text: Response text, e.g. prose with a ```json block
+
+    Returns:
+        dict: The extracted object, or None if the text holds no usable object
+    """
+    if not text:
+        return None
+
+    fenced = []
+    for start, end in _fenced_blocks(text):
+        content = text[start:end].strip()
+        if content.startswith('{'):
+            try:
+                data = json.loads(content)
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                fenced.append((len(content), data))
+    if fenced:
+        return max(fenced, key=lambda item: item[0])[1]
+
+    candidates = _candidates(text)
+    for start, end in candidates:
+        data = _parse_strict(text[start:end])
+        if data is not None:
+            return data
+
+    for start, end in candidates:
+        try:
+            data = repair_json(text[start:end])
+        except (ValueError, RecursionError):
+            continue
+        if isinstance(data, dict) and data:
+            return data
+    return None
+
+
+def normalize_numbers(data, numeric_keys=NUMERIC_KEYS, numeric_containers=NUMERIC_CONTAINERS):
+    """
+    Convert number-like strings ("1,234", "1 234.5", "(1,234)") to numbers, in place
+
+    Strings under numeric_keys, or directly inside a mapping or list stored
+    under numeric_containers, are collected in one iterative walk and then
+    converted together. Strings that are not numbers are left unchanged.
+
+    Args:
+        data: Parsed JSON (dict or list)
+        numeric_keys: Keys whose string values are numbers
+        numeric_containers: Keys whose mapping or list values hold numbers
+
+    Returns:
+        The same data, for chaining
+    """
+    slots = []
+    stack = [(data, False)]
+    while stack:
+        node, numeric = stack.pop()
+        if isinstance(node, dict):
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            continue
+        for key, value in items:
+            if isinstance(value, str):
+                if numeric or key in numeric_keys:
+                    slots.append((node, key, value))
+            elif isinstance(value, (dict, list)):
+                stack.append((value, key in numeric_containers))
+
+    cleaned = [_to_number(value.translate(_SEPARATORS)) for _, _, value in slots]
+    for (node, key, _), number in zip(slots, cleaned):
+        if number is not None:
+            node[key] = number
+    return data
@@ -0,0 +1,225 @@
+import math
+import threading
+import time
+from collections import defaultdict
+
+# Relative accuracy of percentile estimates (1% => reported p99 is within 1% of the true value)
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_VALUE = 1e-4  # Durations below 0.1 ms share one bucket
+
+# Rolling windows: name -> (window length in seconds, slice length in seconds)
+WINDOWS = {
+    '1m': (60, 5),
+    '1h': (3600, 60),
+    '24h': (86400, 900)
+}
+
+PERCENTILES = {'p50': 0.50, 'p90': 0.90, 'p99': 0.99}
+
+
+def bucket_index(value: float) -> int:
+    """
+    Map a duration to its logarithmic bucket
+
+    Args:
+        value: Duration in seconds
+
+    Returns:
+        int: Bucket index shared by all histograms (and the persisted bucket table)
+    """
+    return math.ceil(math.log(max(value, _MIN_VALUE)) / _LOG_GAMMA)
+
+
+def bucket_value(index: int) -> float:
+    """Representative duration of a bucket (within RELATIVE_ACCURACY of every value in it)"""
+    return 2 * _GAMMA ** index / (_GAMMA + 1)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with bounded relative error.
+
+    Memory depends only on the range of durations seen, not on how many were
+    recorded, and histograms merge by adding bucket counts.
+    """
+
+    def __init__(self):
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Record a duration (optionally several times)"""
+        self.buckets[bucket_index(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def add_bucket(self, index: int, count: int) -> None:
+        """Add counts directly to a bucket (used when loading persisted histograms, so min/max are approximate)"""
+        self.buckets[index] += count
+        self.count += count
+        value = bucket_value(index)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """Add another histogram's counts into this one"""
+        for index, count in other.buckets.items():
+            self.buckets[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, q: float):
+        """
+        Estimate a percentile
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            float: Estimated duration in seconds, or None if the histogram is empty
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = bucket_value(index)
+                if self.min is not None:
+                    value = min(max(value, self.min), self.max)
+                return round(value, 4)
+        return round(self.max, 4) if self.max is not None else None
+
+    def summary(self) -> dict:
+        """Count, mean, max and percentiles of the recorded durations"""
+        summary = {
+            'count': self.count,
+            'avg_time': round(self.total / self.count, 4) if self.count else None,
+            'max_time': round(self.max, 4) if self.max is not None else None
+        }
+        for name, q in PERCENTILES.items():
+            summary[name] = self.percentile(q)
+        return summary
+
+
+class _WindowSlice:
+    __slots__ = ('start', 'histogram', 'successful', 'failed')
+
+    def __init__(self, start):
+        self.start = start
+        self.histogram = LatencyHistogram()
+        self.successful = 0
+        self.failed = 0
+
+
+class RollingLatencyStats:
+    """
+    Per-endpoint latency aggregates updated as timings are recorded.
+
+    Each endpoint keeps an all-time histogram plus, for every window in WINDOWS,
+    a fixed ring of time slices. Queries merge a constant number of slices, so
+    they cost the same no matter how much history has been recorded.
+    """
+
+    def __init__(self):
+        self._all_time = defaultdict(LatencyHistogram)
+        self._windows = defaultdict(lambda: {
+            name: [None] * (length // slice_length) for name, (length, slice_length) in WINDOWS.items()
+        })
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, duration: float, success: bool, timestamp: float = None, all_time: bool = True) -> None:
+        """
+        Record one request
+
+        Args:
+            endpoint: Endpoint name
+            duration: Duration in seconds
+            success: Whether the request succeeded
+            timestamp: Epoch seconds of the request (defaults to now)
+            all_time: Whether to add the request to the all-time histogram (False when replaying
+                      history whose all-time counts were loaded with load_all_time)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            histogram = self._all_time[endpoint]
+            if all_time:
+                histogram.add(duration)
+            for name, (length, slice_length) in WINDOWS.items():
+                ring = self._windows[endpoint][name]
+                start = int(timestamp // slice_length) * slice_length
+                slot = (start // slice_length) % len(ring)
+                window_slice = ring[slot]
+                if window_slice is None or window_slice.start != start:
+                    if window_slice is not None and window_slice.start > start:
+                        continue  # Older than anything this ring still covers
+                    window_slice = ring[slot] = _WindowSlice(start)
+                window_slice.histogram.add(duration)
+                if success:
+                    window_slice.successful += 1
+                else:
+                    window_slice.failed += 1
+
+    def load_all_time(self, endpoint: str, buckets: dict) -> None:
+        """
+        Seed an endpoint's all-time histogram from persisted bucket counts
+
+        Args:
+            endpoint: Endpoint name
+            buckets: Mapping of bucket index to count
+        """
+        with self._lock:
+            histogram = self._all_time[endpoint]
+            for index, count in buckets.items():
+                histogram.add_bucket(index, count)
+
+    def get_stats(self, now: float = None) -> dict:
+        """
+        Get all-time percentiles and per-window breakdowns for every endpoint
+
+        Args:
+            now: Epoch seconds to evaluate the windows at (defaults to now)
+
+        Returns:
+            dict: Mapping of endpoint to {'percentiles': ..., 'windows': {...}}
+        """
+        if now is None:
+            now = time.time()
+
+        stats = {}
+        with self._lock:
+            for endpoint, histogram in self._all_time.items():
+                windows = {}
+                for name, (length, slice_length) in WINDOWS.items():
+                    merged = LatencyHistogram()
+                    successful = failed = 0
+                    for window_slice in self._windows[endpoint][name]:
+                        if window_slice is not None and window_slice.start > now - length:
+                            merged.merge(window_slice.histogram)
+                            successful += window_slice.successful
+                            failed += window_slice.failed
+                    windows[name] = {
+                        **merged.summary(),
+                        'successful_requests': successful,
+                        'failed_requests': failed
+                    }
+
+                stats[endpoint] = {
+                    'percentiles': {name: histogram.percentile(q) for name, q in PERCENTILES.items()},
+                    'windows': windows
+                }
+        return stats
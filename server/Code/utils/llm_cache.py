@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+import diskcache
+from cachetools import TTLCache
+
+_MISSING = object()
+
+
+class LLMResponseCache:
+    """
+    Two-level (memory + disk) cache for LLM completions.
+
+    Keys are a canonical SHA-256 of the model, messages and generation parameters.
+    The system prompt loaded from agent_Prompt/ is part of the messages, so editing
+    a prompt invalidates exactly the responses that were generated with it. Entries
+    expire after ttl_seconds and the disk store is size-bounded with LRU eviction.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: int = 7 * 24 * 3600,
+                 memory_max_entries: int = 256, size_limit_mb: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding the on-disk cache database
+            ttl_seconds: Time-to-live of cached responses
+            memory_max_entries: Maximum number of responses kept in memory
+            size_limit_mb: Maximum on-disk size in megabytes before LRU eviction kicks in
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.size_limit_mb = size_limit_mb
+        self._memory = TTLCache(maxsize=memory_max_entries, ttl=ttl_seconds)
+        self._disk = diskcache.Cache(
+            cache_dir,
+            size_limit=size_limit_mb * 1024 * 1024,
+            eviction_policy='least-recently-used'
+        )
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    def make_key(self, model: str, messages: list, **params) -> str:
+        """
+        Build the cache key for a completion request
+
+        Args:
+            model: Model name
+            messages: Chat messages sent to the model
+            **params: Generation parameters that affect the output (e.g., temperature, max_tokens)
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = {
+            'model': model,
+            'messages': messages,
+            'params': params
+        }
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        Look up a cached response, checking memory before disk
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            str: The cached response content, or None on a miss
+        """
+        with self._lock:
+            value = self._memory.get(key, _MISSING)
+            if value is not _MISSING:
+                self._memory_hits += 1
+                return value
+
+        value = self._disk.get(key, default=_MISSING)
+        with self._lock:
+            if value is _MISSING:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._memory[key] = value
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in memory and on disk
+
+        Args:
+            key: Cache key from make_key
+            value: Response content to cache
+        """
+        with self._lock:
+            self._memory[key] = value
+        self._disk.set(key, value, expire=self.ttl_seconds)
+
+    def clear(self) -> None:
+        """Remove all cached responses and reset the counters"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_hits = 0
+            self._disk_hits = 0
+            self._misses = 0
+        self._disk.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Get cache hit/miss counters and storage usage
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self._lock:
+            memory_hits, disk_hits, misses = self._memory_hits, self._disk_hits, self._misses
+            memory_entries = len(self._memory)
+
+        lookups = memory_hits + disk_hits + misses
+        return {
+            'memory_hits': memory_hits,
+            'disk_hits': disk_hits,
+            'misses': misses,
+            'hit_rate': round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0,
+            'memory_entries': memory_entries,
+            'disk_entries': len(self._disk),
+            'size_bytes': self._disk.volume(),
+            'size_limit_bytes': self.size_limit_mb * 1024 * 1024,
+            'ttl_seconds': self.ttl_seconds,
+            'cache_dir': self.cache_dir
+        }
@@ -0,0 +1,166 @@
+import asyncio
+import importlib.util
+import threading
+import httpx
+from utils.rate_limiter import get_rate_limiter
+
+# Connection pool defaults, shared by every agent in the process
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+_pool_settings = {
+    'max_connections': DEFAULT_MAX_CONNECTIONS,
+    'max_keepalive_connections': DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    'keepalive_expiry': DEFAULT_KEEPALIVE_EXPIRY,
+    'http2': True
+}
+_clients = {}
+_clients_lock = threading.Lock()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def configure_llm_client(max_connections: int = None, max_keepalive_connections: int = None,
+                         keepalive_expiry: float = None, http2: bool = None) -> None:
+    """
+    Set the connection pool limits of the shared client
+
+    Only affects clients created afterwards, so call it before the first agent is constructed.
+
+    Args:
+        max_connections: Maximum concurrent connections to the API
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Whether to negotiate HTTP/2 (needs the h2 package, i.e. pip install httpx[http2])
+    """
+    updates = {
+        'max_connections': max_connections,
+        'max_keepalive_connections': max_keepalive_connections,
+        'keepalive_expiry': keepalive_expiry,
+        'http2': http2
+    }
+    _pool_settings.update({key: value for key, value in updates.items() if value is not None})
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec('h2') is not None
+
+
+async def _sync_rate_limits(response: httpx.Response) -> None:
+    """httpx response hook feeding the x-ratelimit-* headers to the shared rate limiter"""
+    get_rate_limiter().update_from_headers(response.headers)
+
+
+def get_async_client(api_key: str) -> 'AsyncOpenAI':
+    """
+    Get the process-wide AsyncOpenAI client for an API key
+
+    All agents using the same key share one client and therefore one httpx
+    connection pool, so TLS handshakes happen once per connection instead of
+    once per agent and request. Every response's rate-limit headers are fed
+    to the shared rate limiter (see utils.rate_limiter). The client is only ever awaited on the
+    background event loop (see run_sync). The openai package is imported on
+    the first call, which keeps it out of the application's import time.
+
+    Args:
+        api_key: OpenAI API key
+
+    Returns:
+        AsyncOpenAI: Shared client
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            http2 = _pool_settings['http2']
+            if http2 and not _http2_available():
+                print("[LLM_CLIENT] HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+                http2 = False
+            limits = httpx.Limits(
+                max_connections=_pool_settings['max_connections'],
+                max_keepalive_connections=_pool_settings['max_keepalive_connections'],
+                keepalive_expiry=_pool_settings['keepalive_expiry']
+            )
+            http_client = httpx.AsyncClient(
+                limits=limits,
+                http2=http2,
+                timeout=httpx.Timeout(None, connect=DEFAULT_CONNECT_TIMEOUT),  # Read timeouts are set per request
+                event_hooks={'response': [_sync_rate_limits]}
+            )
+            # Retries are left to the agents so that 429s go through the shared rate limiter
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+            _clients[api_key] = client
+            print(f"[LLM_CLIENT] Created shared client (max_connections={limits.max_connections}, "
+                  f"keepalive={limits.max_keepalive_connections}, http2={http2})")
+        return client
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start the background event loop on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='llm-client-loop', daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coroutine, timeout: float = None):
+    """
+    Run a coroutine on the shared event loop and wait for its result
+
+    Lets synchronous callers (Flask handlers, worker threads) use the async
+    client. Any number of threads can wait at the same time; their requests
+    are multiplexed over the shared connection pool. Context variables such
+    as the current trace are carried over to the coroutine.
+
+    Args:
+        coroutine: Coroutine to run
+        timeout: Seconds to wait for the result (None to wait indefinitely)
+
+    Returns:
+        The coroutine's result (its exception is re-raised)
+    """
+    future = asyncio.run_coroutine_threadsafe(coroutine, _get_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iterate_sync(async_iterator):
+    """
+    Consume an async iterator from synchronous code, one item at a time
+
+    Args:
+        async_iterator: Async iterator (e.g., an async generator) to run on the shared event loop
+
+    Yields:
+        Items of the async iterator
+    """
+    try:
+        while True:
+            try:
+                item = run_sync(async_iterator.__anext__())
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        aclose = getattr(async_iterator, 'aclose', None)
+        if aclose is not None:
+            run_sync(aclose())
+
+
+def close_llm_clients() -> None:
+    """Close the shared clients and their connection pools"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    if clients and _loop is not None:
+        for client in clients:
+            run_sync(client.close())
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import threading
+import diskcache
+
+_MISSING = object()
+
+
+class OCRResultCache:
+    """
+    Persistent, content-addressed cache for raw PaddleOCR results.
+
+    Entries are keyed on a SHA-256 of the image bytes plus the OCR configuration,
+    so re-uploading the same page skips inference while a config change (language,
+    model version, angle classification) never returns stale results. The on-disk
+    store is size-bounded with least-recently-used eviction.
+    """
+
+    def __init__(self, cache_dir: str, size_limit_mb: int = 512):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding the cache database
+            size_limit_mb: Maximum on-disk size in megabytes before LRU eviction kicks in
+        """
+        self.cache_dir = cache_dir
+        self.size_limit_mb = size_limit_mb
+        self._cache = diskcache.Cache(
+            cache_dir,
+            size_limit=size_limit_mb * 1024 * 1024,
+            eviction_policy='least-recently-used'
+        )
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, config: dict) -> str:
+        """
+        Build the cache key for an image and OCR configuration
+
+        Args:
+            image_bytes: Raw bytes of the image file
+            config: OCR settings that affect the result (e.g., lang, ocr_version, cls)
+
+        Returns:
+            str: Hex digest identifying the (image, config) pair
+        """
+        digest = hashlib.sha256(image_bytes)
+        digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Look up a cached OCR result
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached OCR result, or None on a miss
+        """
+        value = self._cache.get(key, default=_MISSING)
+        with self._lock:
+            if value is _MISSING:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return value
+
+    def set(self, key: str, value) -> None:
+        """
+        Store an OCR result
+
+        Args:
+            key: Cache key from make_key
+            value: Raw OCR result to cache
+        """
+        self._cache.set(key, value)
+
+    def clear(self) -> None:
+        """Remove all cached entries and reset the counters"""
+        self._cache.clear()
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+    def get_stats(self) -> dict:
+        """
+        Get cache hit/miss counters and storage usage
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self._lock:
+            hits, misses = self._hits, self._misses
+
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self._cache),
+            'size_bytes': self._cache.volume(),
+            'size_limit_bytes': self.size_limit_mb * 1024 * 1024,
+            'cache_dir': self.cache_dir
+        }
@@ -0,0 +1,358 @@
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+WORKER_CHECK_SECONDS = 1.0
+DEFAULT_MAX_START_FAILURES = 3
+
+
+def _ocr_worker_main(worker_idx, engine_kwargs, cpu_ids, task_queue, result_queue):
+    """
+    Entry point of an OCR worker process
+
+    Pins the process to its share of CPUs, builds one PaddleOCR engine, runs a
+    warmup inference, then serves the tasks the pool assigns to it on its own
+    queue until it receives None. If the engine cannot be built, the worker
+    reports 'failed' and exits.
+    """
+    cpu_threads = engine_kwargs.get('cpu_threads', 1)
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(cpu_threads)
+    if cpu_ids and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cpu_ids)
+        except OSError as e:
+            print(f"[OCR POOL] Worker {worker_idx} could not set CPU affinity: {e}")
+
+    try:
+        import numpy as np
+        from paddleocr import PaddleOCR
+        from utils.image_io import decode_image
+        ocr = PaddleOCR(**engine_kwargs)
+    except Exception as e:
+        result_queue.put(('failed', worker_idx, None, f"{type(e).__name__}: {e}"))
+        return
+    try:
+        ocr.ocr(np.full((64, 256, 3), 255, dtype=np.uint8), cls=False)
+    except Exception as e:
+        print(f"[OCR POOL] Worker {worker_idx} warmup failed: {e}")
+    result_queue.put(('ready', worker_idx, None, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, image, cls = task
+        try:
+            if isinstance(image, bytes):
+                image = decode_image(image)
+            result_queue.put(('done', worker_idx, task_id, ocr.ocr(image, cls=cls)))
+        except Exception as e:
+            result_queue.put(('error', worker_idx, task_id, str(e)))
+
+
+class OCREnginePool:
+    """
+    Pool of pre-warmed PaddleOCR engines, each in its own worker process.
+
+    The pool keeps the waiting tasks and hands each one to an idle engine
+    through that worker's own queue, so it always knows which task a worker
+    is running: when a worker dies, exactly that task fails and a replacement
+    is started. Each worker is pinned to an equal share of the machine's CPUs
+    and limits its math-library threads to that share. The pool exposes the
+    same ocr(img, cls=...) call as PaddleOCR, so it can be handed to
+    FinancialDocumentParser in place of a local engine.
+    """
+
+    def __init__(self, size: int, engine_kwargs: dict, cpu_threads: int = None,
+                 max_start_failures: int = DEFAULT_MAX_START_FAILURES):
+        """
+        Initialize the pool (workers are started by start())
+
+        Args:
+            size: Number of worker processes / OCR engines
+            engine_kwargs: Keyword arguments for the PaddleOCR constructor
+            cpu_threads: CPU threads per engine. If None, the available CPUs are split evenly.
+            max_start_failures: Consecutive workers that may fail to start (exit before warming up)
+                                before the pool gives up and fails every pending task
+        """
+        if hasattr(os, 'sched_getaffinity'):
+            available_cpus = sorted(os.sched_getaffinity(0))
+        else:
+            available_cpus = list(range(os.cpu_count() or 1))
+
+        self.size = size
+        self.cpu_threads = cpu_threads or max(1, len(available_cpus) // size)
+        self.engine_kwargs = {**engine_kwargs, 'cpu_threads': self.cpu_threads}
+        self.max_start_failures = max(1, max_start_failures)
+        self._cpu_sets = [
+            available_cpus[i * self.cpu_threads:(i + 1) * self.cpu_threads] or available_cpus
+            for i in range(size)
+        ]
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._result_queue = self._ctx.Queue()
+        self._workers = {}
+        self._task_queues = {}
+        self._pending = deque()
+        self._futures = {}
+        self._in_flight = {}
+        self._ready = set()
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        # Held while starting, so concurrent start() calls (warmup, first requests) start the workers once
+        self._start_lock = threading.Lock()
+        self._ready_event = threading.Event()
+        self._start_failures = 0
+        self._last_start_error = None
+        self._start_error = None
+        self._completed = 0
+        self._failed = 0
+        self._running = False
+        self._dispatcher = None
+
+    def start(self, wait_ready: bool = False, timeout: float = None):
+        """
+        Start the worker processes and the result dispatcher thread
+
+        Args:
+            wait_ready: Whether to block until every engine has finished warming up
+            timeout: Maximum seconds to wait when wait_ready is set
+
+        Raises:
+            RuntimeError: If wait_ready is set and the workers could not be started
+            TimeoutError: If wait_ready is set and the engines are not ready within timeout
+        """
+        if not self._running and self._start_error is None:
+            with self._start_lock:
+                if not self._running and self._start_error is None:
+                    self._running = True
+                    for worker_idx in range(self.size):
+                        self._start_worker(worker_idx)
+                    self._dispatcher = threading.Thread(target=self._dispatch_results, name='ocr-pool-dispatcher', daemon=True)
+                    self._dispatcher.start()
+                    atexit.register(self.shutdown)
+                    print(f"[OCR POOL] Started {self.size} OCR workers with {self.cpu_threads} CPU threads each")
+
+        if wait_ready:
+            if not self._ready_event.wait(timeout):
+                raise TimeoutError(f"OCR workers not ready after {timeout} seconds")
+            if self._start_error is not None:
+                raise RuntimeError(self._start_error)
+        return self
+
+    def _start_worker(self, worker_idx):
+        # A fresh queue per process, so a replacement never receives tasks meant for its predecessor
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_ocr_worker_main,
+            args=(worker_idx, self.engine_kwargs, self._cpu_sets[worker_idx], task_queue, self._result_queue),
+            name=f"ocr-worker-{worker_idx}",
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_idx] = process
+        self._task_queues[worker_idx] = task_queue
+
+    def _assign_tasks(self):
+        """Hand waiting tasks to idle ready workers (called with the lock held)"""
+        for worker_idx in sorted(self._ready):
+            if not self._pending:
+                return
+            if worker_idx in self._in_flight:
+                continue
+            while self._pending:
+                task_id, image, cls = self._pending.popleft()
+                future = self._futures.get(task_id)
+                # Tasks whose caller gave up (see ocr) are dropped; the others can no longer be cancelled
+                if future is None or not future.set_running_or_notify_cancel():
+                    self._futures.pop(task_id, None)
+                    continue
+                self._in_flight[worker_idx] = task_id
+                self._task_queues[worker_idx].put((task_id, image, cls))
+                break
+
+    def _dispatch_results(self):
+        """Resolve futures from worker messages and restart workers that died"""
+        while self._running:
+            messages = []
+            try:
+                messages.append(self._result_queue.get(timeout=WORKER_CHECK_SECONDS))
+                # Handle everything already reported before looking for dead workers
+                while True:
+                    messages.append(self._result_queue.get_nowait())
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                break
+
+            for message in messages:
+                self._handle_message(*message)
+            self._check_workers()
+
+    def _handle_message(self, kind, worker_idx, task_id, payload):
+        future = None
+        with self._lock:
+            if kind == 'ready':
+                self._ready.add(worker_idx)
+                self._start_failures = 0
+                if len(self._ready) == self.size:
+                    self._ready_event.set()
+            elif kind == 'failed':
+                # The process exits right after; _check_workers counts it as a failed start
+                print(f"[OCR POOL] Worker {worker_idx} could not load its engine: {payload}")
+                self._last_start_error = payload
+            elif self._in_flight.get(worker_idx) == task_id:
+                del self._in_flight[worker_idx]
+                future = self._futures.pop(task_id, None)
+                if kind == 'done':
+                    self._completed += 1
+                else:
+                    self._failed += 1
+            self._assign_tasks()
+
+        if future is not None:
+            if kind == 'done':
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"OCR worker {worker_idx} failed: {payload}"))
+
+    def _check_workers(self):
+        """
+        Fail the task of any crashed worker and start a replacement
+
+        A worker that exits before it is ready counts as a failed start; after
+        max_start_failures in a row the pool stops restarting workers and fails
+        every pending task, since the engine evidently cannot be built.
+        """
+        for worker_idx, process in list(self._workers.items()):
+            if process.is_alive() or not self._running:
+                continue
+            failed = []
+            with self._lock:
+                started = worker_idx in self._ready
+                self._ready.discard(worker_idx)
+                task_id = self._in_flight.pop(worker_idx, None)
+                if task_id is not None and task_id in self._futures:
+                    failed.append(self._futures.pop(task_id))
+                if not started:
+                    self._start_failures += 1
+                gave_up = self._start_failures >= self.max_start_failures
+                if gave_up:
+                    self._start_error = f"OCR workers failed to start {self._start_failures} times in a row"
+                    if self._last_start_error:
+                        self._start_error += f" (last error: {self._last_start_error})"
+                    failed.extend(self._futures.values())
+                    self._futures.clear()
+                    self._pending.clear()
+                    self._running = False
+                self._failed += len(failed)
+
+            error = self._start_error if gave_up else f"OCR worker {worker_idx} crashed"
+            for future in failed:
+                self._fail(future, RuntimeError(error))
+            if gave_up:
+                print(f"[OCR POOL] {self._start_error}, giving up")
+                self._ready_event.set()
+                return
+            print(f"[OCR POOL] Worker {worker_idx} exited with code {process.exitcode}, restarting")
+            self._start_worker(worker_idx)
+
+    @staticmethod
+    def _fail(future, error):
+        """Fail a future unless its caller has already withdrawn it"""
+        if future.running() or future.set_running_or_notify_cancel():
+            future.set_exception(error)
+
+    def submit(self, image, cls: bool = False) -> Future:
+        """
+        Queue an OCR task
+
+        Args:
+            image: Image path, encoded image bytes (decoded in the worker) or image array
+            cls: Whether to run angle classification
+
+        Returns:
+            Future: Resolves to the raw PaddleOCR result
+
+        Raises:
+            RuntimeError: If the workers could not be started
+        """
+        if self._start_error is not None:
+            raise RuntimeError(self._start_error)
+        if not self._running:
+            self.start()
+        future = Future()
+        with self._lock:
+            task_id = next(self._task_ids)
+            self._futures[task_id] = future
+            self._pending.append((task_id, image, cls))
+            self._assign_tasks()
+        return future
+
+    def ocr(self, image, cls: bool = False, timeout: float = None):
+        """
+        Run OCR on an idle engine and wait for the result (PaddleOCR-compatible)
+
+        Args:
+            image: Image path, encoded image bytes (decoded in the worker) or image array
+            cls: Whether to run angle classification
+            timeout: Maximum seconds to wait for the result, including time spent queued
+
+        Returns:
+            The raw PaddleOCR result
+
+        Raises:
+            TimeoutError: If the result is not ready within timeout; a task still
+                          waiting for an engine is withdrawn
+        """
+        future = self.submit(image, cls)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"OCR task did not finish within {timeout} seconds") from None
+
+    def get_stats(self) -> dict:
+        """
+        Get pool utilization and queue depth
+
+        Returns:
+            dict: Pool statistics
+        """
+        with self._lock:
+            busy = len(self._in_flight)
+            return {
+                'workers': self.size,
+                'ready_workers': len(self._ready),
+                'busy_workers': busy,
+                'idle_workers': len(self._ready) - busy,
+                'queue_depth': len(self._pending),
+                'completed': self._completed,
+                'failed': self._failed,
+                'start_error': self._start_error,
+                'cpu_threads_per_worker': self.cpu_threads
+            }
+
+    def shutdown(self, timeout: float = 5):
+        """Stop the workers and the dispatcher"""
+        if not self._running:
+            return
+        self._running = False
+        for task_queue in self._task_queues.values():
+            task_queue.put(None)
+        for process in self._workers.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+            self._pending.clear()
+        for future in futures:
+            self._fail(future, RuntimeError("OCR pool shut down"))
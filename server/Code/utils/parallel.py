@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from utils.tracing import span, submit_with_context
+
+
+def _timed_call(name, func, kwargs):
+    """Call func(**kwargs) inside a span named after the branch and return (result, duration_seconds)"""
+    start_time = time.time()
+    with span(f"branch.{name}"):
+        result = func(**kwargs)
+    return result, round(time.time() - start_time, 4)
+
+
+def run_branches(executor: ThreadPoolExecutor, branches: dict) -> dict:
+    """
+    Run independent branches concurrently and collect their results
+
+    Each branch has its own wall-clock timeout measured from the moment all
+    branches are submitted. A branch that raises or times out is reported as
+    {"success": False, "error": ...} without affecting the others. A timed-out
+    branch keeps running on the executor; its result is discarded.
+
+    Args:
+        executor: Executor to run the branches on (shared so timed-out work does not block the caller)
+        branches: Mapping of branch name to (callable, kwargs, timeout_seconds);
+                  timeout_seconds may be None for no limit
+
+    Returns:
+        dict: Mapping of branch name to the callable's result dict, each with
+              'duration_seconds' added
+    """
+    start_time = time.time()
+    futures = {
+        name: (submit_with_context(executor, _timed_call, name, func, kwargs), timeout)
+        for name, (func, kwargs, timeout) in branches.items()
+    }
+
+    results = {}
+    for name, (future, timeout) in futures.items():
+        remaining = None if timeout is None else max(0, timeout - (time.time() - start_time))
+        try:
+            result, duration = future.result(timeout=remaining)
+            if not isinstance(result, dict):
+                result = {"success": True, "content": result}
+        except FutureTimeoutError:
+            future.cancel()
+            result = {"success": False, "error": f"{name} timed out after {timeout} seconds"}
+            duration = round(time.time() - start_time, 4)
+        except Exception as e:
+            result = {"success": False, "error": f"{name} failed: {str(e)}"}
+            duration = round(time.time() - start_time, 4)
+
+        result = dict(result)
+        result['duration_seconds'] = duration
+        results[name] = result
+        print(f"[PARALLEL] Branch '{name}' finished (success={result.get('success')})")
+
+    return results
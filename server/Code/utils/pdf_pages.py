@@ -0,0 +1,167 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _open_pdf(pdf_path):
+    try:
+        import pymupdf as fitz  # PyMuPDF >= 1.24
+    except ImportError:
+        try:
+            import fitz  # Older PyMuPDF, installed as a PaddleOCR dependency
+        except ImportError:
+            raise ImportError("PyMuPDF is required for PDF processing. Please install it with: pip install PyMuPDF")
+    return fitz.open(pdf_path)
+
+
+def get_page_count(pdf_path: str) -> int:
+    """
+    Get the number of pages in a PDF
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        int: Number of pages
+    """
+    with _open_pdf(pdf_path) as doc:
+        return doc.page_count
+
+
+def extract_text_layer(pdf_path: str, dpi: int = 200, min_chars: int = 20) -> dict:
+    """
+    Read the embedded text layer of every page in PaddleOCR result format
+
+    Words are grouped into the PDF's own text lines, and coordinates are scaled
+    to pixels at the given DPI so they match rasterized pages.
+
+    Args:
+        pdf_path: Path to the PDF file
+        dpi: Resolution used to scale PDF points to pixels
+        min_chars: Minimum number of non-whitespace characters for a page to count as having a text layer
+
+    Returns:
+        dict: Mapping of page index to a list of [bbox, (text, confidence)] lines,
+              for pages with a usable text layer only
+    """
+    scale = dpi / 72.0
+    pages = {}
+
+    with _open_pdf(pdf_path) as doc:
+        for page_idx, page in enumerate(doc):
+            lines = {}
+            for x0, y0, x1, y1, word, block_no, line_no, _ in page.get_text('words'):
+                key = (block_no, line_no)
+                if key not in lines:
+                    lines[key] = [x0, y0, x1, y1, []]
+                box = lines[key]
+                box[0], box[1] = min(box[0], x0), min(box[1], y0)
+                box[2], box[3] = max(box[2], x1), max(box[3], y1)
+                box[4].append(word)
+
+            if sum(len(word) for box in lines.values() for word in box[4]) < min_chars:
+                continue
+
+            pages[page_idx] = [
+                [
+                    [[x0 * scale, y0 * scale], [x1 * scale, y0 * scale], [x1 * scale, y1 * scale], [x0 * scale, y1 * scale]],
+                    (' '.join(words), 1.0)
+                ]
+                for x0, y0, x1, y1, words in lines.values()
+            ]
+
+    return pages
+
+
+def rasterize_page(pdf_path: str, page_idx: int, dpi: int, output_dir: str) -> str:
+    """
+    Render one PDF page to a PNG file
+
+    Opens the document itself so it can run in a separate worker process.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: Zero-based page index
+        dpi: Render resolution
+        output_dir: Directory for the PNG file
+
+    Returns:
+        str: Path to the rendered PNG
+    """
+    with _open_pdf(pdf_path) as doc:
+        pixmap = doc[page_idx].get_pixmap(dpi=dpi)
+        image_path = os.path.join(output_dir, f"page_{page_idx:04d}.png")
+        pixmap.save(image_path)
+    return image_path
+
+
+class PdfRasterPool:
+    """
+    Process pool rasterizing PDF pages, shared by every document
+
+    One pool is created for the application and reused, so concurrent PDFs
+    share max_workers processes instead of each starting a pool of their own.
+    Workers are started with forkserver (spawn where it is unavailable), not
+    fork: by the time a PDF arrives the server process runs many threads, and
+    a forked child can deadlock on a lock one of them held. Processes start
+    on the first submit and stay alive for later documents.
+    """
+
+    def __init__(self, max_workers: int):
+        """
+        Initialize the pool (processes are started on demand)
+
+        Args:
+            max_workers: Maximum number of rasterizing processes
+        """
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(start_method)
+                )
+                atexit.register(self.shutdown)
+            return self._executor
+
+    def submit(self, pdf_path: str, page_idx: int, dpi: int, output_dir: str) -> Future:
+        """
+        Queue one page for rasterize_page
+
+        A pool broken by a crashed worker is replaced, so one bad page does not
+        fail the PDFs submitted after it.
+
+        Returns:
+            Future: Resolves to the path of the rendered PNG
+        """
+        executor = self._get_executor()
+        try:
+            future = executor.submit(rasterize_page, pdf_path, page_idx, dpi, output_dir)
+        except BrokenProcessPool:
+            print("[PDF] Raster pool broken by a crashed worker, starting a new one")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            future = self._get_executor().submit(rasterize_page, pdf_path, page_idx, dpi, output_dir)
+        self._submitted += 1
+        return future
+
+    def get_stats(self) -> dict:
+        return {'max_workers': self.max_workers, 'started': self._executor is not None, 'pages_submitted': self._submitted}
+
+    def shutdown(self):
+        """Stop the worker processes; a later submit starts new ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+
+_END = object()  # Sentinel closing a stage's input queue
+_POLL_SECONDS = 0.1
+
+
+def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put an item on a bounded queue, giving up once stop is set"""
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(source: queue.Queue, stop: threading.Event):
+    """Take an item from a queue, returning _END once stop is set"""
+    while not stop.is_set():
+        try:
+            return source.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def run_pipeline(items, stages: list, queue_size: int = 8):
+    """
+    Run items through a sequence of stages, each with its own worker threads
+
+    Stages are connected by bounded queues, so a fast stage (e.g., OCR) runs
+    ahead of a slow one (e.g., LLM calls) by at most queue_size items instead
+    of buffering the whole batch, and different items are in different stages
+    at the same time. Each stage function receives the previous stage's
+    return value (the item itself for the first stage). An item whose stage
+    raises skips the remaining stages and is reported with the error.
+
+    Closing the generator early stops the workers; items still in flight are
+    abandoned.
+
+    Args:
+        items: Iterable of input items
+        stages: List of (name, func, workers) tuples, in order
+        queue_size: Capacity of the queue in front of each stage
+
+    Yields:
+        dict: One record per item in completion order, with 'index' (position in
+              items), 'item', 'value' (the last stage's return value), 'error'
+              (str or None), 'durations' (seconds per completed stage) and
+              'queue_wait_seconds' (time spent waiting between stages)
+    """
+    stop = threading.Event()
+    inputs = [queue.Queue(maxsize=queue_size) for _ in stages]
+    results = queue.Queue()
+    remaining_workers = [workers for _, _, workers in stages]
+    counter_lock = threading.Lock()
+
+    def close_stage(stage_idx):
+        """Called by each worker of a stage when its input is exhausted"""
+        with counter_lock:
+            remaining_workers[stage_idx] -= 1
+            last = remaining_workers[stage_idx] == 0
+        if not last:
+            return
+        if stage_idx + 1 < len(stages):
+            for _ in range(stages[stage_idx + 1][2]):
+                _put(inputs[stage_idx + 1], _END, stop)
+        else:
+            results.put(_END)
+
+    def feed():
+        for index, item in enumerate(items):
+            record = {
+                'index': index,
+                'item': item,
+                'value': item,
+                'error': None,
+                'durations': {},
+                'queue_wait_seconds': 0.0,
+                'queued_at': time.time()
+            }
+            if not _put(inputs[0], record, stop):
+                return
+        for _ in range(stages[0][2]):
+            _put(inputs[0], _END, stop)
+
+    def work(stage_idx):
+        name, func, _ = stages[stage_idx]
+        while True:
+            record = _get(inputs[stage_idx], stop)
+            if record is _END:
+                close_stage(stage_idx)
+                return
+
+            start_time = time.time()
+            record['queue_wait_seconds'] += start_time - record.pop('queued_at')
+            try:
+                record['value'] = func(record['value'])
+            except Exception as e:
+                record['error'] = f"{name} failed: {str(e)}"
+            record['durations'][name] = round(time.time() - start_time, 4)
+
+            if record['error'] is None and stage_idx + 1 < len(stages):
+                record['queued_at'] = time.time()
+                if not _put(inputs[stage_idx + 1], record, stop):
+                    return
+            else:
+                record['queue_wait_seconds'] = round(record['queue_wait_seconds'], 4)
+                results.put(record)
+
+    threads = [threading.Thread(target=feed, name='pipeline-feed', daemon=True)]
+    for stage_idx, (name, _, workers) in enumerate(stages):
+        threads.extend(
+            threading.Thread(target=work, args=(stage_idx,), name=f"pipeline-{name}-{worker_idx}", daemon=True)
+            for worker_idx in range(workers)
+        )
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            record = results.get()
+            if record is _END:
+                return
+            yield record
+    finally:
+        stop.set()
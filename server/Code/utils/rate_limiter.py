@@ -0,0 +1,267 @@
+import asyncio
+import random
+import re
+import threading
+import time
+
+# Fraction of the quota to schedule against, leaving headroom for estimation error
+DEFAULT_UTILIZATION = 0.95
+
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def parse_reset_duration(value):
+    """
+    Parse an OpenAI reset header value such as '1s', '6m0s' or '20ms'
+
+    Returns:
+        float: Seconds, or None if the value cannot be parsed
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(error):
+    """
+    Get the server-requested wait from a rate-limit error (Retry-After / retry-after-ms headers)
+
+    Returns:
+        float: Seconds to wait, or None if the error carries no such header
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return parse_reset_duration(headers.get('x-ratelimit-reset-requests')) or \
+        parse_reset_duration(headers.get('x-ratelimit-reset-tokens'))
+
+
+def is_rate_limit_error(error) -> bool:
+    """Whether an API error is a 429 rate-limit rejection"""
+    if getattr(error, 'status_code', None) == 429:
+        return True
+    error_msg = str(error)
+    return "rate_limit" in error_msg.lower() or "429" in error_msg
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given (0-based) retry attempt"""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+class TokenBucket:
+    """Bucket refilled continuously at limit_per_minute / 60 units per second"""
+
+    def __init__(self, limit_per_minute=None):
+        self.limit_per_minute = None
+        self.capacity = None
+        self.level = 0.0
+        self.updated = time.monotonic()
+        if limit_per_minute:
+            self.set_limit(limit_per_minute)
+
+    def set_limit(self, limit_per_minute):
+        """Change the per-minute budget, keeping the current fill ratio"""
+        self.refill()
+        ratio = self.level / self.capacity if self.capacity else 1.0
+        self.limit_per_minute = float(limit_per_minute)
+        self.capacity = float(limit_per_minute)
+        self.level = self.capacity * ratio
+
+    def refill(self):
+        now = time.monotonic()
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, cost) -> float:
+        """Seconds until cost units are available (0 if unlimited or available now)"""
+        if self.capacity is None:
+            return 0.0
+        cost = min(cost, self.capacity)
+        if self.level >= cost:
+            return 0.0
+        return (cost - self.level) * 60.0 / self.capacity
+
+    def consume(self, cost):
+        if self.capacity is not None:
+            self.level -= min(cost, self.capacity)
+
+    def cap(self, level):
+        """Lower the level to what the server reports as remaining"""
+        if self.capacity is not None:
+            self.level = min(self.level, level)
+
+
+class RateLimiter:
+    """
+    Client-side scheduler for OpenAI requests-per-minute and tokens-per-minute quotas.
+
+    Each request waits (in FIFO order) until both token buckets can pay for it,
+    so bursts are queued instead of being rejected with 429. Buckets are sized
+    to utilization x quota. Quotas can be configured or learned from the
+    x-ratelimit-limit-* response headers; the x-ratelimit-remaining-* headers
+    pull the buckets down when the server has seen more usage than estimated
+    (e.g., from other processes sharing the key), and a Retry-After on a 429
+    pauses every queued request until the reset.
+
+    acquire must be awaited on the shared LLM event loop (see utils.llm_client).
+    """
+
+    def __init__(self, requests_per_minute: int = None, tokens_per_minute: int = None,
+                 utilization: float = DEFAULT_UTILIZATION):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute: Request quota (None to learn it from response headers)
+            tokens_per_minute: Token quota (None to learn it from response headers)
+            utilization: Fraction of each quota to use
+        """
+        self.utilization = utilization
+        self.configured_rpm = requests_per_minute
+        self.configured_tpm = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute * utilization if requests_per_minute else None)
+        self.tokens = TokenBucket(tokens_per_minute * utilization if tokens_per_minute else None)
+        self._paused_until = 0.0
+        self._lock = None
+        self._state_lock = threading.Lock()
+        self._stats = {'requests': 0, 'queued': 0, 'total_wait_seconds': 0.0, 'rate_limited': 0, 'waiting': 0}
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """
+        Wait until a request of the estimated size fits both budgets, then reserve it
+
+        Args:
+            estimated_tokens: Prompt tokens plus the completion token limit
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        start = time.monotonic()
+        self._stats['waiting'] += 1
+        try:
+            async with self._lock:
+                while True:
+                    with self._state_lock:
+                        self.requests.refill()
+                        self.tokens.refill()
+                        wait = max(
+                            self._paused_until - time.monotonic(),
+                            self.requests.wait_time(1),
+                            self.tokens.wait_time(estimated_tokens)
+                        )
+                        if wait <= 0:
+                            self.requests.consume(1)
+                            self.tokens.consume(estimated_tokens)
+                            break
+                    await asyncio.sleep(wait)
+        finally:
+            self._stats['waiting'] -= 1
+
+        waited = time.monotonic() - start
+        self._stats['requests'] += 1
+        if waited > 0.001:
+            self._stats['queued'] += 1
+            self._stats['total_wait_seconds'] += waited
+        return waited
+
+    def pause(self, seconds: float):
+        """Hold all requests for the given time (e.g., after a 429 with Retry-After)"""
+        with self._state_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._stats['rate_limited'] += 1
+        print(f"[RATE_LIMIT] Rate limited by the server, pausing requests for {seconds:.2f}s")
+
+    def update_from_headers(self, headers):
+        """
+        Sync the buckets with the x-ratelimit-* headers of an API response
+
+        Args:
+            headers: Response headers (case-insensitive mapping)
+        """
+        with self._state_lock:
+            for bucket, configured, kind in ((self.requests, self.configured_rpm, 'requests'),
+                                             (self.tokens, self.configured_tpm, 'tokens')):
+                try:
+                    limit = float(headers.get(f'x-ratelimit-limit-{kind}') or 0)
+                    remaining = float(headers.get(f'x-ratelimit-remaining-{kind}') or -1)
+                except ValueError:
+                    continue
+
+                if limit > 0 and not configured and bucket.limit_per_minute != limit * self.utilization:
+                    bucket.set_limit(limit * self.utilization)
+                    print(f"[RATE_LIMIT] Learned {kind} quota from response headers: {limit:.0f}/min")
+
+                if remaining >= 0 and bucket.capacity is not None:
+                    bucket.refill()
+                    # Keep the unused (1 - utilization) share of the quota in reserve
+                    reserve = (limit or bucket.capacity / self.utilization) * (1 - self.utilization)
+                    bucket.cap(remaining - reserve)
+                    if remaining == 0:
+                        reset = parse_reset_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                        if reset:
+                            self._paused_until = max(self._paused_until, time.monotonic() + reset)
+
+    def get_stats(self) -> dict:
+        """Quotas, current bucket levels and queueing counters"""
+        with self._state_lock:
+            self.requests.refill()
+            self.tokens.refill()
+            return {
+                'utilization': self.utilization,
+                'requests_per_minute': self.requests.limit_per_minute,
+                'tokens_per_minute': self.tokens.limit_per_minute,
+                'available_requests': round(self.requests.level, 1) if self.requests.capacity else None,
+                'available_tokens': round(self.tokens.level) if self.tokens.capacity else None,
+                'paused_for_seconds': round(max(0.0, self._paused_until - time.monotonic()), 3),
+                **{key: round(value, 3) if isinstance(value, float) else value for key, value in self._stats.items()}
+            }
+
+
+_rate_limiter = RateLimiter()
+
+
+def configure_rate_limiter(requests_per_minute: int = None, tokens_per_minute: int = None,
+                           utilization: float = DEFAULT_UTILIZATION) -> RateLimiter:
+    """
+    Replace the process-wide limiter with one using the given quotas
+
+    Returns:
+        RateLimiter: The new limiter
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute, utilization)
+    return _rate_limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide limiter shared by all agents"""
+    return _rate_limiter
@@ -0,0 +1,89 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class StartupTracker:
+    """
+    Records where startup time goes and tracks background warmup tasks
+
+    Phases (imports, construction of shared objects) are timed with phase()
+    so a slow cold start can be traced to its cause. Warmup tasks run in
+    background threads after the application has started; the application
+    is ready once every task has finished successfully. Backs the /api/live
+    and /api/ready endpoints.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat()
+        self._start_time = time.perf_counter()
+        self._phases = []
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a startup phase
+
+        Args:
+            name: Phase name shown in get_status and the startup log
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_time
+            self._phases.append({'name': name, 'duration_seconds': round(duration, 3)})
+            print(f"[STARTUP] {name}: {duration:.3f}s")
+
+    def run_in_background(self, name: str, func, *args, **kwargs) -> None:
+        """
+        Run a warmup task in a daemon thread; the application is not ready until it succeeds
+
+        A task that is already pending or finished is not started again.
+
+        Args:
+            name: Task name shown in get_status
+            func: Callable to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        """
+        with self._lock:
+            if name in self._tasks:
+                return
+            task = {'status': 'running', 'started_at': datetime.now().isoformat(), 'duration_seconds': None, 'error': None}
+            self._tasks[name] = task
+
+        def run():
+            start_time = time.perf_counter()
+            try:
+                func(*args, **kwargs)
+                task['status'] = 'ready'
+            except Exception as e:
+                task['status'] = 'failed'
+                task['error'] = str(e)
+            task['duration_seconds'] = round(time.perf_counter() - start_time, 3)
+            print(f"[STARTUP] Warmup task '{name}' {task['status']} after {task['duration_seconds']:.3f}s"
+                  + (f": {task['error']}" if task['error'] else ""))
+
+        threading.Thread(target=run, name=f"warmup-{name}", daemon=True).start()
+
+    def is_ready(self) -> bool:
+        """Whether every warmup task has finished successfully"""
+        return all(task['status'] == 'ready' for task in list(self._tasks.values()))
+
+    def uptime_seconds(self) -> float:
+        return round(time.perf_counter() - self._start_time, 3)
+
+    def get_status(self) -> dict:
+        """Startup phases with their durations, and the state of each warmup task"""
+        return {
+            'ready': self.is_ready(),
+            'started_at': self.started_at,
+            'uptime_seconds': self.uptime_seconds(),
+            'startup_seconds': round(sum(phase['duration_seconds'] for phase in self._phases), 3),
+            'phases': list(self._phases),
+            'warmup': {name: dict(task) for name, task in list(self._tasks.items())}
+        }
@@ -0,0 +1,175 @@
+import json
+from jsonschema.validators import validator_for
+
+# Schema types whose values normalize_numbers may convert from number-like strings
+_NUMBER_TYPES = ('number', 'integer')
+
+
+def compile_validator(schema: dict):
+    """
+    Check a JSON Schema and build its validator once, for repeated validation
+
+    Args:
+        schema: JSON Schema (its $schema selects the draft, default: latest)
+
+    Returns:
+        A jsonschema validator instance
+
+    Raises:
+        jsonschema.SchemaError: If the schema itself is invalid
+    """
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def response_format(name: str, schema: dict) -> dict:
+    """
+    Build the response_format of a chat completion request that asks for JSON following a schema
+
+    The schema is sent without strict mode: strict structured outputs cannot
+    express objects keyed by free-form names (e.g., reporting periods), so the
+    schema guides the model and the response is validated afterwards.
+    """
+    return {
+        'type': 'json_schema',
+        'json_schema': {'name': name, 'schema': schema, 'strict': False}
+    }
+
+
+def invalid_fields(validator, data) -> list:
+    """
+    Validate data and list the fields that are missing or invalid
+
+    A missing required property is reported at the path of the property itself,
+    so it can be asked for like any other invalid field.
+
+    Args:
+        validator: Validator from compile_validator
+        data: Parsed JSON
+
+    Returns:
+        list: (path, message) tuples, path being a tuple of keys; the path () means
+              the data as a whole is unusable
+    """
+    fields = {}
+    for error in validator.iter_errors(data):
+        path = tuple(error.absolute_path)
+        if error.validator == 'required' and isinstance(error.instance, dict):
+            for key in error.validator_value:
+                if key not in error.instance:
+                    fields.setdefault(path + (key,), 'missing')
+        else:
+            fields.setdefault(path, error.message)
+    return sorted(fields.items(), key=lambda item: [str(key) for key in item[0]])
+
+
+def subschema(schema: dict, path: tuple) -> dict:
+    """Schema of the value at a path of object keys ({} if the schema does not describe it)"""
+    for key in path:
+        properties = schema.get('properties') or {}
+        if key in properties:
+            schema = properties[key]
+        elif isinstance(schema.get('additionalProperties'), dict):
+            schema = schema['additionalProperties']
+        else:
+            return {}
+    return schema
+
+
+def patch_schema(schema: dict, paths: list) -> dict:
+    """
+    Schema of an object holding only the values at the given paths, in the same structure
+
+    Args:
+        schema: Schema of the whole document
+        paths: Paths (tuples of keys) of the values to ask for
+
+    Returns:
+        dict: JSON Schema of the patch object
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        for key in path:
+            node = node.setdefault(key, {})
+
+    def build(node, path):
+        if not node:
+            return subschema(schema, path)
+        return {
+            'type': 'object',
+            'properties': {key: build(child, path + (key,)) for key, child in node.items()},
+            'required': list(node)
+        }
+
+    return build(tree, ())
+
+
+def apply_patch(data: dict, patch, paths: list) -> int:
+    """
+    Copy the values at the given paths from a patch object into data, in place
+
+    Returns:
+        int: Number of paths the patch held a value for
+    """
+    applied = 0
+    for path in paths:
+        value = patch
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = data
+            for key in path[:-1]:
+                if not isinstance(target.get(key), dict):
+                    target[key] = {}
+                target = target[key]
+            target[path[-1]] = value
+            applied += 1
+    return applied
+
+
+def numeric_fields(schema: dict) -> tuple:
+    """Names of the properties a schema declares as numbers, at any depth"""
+    names = set()
+    stack = [schema]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        for name, child in (node.get('properties') or {}).items():
+            types = child.get('type') if isinstance(child, dict) else None
+            types = [types] if isinstance(types, str) else types or []
+            if any(t in _NUMBER_TYPES for t in types):
+                names.add(name)
+            stack.append(child)
+        stack.append(node.get('additionalProperties'))
+        stack.append(node.get('items'))
+    return tuple(sorted(names))
+
+
+def describe_field(path: tuple, message: str) -> str:
+    """One (path, message) tuple as text, e.g. 'period_1 > Total_Assets: missing'"""
+    return f"{' > '.join(str(key) for key in path)}: {message}"
+
+
+def describe_fields(fields: list) -> str:
+    """Bullet list of (path, message) tuples for a re-ask prompt"""
+    return '\n'.join(f"- {describe_field(path, message)}" for path, message in fields)
+
+
+def format_structured_content(data, formulas: list) -> str:
+    """
+    Render validated structured output like a free-text analysis response
+
+    The JSON goes in a ```json block followed by the formulas, the layout the
+    analysis prompts ask for, so saving, extraction and chunk merging treat
+    both kinds of responses the same way.
+    """
+    content = f"```json\n{json.dumps(data, indent=2, ensure_ascii=False)}\n```"
+    formulas = [str(formula).strip() for formula in formulas or [] if str(formula).strip()]
+    if formulas:
+        content += "\n\n#### Formulas and Logic Used\n\n" + '\n'.join(f"- {formula}" for formula in formulas)
+    return content
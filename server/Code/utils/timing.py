@@ -1,13 +1,75 @@
 import time
 import os
-import json
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from functools import wraps
 from flask import jsonify
+from utils.timing_store import TimingStore
+from utils.latency_stats import RollingLatencyStats, WINDOWS
+from utils.tracing import start_trace
+
+_timing_store = None
+_latency_stats = None
+_timing_store_lock = threading.Lock()
+
+def get_timing_store():
+    """
+    Get the process-wide timing store, creating it on first use
+    
+    The rolling latency aggregates are seeded from the store as it is created,
+    before anything can be appended, so no record is counted both from the
+    database and by save_timing_data.
+    
+    Returns:
+        TimingStore: Store backed by output/processing_times.db
+    """
+    global _timing_store, _latency_stats
+    if _timing_store is None:
+        with _timing_store_lock:
+            if _timing_store is None:
+                # Get the output directory path (relative to the utils folder)
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                output_dir = os.path.join(os.path.dirname(current_dir), 'output')
+                timing_store = TimingStore(
+                    os.path.join(output_dir, 'processing_times.db'),
+                    legacy_json_path=os.path.join(output_dir, 'processing_times.json')
+                )
+                _latency_stats = _load_latency_stats(timing_store)
+                _timing_store = timing_store
+    return _timing_store
+
+def _load_latency_stats(timing_store):
+    """Rolling latency aggregates seeded from the records already in the timing store"""
+    latency_stats = RollingLatencyStats()
+    for endpoint, buckets in timing_store.load_histograms().items():
+        latency_stats.load_all_time(endpoint, buckets)
+    
+    # Replay the longest window so windowed stats survive a restart
+    longest_window = max(length for length, _ in WINDOWS.values())
+    since = (datetime.now() - timedelta(seconds=longest_window)).isoformat()
+    for record in timing_store.load_since(since):
+        latency_stats.record(
+            record['endpoint'],
+            record['duration_seconds'],
+            bool(record['success']),
+            timestamp=datetime.fromisoformat(record['timestamp']).timestamp(),
+            all_time=False
+        )
+    return latency_stats
+
+def get_latency_stats():
+    """
+    Get the process-wide rolling latency aggregates (created along with the timing store)
+    
+    Returns:
+        RollingLatencyStats: Aggregates kept up to date by save_timing_data
+    """
+    get_timing_store()
+    return _latency_stats
 
 def save_timing_data(endpoint_name, duration, success, error_message=None, metadata=None):
     """
-    Save timing data to a JSON file in the output directory
+    Queue timing data for the append-only timing store in the output directory
     
     Args:
         endpoint_name: Name of the endpoint function
@@ -17,16 +79,6 @@ def save_timing_data(endpoint_name, duration, success, error_message=None, metad
         metadata: Additional metadata about the operation
     """
     try:
-        # Get the output directory path (relative to the utils folder)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        output_dir = os.path.join(os.path.dirname(current_dir), 'output')
-        
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Create timing log file path
-        timing_file = os.path.join(output_dir, 'processing_times.json')
-        
         # Create timing entry
         timing_entry = {
             'timestamp': datetime.now().isoformat(),
@@ -37,23 +89,9 @@ def save_timing_data(endpoint_name, duration, success, error_message=None, metad
             'metadata': metadata or {}
         }
         
-        # Load existing timing data or create new list
-        timing_data = []
-        if os.path.exists(timing_file):
-            try:
-                with open(timing_file, 'r', encoding='utf-8') as f:
-                    timing_data = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                timing_data = []
-        
-        # Append new entry
-        timing_data.append(timing_entry)
-        
-        # Save updated timing data
-        with open(timing_file, 'w', encoding='utf-8') as f:
-            json.dump(timing_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"[TIMING] Saved timing data to: {timing_file}")
+        # Written by the store's background thread
+        get_timing_store().append(timing_entry)
+        get_latency_stats().record(endpoint_name, duration, success)
         
     except Exception as e:
         print(f"[TIMING] Failed to save timing data: {str(e)}")
@@ -67,6 +105,8 @@ def time_it(f):
     2. Executes the original endpoint function
     3. Records end time after function completion
     4. Calculates duration and adds it to JSON response
+    5. Traces the request and adds the per-stage breakdown to the response metadata
+       ('stage_timings') and the timing record ('stages')
     
     Args:
         f: The Flask endpoint function to be decorated
@@ -79,31 +119,47 @@ def time_it(f):
         start_time = time.time()
         print(f"[TIMING] Starting execution of {f.__name__}")
         
+        trace = None
         try:
-            response = f(*args, **kwargs)
+            with start_trace(f.__name__) as trace:
+                response = f(*args, **kwargs)
             end_time = time.time()
             duration = end_time - start_time
             
             print(f"[TIMING] {f.__name__} completed in {duration:.4f} seconds")
             
+            # Stages recorded below the endpoint's root span
+            stages = trace.stage_timings()
+            
+            def annotate(data):
+                data['processing_time_seconds'] = round(duration, 4)
+                if stages:
+                    if not isinstance(data.get('metadata'), dict):
+                        data['metadata'] = {}
+                    data['metadata']['stage_timings'] = stages
+            
             # Extract metadata from response for logging
             metadata = {}
             response_data = None
             
             # Check if response is a Flask response object with JSON data
-            if hasattr(response, 'get_json') and response.is_json:
+            # (file downloads are streamed in passthrough mode and left untouched)
+            if hasattr(response, 'get_json') and response.is_json and not response.direct_passthrough:
                 data = response.get_json()
                 if isinstance(data, dict):
                     response_data = data
-                    data['processing_time_seconds'] = round(duration, 4)
+                    annotate(data)
                     final_response = jsonify(data), response.status_code
             
             # If response is a tuple (data, status_code)
             elif isinstance(response, tuple) and len(response) == 2:
                 data, status_code = response
+                # Unwrap jsonify(...) responses returned together with a status code
+                if hasattr(data, 'get_json') and data.is_json and not data.direct_passthrough:
+                    data = data.get_json()
                 if isinstance(data, dict):
                     response_data = data
-                    data['processing_time_seconds'] = round(duration, 4)
+                    annotate(data)
                     final_response = jsonify(data), status_code
                 else:
                     final_response = response
@@ -111,20 +167,25 @@ def time_it(f):
             # If response is direct JSON data (dict)
             elif isinstance(response, dict):
                 response_data = response
-                response['processing_time_seconds'] = round(duration, 4)
+                annotate(response)
                 final_response = jsonify(response)
             else:
                 final_response = response
             
             # Extract metadata from response data
             if response_data and isinstance(response_data, dict):
+                response_metadata = {
+                    key: value for key, value in response_data.get('metadata', {}).items()
+                    if key != 'stage_timings'
+                }
                 metadata = {
                     'success': response_data.get('success', True),
                     'files_processed': response_data.get('files_processed'),
-                    'metadata': response_data.get('metadata', {}),
-                    'category': response_data.get('metadata', {}).get('category') if 'metadata' in response_data else None,
-                    'analysis_type': response_data.get('metadata', {}).get('analysis_type') if 'metadata' in response_data else None
+                    'metadata': response_metadata,
+                    'category': response_metadata.get('category'),
+                    'analysis_type': response_metadata.get('analysis_type')
                 }
+            metadata['stages'] = stages
             
             # Save timing data to file
             save_timing_data(
@@ -147,7 +208,8 @@ def time_it(f):
                 endpoint_name=f.__name__,
                 duration=duration,
                 success=False,
-                error_message=error_message
+                error_message=error_message,
+                metadata={'stages': trace.stage_timings()} if trace else None
             )
             
             raise
@@ -0,0 +1,263 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+from utils.latency_stats import bucket_index
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS timings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    duration_seconds REAL NOT NULL,
+    success INTEGER NOT NULL,
+    error_message TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_timings_endpoint ON timings (endpoint);
+CREATE INDEX IF NOT EXISTS idx_timings_timestamp ON timings (timestamp);
+CREATE TABLE IF NOT EXISTS endpoint_totals (
+    endpoint TEXT PRIMARY KEY,
+    total_requests INTEGER NOT NULL,
+    successful_requests INTEGER NOT NULL,
+    failed_requests INTEGER NOT NULL,
+    total_time REAL NOT NULL,
+    min_time REAL NOT NULL,
+    max_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS endpoint_histograms (
+    endpoint TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (endpoint, bucket)
+);
+"""
+
+_UPSERT_HISTOGRAM = """
+INSERT INTO endpoint_histograms (endpoint, bucket, count) VALUES (:endpoint, :bucket, 1)
+ON CONFLICT(endpoint, bucket) DO UPDATE SET count = count + 1
+"""
+
+_UPSERT_TOTALS = """
+INSERT INTO endpoint_totals (endpoint, total_requests, successful_requests, failed_requests, total_time, min_time, max_time)
+VALUES (:endpoint, 1, :success, 1 - :success, :duration_seconds, :duration_seconds, :duration_seconds)
+ON CONFLICT(endpoint) DO UPDATE SET
+    total_requests = total_requests + 1,
+    successful_requests = successful_requests + excluded.successful_requests,
+    failed_requests = failed_requests + excluded.failed_requests,
+    total_time = total_time + excluded.total_time,
+    min_time = MIN(min_time, excluded.min_time),
+    max_time = MAX(max_time, excluded.max_time)
+"""
+
+
+class TimingStore:
+    """
+    Append-only store for request timing records.
+
+    Records are queued by the caller and written in batches by a background
+    thread to a SQLite database in WAL mode, which is safe with several writer
+    threads and processes. Per-endpoint totals and latency histogram buckets are
+    maintained in the same transaction, so statistics never require re-reading
+    the full history.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: str = None):
+        """
+        Initialize the store and start the writer thread
+
+        Args:
+            db_path: Path to the SQLite database file
+            legacy_json_path: Optional processing_times.json to import once into an empty database
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+        self._backfill_histograms()
+
+        if legacy_json_path:
+            self._import_legacy_json(legacy_json_path)
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='timing-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _import_legacy_json(self, legacy_json_path):
+        """Move records from the old append-rewrite JSON log into the database"""
+        if not os.path.exists(legacy_json_path):
+            return
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT COUNT(*) FROM timings").fetchone()[0] > 0:
+                return
+            try:
+                with open(legacy_json_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"[TIMING] Could not import legacy timing file {legacy_json_path}: {e}")
+                return
+            self._insert(conn, entries)
+
+        os.replace(legacy_json_path, f"{legacy_json_path}.migrated")
+        print(f"[TIMING] Imported {len(entries)} records from {legacy_json_path}")
+
+    def _backfill_histograms(self):
+        """Build histogram buckets for records written before the histogram table existed"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM endpoint_histograms LIMIT 1").fetchone():
+                return
+            rows = conn.execute("SELECT endpoint, duration_seconds FROM timings").fetchall()
+            conn.executemany(_UPSERT_HISTOGRAM, [
+                {'endpoint': row['endpoint'], 'bucket': bucket_index(row['duration_seconds'])}
+                for row in rows
+            ])
+
+    def _insert(self, conn, entries):
+        rows = [
+            {
+                'timestamp': entry['timestamp'],
+                'endpoint': entry['endpoint'],
+                'duration_seconds': entry['duration_seconds'],
+                'success': 1 if entry['success'] else 0,
+                'error_message': entry.get('error_message'),
+                'metadata': json.dumps(entry.get('metadata') or {}, ensure_ascii=False, default=str)
+            }
+            for entry in entries
+        ]
+        conn.executemany(
+            "INSERT INTO timings (timestamp, endpoint, duration_seconds, success, error_message, metadata) "
+            "VALUES (:timestamp, :endpoint, :duration_seconds, :success, :error_message, :metadata)",
+            rows
+        )
+        conn.executemany(_UPSERT_TOTALS, rows)
+        conn.executemany(_UPSERT_HISTOGRAM, [
+            {'endpoint': row['endpoint'], 'bucket': bucket_index(row['duration_seconds'])}
+            for row in rows
+        ])
+
+    def append(self, entry: dict) -> None:
+        """
+        Queue a timing record for writing (non-blocking)
+
+        Args:
+            entry: Timing record with timestamp, endpoint, duration_seconds, success, error_message and metadata
+        """
+        self._queue.put(entry)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    self._insert(conn, batch)
+            except Exception as e:
+                print(f"[TIMING] Failed to write {len(batch)} timing records: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until all queued records have been written"""
+        self._queue.join()
+
+    def load_histograms(self) -> dict:
+        """
+        Load the persisted latency histogram buckets
+
+        Returns:
+            dict: Mapping of endpoint to {bucket index: count}
+        """
+        histograms = {}
+        with closing(self._connect()) as conn:
+            for row in conn.execute("SELECT endpoint, bucket, count FROM endpoint_histograms"):
+                histograms.setdefault(row['endpoint'], {})[row['bucket']] = row['count']
+        return histograms
+
+    def load_since(self, since_timestamp: str) -> list:
+        """
+        Load records at or after a timestamp, oldest first
+
+        Args:
+            since_timestamp: ISO format timestamp
+
+        Returns:
+            list: Records with timestamp, endpoint, duration_seconds and success
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT timestamp, endpoint, duration_seconds, success FROM timings "
+                "WHERE timestamp >= ? ORDER BY id",
+                (since_timestamp,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_stats(self, recent_limit: int = 10) -> dict:
+        """
+        Get overall and per-endpoint statistics plus the most recent records
+
+        Args:
+            recent_limit: Number of recent records to include
+
+        Returns:
+            dict: Timing statistics
+        """
+        with closing(self._connect()) as conn:
+            totals = conn.execute("SELECT * FROM endpoint_totals").fetchall()
+            recent = conn.execute(
+                "SELECT timestamp, endpoint, duration_seconds, success, error_message, metadata "
+                "FROM timings ORDER BY id DESC LIMIT ?",
+                (recent_limit,)
+            ).fetchall()
+
+        endpoint_stats = {}
+        for row in totals:
+            endpoint_stats[row['endpoint']] = {
+                'total_requests': row['total_requests'],
+                'successful_requests': row['successful_requests'],
+                'failed_requests': row['failed_requests'],
+                'total_time': round(row['total_time'], 4),
+                'avg_time': round(row['total_time'] / row['total_requests'], 4),
+                'min_time': round(row['min_time'], 4),
+                'max_time': round(row['max_time'], 4)
+            }
+
+        recent_requests = [
+            {
+                'timestamp': row['timestamp'],
+                'endpoint': row['endpoint'],
+                'duration_seconds': row['duration_seconds'],
+                'success': bool(row['success']),
+                'error_message': row['error_message'],
+                'metadata': json.loads(row['metadata']) if row['metadata'] else {}
+            }
+            for row in reversed(recent)
+        ]
+
+        return {
+            'total_requests': sum(stats['total_requests'] for stats in endpoint_stats.values()),
+            'successful_requests': sum(stats['successful_requests'] for stats in endpoint_stats.values()),
+            'failed_requests': sum(stats['failed_requests'] for stats in endpoint_stats.values()),
+            'endpoint_statistics': endpoint_stats,
+            'recent_requests': recent_requests
+        }
@@ -0,0 +1,357 @@
+import json
+import numpy as np
+from utils.box_geometry import ROW_GAP_FACTOR, to_box_array, box_geometry, cluster_rows, reading_order
+
+BBOX_COLUMNS = ('bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2', 'bbox_x3', 'bbox_y3', 'bbox_x4', 'bbox_y4')
+
+
+class TokenView:
+    """
+    Zero-copy view of one token in a TokenTable
+
+    Supports attribute access (token.text) and, for code written against the
+    old per-token dicts, item access (token['text']).
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def text(self) -> str:
+        return self._table.text(self._index)
+
+    @property
+    def confidence(self):
+        value = self._table.confidences[self._index]
+        return None if np.isnan(value) else float(value)
+
+    @property
+    def page(self) -> int:
+        return int(self._table.pages[self._index])
+
+    @property
+    def bbox(self) -> np.ndarray:
+        """(4, 2) view into the table's box array"""
+        return self._table.boxes[self._index]
+
+    @property
+    def center_y(self) -> float:
+        return float(self._table.center_y[self._index])
+
+    @property
+    def left_x(self) -> float:
+        return float(self._table.left_x[self._index])
+
+    @property
+    def right_x(self) -> float:
+        return float(self._table.right_x[self._index])
+
+    @property
+    def height(self) -> float:
+        return float(self._table.heights[self._index])
+
+    def __getitem__(self, key):
+        if key not in TokenTable.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"TokenView(text={self.text!r}, page={self.page})"
+
+
+class TokenTable:
+    """
+    Columnar store of OCR tokens.
+
+    Texts share one string buffer addressed by start/end offsets; confidences,
+    page indices, box coordinates and the derived geometry are typed NumPy
+    arrays. A token costs under a hundred bytes plus its text, instead of a
+    dict holding nested bbox lists. Slicing with a slice (including by page
+    and row) returns views that share the parent's arrays and text buffer.
+    """
+
+    FIELDS = ('text', 'confidence', 'page', 'bbox', 'center_y', 'left_x', 'right_x', 'height')
+
+    def __init__(self, text_buffer, starts, ends, confidences, pages, boxes, center_y, left_x, right_x, heights):
+        """
+        Initialize a table from its columns (use from_ocr_result to build one from OCR output)
+
+        Args:
+            text_buffer: String holding every token's text
+            starts, ends: int64 offsets of each token's text in text_buffer
+            confidences: float32 recognition confidences (NaN if unknown)
+            pages: int32 page indices
+            boxes: float32 array of shape (N, 4, 2)
+            center_y, left_x, right_x, heights: float32 box geometry
+        """
+        self._text_buffer = text_buffer
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        self.pages = pages
+        self.boxes = boxes
+        self.center_y = center_y
+        self.left_x = left_x
+        self.right_x = right_x
+        self.heights = heights
+
+    @classmethod
+    def from_ocr_result(cls, ocr_result, sort: bool = True) -> 'TokenTable':
+        """
+        Build a table from PaddleOCR results
+
+        Args:
+            ocr_result: Per-page lists of [bbox, (text, confidence)] lines (None for empty pages)
+            sort: Whether to order tokens by page, then vertical position
+
+        Returns:
+            TokenTable: The recognized tokens (boxes with fewer than four points are skipped)
+        """
+        texts, confidences, pages, bboxes = [], [], [], []
+        for page_idx, page_results in enumerate(ocr_result or []):
+            # PaddleOCR returns None for pages without any detected text
+            if not page_results:
+                continue
+            for line in page_results:
+                if len(line) < 2:
+                    continue
+                bbox, text_info = line[0], line[1]
+                if isinstance(text_info, tuple) and len(text_info) >= 1 and len(bbox) >= 4:
+                    texts.append(text_info[0])
+                    confidences.append(text_info[1] if len(text_info) > 1 and text_info[1] is not None else np.nan)
+                    pages.append(page_idx)
+                    bboxes.append(bbox)
+
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+        boxes = to_box_array(bboxes).astype(np.float32)
+        geometry = box_geometry(boxes)
+        table = cls(
+            ''.join(texts),
+            ends - lengths,
+            ends,
+            np.asarray(confidences, dtype=np.float32),
+            np.asarray(pages, dtype=np.int32),
+            boxes,
+            geometry['center_y'],
+            geometry['left_x'],
+            geometry['right_x'],
+            geometry['height']
+        )
+        if sort and len(table):
+            table = table.take(np.lexsort((table.center_y, table.pages)))
+        return table
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TokenView(self, index)
+
+    def __getitem__(self, key):
+        """
+        Get one token (int), a zero-copy sub-table (slice) or a copied sub-table (index array or mask)
+        """
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError(key)
+            return TokenView(self, int(key))
+        if isinstance(key, slice):
+            return self._subset(key)
+        return self.take(key)
+
+    def _subset(self, index):
+        return TokenTable(
+            self._text_buffer,
+            self.starts[index],
+            self.ends[index],
+            self.confidences[index],
+            self.pages[index],
+            self.boxes[index],
+            self.center_y[index],
+            self.left_x[index],
+            self.right_x[index],
+            self.heights[index]
+        )
+
+    def take(self, indices) -> 'TokenTable':
+        """
+        Get the tokens at the given indices (or boolean mask), in that order
+
+        The text buffer is shared; the numeric columns are copied.
+        """
+        return self._subset(np.asarray(indices))
+
+    def text(self, index: int) -> str:
+        """Text of one token"""
+        return self._text_buffer[self.starts[index]:self.ends[index]]
+
+    def texts(self) -> list:
+        """Texts of all tokens, in table order"""
+        buffer = self._text_buffer
+        return [buffer[start:end] for start, end in zip(self.starts.tolist(), self.ends.tolist())]
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages up to the last page holding a token"""
+        return int(self.pages.max()) + 1 if len(self) else 0
+
+    def page(self, page_idx: int) -> 'TokenTable':
+        """
+        Get the tokens of one page
+
+        Returns a zero-copy slice when the table is ordered by page (as tables
+        built by from_ocr_result and group_rows are), otherwise a copy.
+        """
+        if len(self) == 0 or np.all(self.pages[1:] >= self.pages[:-1]):
+            start, end = np.searchsorted(self.pages, [page_idx, page_idx + 1])
+            return self[int(start):int(end)]
+        return self.take(self.pages == page_idx)
+
+    def group_rows(self, gap_factor: float = ROW_GAP_FACTOR) -> list:
+        """
+        Split the tokens into text rows
+
+        Rows are found with cluster_rows. The tokens are reordered once into
+        reading order (by row, then left to right) and every row is returned as
+        a zero-copy slice of that ordered table.
+
+        Args:
+            gap_factor: Row gap threshold as a fraction of the page's median text height
+
+        Returns:
+            list: One TokenTable per row, in reading order
+        """
+        if len(self) == 0:
+            return []
+        rows = cluster_rows(self.pages, self.center_y, self.heights, gap_factor)
+        order = reading_order(rows, self.left_x)
+        ordered = self.take(order)
+        boundaries = np.flatnonzero(np.diff(rows[order])) + 1
+        edges = [0, *boundaries.tolist(), len(ordered)]
+        return [ordered[start:end] for start, end in zip(edges[:-1], edges[1:])]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table's columns and text buffer"""
+        arrays = (self.starts, self.ends, self.confidences, self.pages, self.boxes,
+                  self.center_y, self.left_x, self.right_x, self.heights)
+        return sum(array.nbytes for array in arrays) + len(self._text_buffer.encode('utf-8'))
+
+    def save(self, path: str, **metadata) -> None:
+        """
+        Write the table to an uncompressed .npz file
+
+        Args:
+            path: Output file path
+            **metadata: JSON-serializable values stored alongside the table (returned by load)
+        """
+        texts = self.texts()
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        np.savez(
+            path,
+            text=np.frombuffer(''.join(texts).encode('utf-8'), dtype=np.uint8),
+            lengths=lengths,
+            confidences=self.confidences,
+            pages=self.pages,
+            boxes=self.boxes,
+            center_y=self.center_y,
+            left_x=self.left_x,
+            right_x=self.right_x,
+            heights=self.heights,
+            metadata=np.array(json.dumps(metadata))
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Read a table written by save
+
+        Returns:
+            TokenTable: The table
+            dict: The metadata passed to save
+        """
+        with np.load(path) as data:
+            ends = np.cumsum(data['lengths'])
+            table = cls(
+                data['text'].tobytes().decode('utf-8'),
+                ends - data['lengths'],
+                ends,
+                data['confidences'],
+                data['pages'],
+                data['boxes'],
+                data['center_y'],
+                data['left_x'],
+                data['right_x'],
+                data['heights']
+            )
+            metadata = json.loads(str(data['metadata']))
+        return table, metadata
+
+    def to_numpy(self) -> dict:
+        """
+        Export the table as NumPy columns
+
+        Returns:
+            dict: Column name to array; 'text' is a unicode array and the box is
+                  flattened into bbox_x1 ... bbox_y4 columns
+        """
+        columns = {
+            'text': np.array(self.texts(), dtype=np.str_),
+            'confidence': self.confidences,
+            'page': self.pages
+        }
+        flat_boxes = self.boxes.reshape(len(self), 8)
+        for column_idx, name in enumerate(BBOX_COLUMNS):
+            columns[name] = flat_boxes[:, column_idx]
+        columns.update({
+            'center_y': self.center_y,
+            'left_x': self.left_x,
+            'right_x': self.right_x,
+            'height': self.heights
+        })
+        return columns
+
+    def to_arrow(self):
+        """
+        Export the table as a pyarrow.Table (same columns as to_numpy)
+
+        Returns:
+            pyarrow.Table: The tokens; numeric columns are converted without copying where possible
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for Arrow export. Please install it with: pip install pyarrow")
+
+        columns = self.to_numpy()
+        columns['text'] = pa.array(self.texts(), type=pa.string())
+        columns['confidence'] = pa.array(self.confidences, from_pandas=True)  # NaN -> null
+        return pa.table(columns)
+
+    def to_records(self) -> list:
+        """
+        Export the tokens as dicts (text, confidence, page, bbox), e.g. for JSON output
+
+        Box coordinates and confidences are rounded (to 2 and 4 decimals) to hide float32 noise.
+        """
+        boxes = np.round(self.boxes.astype(np.float64), 2).tolist()
+        confidences = np.round(self.confidences.astype(np.float64), 4).tolist()
+        return [
+            {
+                'text': text,
+                'confidence': None if confidence != confidence else confidence,  # NaN -> None
+                'page': page,
+                'bbox': bbox
+            }
+            for text, confidence, page, bbox in zip(self.texts(), confidences, self.pages.tolist(), boxes)
+        ]
+
+    def __repr__(self):
+        return f"TokenTable(tokens={len(self)}, pages={self.page_count})"
@@ -0,0 +1,269 @@
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span_id = contextvars.ContextVar('current_span_id', default=None)
+
+
+class Trace:
+    """Spans recorded for one request or job, shared by every thread working on it"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> list:
+        """
+        Get the recorded spans as a tree of stage timings
+
+        Returns:
+            list: Root stages, each {'name', 'duration_seconds', 'attributes', 'children'}
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s['start_ns'])
+
+        nodes = {}
+        roots = []
+        for span in spans:
+            node = {'name': span['name'], 'duration_seconds': span['duration_seconds']}
+            if span['attributes']:
+                node['attributes'] = span['attributes']
+            node['children'] = []
+            nodes[span['span_id']] = node
+        for span in spans:
+            parent = nodes.get(span['parent_id'])
+            (parent['children'] if parent else roots).append(nodes[span['span_id']])
+        return roots
+
+    def stage_timings(self) -> list:
+        """
+        Get the stages below the root span (the breakdown of what the root spent its time on)
+
+        Returns:
+            list: Stage timing trees, see breakdown()
+        """
+        roots = self.breakdown()
+        if len(roots) == 1 and roots[0]['name'] == self.name:
+            return roots[0]['children']
+        return roots
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """
+    Start a trace with a root span; spans opened inside it (in this thread or via
+    submit_with_context) are recorded as its descendants
+
+    Args:
+        name: Name of the root span
+        **attributes: Attributes attached to the root span
+
+    Yields:
+        Trace: The trace being recorded
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        with span(name, **attributes):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        get_exporter().export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a stage of the current trace (no-op outside a trace)
+
+    Args:
+        name: Stage name
+        **attributes: Attributes attached to the span
+
+    Yields:
+        dict: Mutable attributes of the span, for values only known inside the block
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attributes
+        return
+
+    span_id = os.urandom(8).hex()
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    start_ns = time.time_ns()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _current_span_id.reset(token)
+        trace.add({
+            'name': name,
+            'span_id': span_id,
+            'parent_id': parent_id,
+            'start_ns': start_ns,
+            'end_ns': time.time_ns(),
+            'duration_seconds': round(time.perf_counter() - start, 4),
+            'attributes': attributes,
+            'error': error
+        })
+
+
+def submit_with_context(executor, func, *args, **kwargs):
+    """
+    Submit work to an executor so spans it opens attach to the caller's current span
+
+    Args:
+        executor: concurrent.futures executor
+        func: Callable to run
+        *args, **kwargs: Arguments for the callable
+
+    Returns:
+        Future: The submitted task
+    """
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(trace: Trace, service_name: str = 'financial-document-api') -> dict:
+    """
+    Convert a trace to an OTLP/JSON ExportTraceServiceRequest
+
+    Args:
+        trace: Finished trace
+        service_name: Value of the service.name resource attribute
+
+    Returns:
+        dict: OTLP/JSON payload accepted by an OpenTelemetry collector's /v1/traces endpoint
+    """
+    with trace._lock:
+        spans = list(trace.spans)
+
+    otlp_spans = []
+    for s in spans:
+        otlp_span = {
+            'traceId': trace.trace_id,
+            'spanId': s['span_id'],
+            'name': s['name'],
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(s['start_ns']),
+            'endTimeUnixNano': str(s['end_ns']),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in s['attributes'].items()],
+            'status': {'code': 2, 'message': s['error']} if s['error'] else {'code': 1}
+        }
+        if s['parent_id']:
+            otlp_span['parentSpanId'] = s['parent_id']
+        otlp_spans.append(otlp_span)
+
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'utils.tracing'}, 'spans': otlp_spans}]
+        }]
+    }
+
+
+class TraceExporter:
+    """
+    Background exporter writing finished traces in OTLP/JSON format
+
+    Traces go to a JSON Lines file, an OTLP/HTTP collector endpoint, or both.
+    With neither configured, export is a no-op.
+    """
+
+    def __init__(self, file_path: str = None, otlp_endpoint: str = None):
+        """
+        Initialize the exporter
+
+        Args:
+            file_path: File to append one OTLP/JSON payload per line to
+            otlp_endpoint: Base URL of an OTLP/HTTP collector (e.g., http://localhost:4318)
+        """
+        self.file_path = file_path
+        self.otlp_endpoint = otlp_endpoint.rstrip('/') + '/v1/traces' if otlp_endpoint else None
+        self._queue = None
+        if file_path or otlp_endpoint:
+            self._queue = queue.Queue(maxsize=1000)
+            threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True).start()
+            atexit.register(self._queue.join)
+
+    def export(self, trace: Trace) -> None:
+        """Queue a finished trace for export (dropped if the queue is full)"""
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            print("[TRACING] Export queue full, dropping trace")
+
+    def _export_loop(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                payload = json.dumps(to_otlp(trace), ensure_ascii=False, default=str)
+                if self.file_path:
+                    with open(self.file_path, 'a', encoding='utf-8') as f:
+                        f.write(payload + '\n')
+                if self.otlp_endpoint:
+                    request = urllib.request.Request(
+                        self.otlp_endpoint,
+                        data=payload.encode('utf-8'),
+                        headers={'Content-Type': 'application/json'},
+                        method='POST'
+                    )
+                    urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                print(f"[TRACING] Failed to export trace {trace.trace_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> TraceExporter:
+    """
+    Get the process-wide trace exporter
+
+    Configured with TRACE_EXPORT_FILE (JSON Lines path) and the standard
+    OTEL_EXPORTER_OTLP_ENDPOINT (collector base URL) environment variables.
+
+    Returns:
+        TraceExporter: The exporter
+    """
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = TraceExporter(
+                    file_path=os.environ.get('TRACE_EXPORT_FILE'),
+                    otlp_endpoint=os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT')
+                )
+    return _exporter